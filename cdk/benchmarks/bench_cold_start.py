@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark dogs Lambda cold starts per route against moto.
+
+Each measurement runs in a fresh interpreter, so module imports, boto3
+service models and clients all start cold. It reports the init phase
+(importing dogs) and the first and second invocation of one route, plus the
+AWS clients that route ended up creating. ``eager`` recreates the original
+module, which built the DynamoDB resource and the KMS and S3 clients at
+import time; ``lazy`` is the module as it is.
+
+moto is imported before the timed phases in both modes, which also imports
+boto3. Importing boto3 itself is therefore left out of both: the eager
+module paid it at init, the lazy one pays it on the first invocation that
+needs a client.
+
+Run from the cdk directory:
+    python benchmarks/bench_cold_start.py --repeats 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+CDK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, CDK_DIR)
+
+SHELTER_ID = 'VA#ARLINGTON#S'
+DOG_ID = 'rex'
+
+ROUTES = {
+    'GET /dogs': {'httpMethod': 'GET', 'resource': '/dogs', 'path': '/dogs',
+                  'queryStringParameters': {'state': 'VA'}},
+    'GET /dogs/{dog_id}': {'httpMethod': 'GET', 'resource': '/dogs/{dog_id}',
+                           'path': f'/dogs/{DOG_ID}', 'pathParameters': {'dog_id': DOG_ID},
+                           'queryStringParameters': {'shelter_id': SHELTER_ID}},
+    'POST /dogs': {'httpMethod': 'POST', 'resource': '/dogs', 'path': '/dogs',
+                   'body': json.dumps({'shelter': 'S', 'city': 'Arlington', 'state': 'VA',
+                                       'dog_name': 'Bolt', 'species': 'Labrador Retriever',
+                                       'description': 'Calm'})},
+    'GET /interactions': {'httpMethod': 'GET', 'resource': '/interactions', 'path': '/interactions',
+                          'queryStringParameters': {'user_id': 'u1'}},
+    'POST /interactions': {'httpMethod': 'POST', 'resource': '/interactions', 'path': '/interactions',
+                           'body': json.dumps({'user_id': 'u2', 'shelter_id': SHELTER_ID,
+                                               'dog_id': DOG_ID, 'interaction_type': 'wag'})},
+    'GET /imports/{job_id}': {'httpMethod': 'GET', 'resource': '/imports/{job_id}',
+                              'path': '/imports/j1', 'pathParameters': {'job_id': 'j1'}}
+}
+
+
+def child(mode, route):
+    """Measure one cold start in this (fresh) interpreter and print it as JSON"""
+    import base64
+
+    import boto3
+    from moto import mock_dynamodb, mock_kms
+
+    from tests import conftest
+
+    with mock_dynamodb(), mock_kms():
+        started = time.perf_counter()
+        import clients
+        import dogs
+        if mode == 'eager':
+            resource = boto3.resource('dynamodb')
+            for name in (dogs.DOGS_TABLE_NAME, dogs.INTERACTIONS_TABLE_NAME, dogs.JOBS_TABLE_NAME,
+                         dogs.QUARANTINE_TABLE_NAME, dogs.IDEMPOTENCY_TABLE_NAME):
+                resource.Table(name)
+            for service in ('dynamodb', 'kms', 's3'):
+                clients.client(service)
+        init_ms = (time.perf_counter() - started) * 1000
+
+        # A separate session, so the setup warms none of the function's clients
+        session = boto3.Session()
+        dynamodb = session.resource('dynamodb')
+        for create in (conftest.create_dogs_table, conftest.create_interactions_table,
+                       conftest.create_jobs_table, conftest.create_quarantine_table,
+                       conftest.create_idempotency_table, conftest.create_search_table):
+            create(dynamodb)
+        kms = session.client('kms')
+        dogs.KMS_KEY_ID = kms.create_key(Description='Cold start')['KeyMetadata']['KeyId']
+        name = kms.encrypt(KeyId=dogs.KMS_KEY_ID, Plaintext=b'Rex')['CiphertextBlob']
+        dynamodb.Table(dogs.DOGS_TABLE_NAME).put_item(Item={
+            'shelter_id': SHELTER_ID, 'dog_id': DOG_ID, 'state': 'VA', 'shelter': 'S',
+            'city': 'Arlington', 'species': 'Labrador Retriever', 'description': 'Good with kids',
+            'encrypted_dog_name': base64.b64encode(name).decode('utf-8'),
+            'created_at': '2024-01-01T00:00:00+00:00', 'version': 1
+        })
+        dynamodb.Table(dogs.INTERACTIONS_TABLE_NAME).put_item(Item={
+            'user_id': 'u1', 'dog_key': f'{SHELTER_ID}#{DOG_ID}', 'shelter_id': SHELTER_ID,
+            'dog_id': DOG_ID, 'interaction_type': 'wag'
+        })
+        dynamodb.Table(dogs.JOBS_TABLE_NAME).put_item(Item={
+            'job_id': 'j1', 'job_type': 'import', 'status': 'completed'
+        })
+
+        event = dict(ROUTES[route], headers=None)
+        samples = []
+        for _ in range(2):
+            started = time.perf_counter()
+            response = dogs.handler(event, None)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(json.dumps({
+            'mode': mode,
+            'route': route,
+            'status': response['statusCode'],
+            'init_ms': init_ms,
+            'first_ms': samples[0],
+            'warm_ms': samples[1],
+            'clients': clients.created()
+        }))
+
+
+def measure(mode, route):
+    """Cold start of ``route`` in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, route],
+        cwd=CDK_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--routes', nargs='+', default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'ROUTE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'route':>22} {'mode':>6} {'init ms':>8} {'first ms':>9} {'cold ms':>8} "
+          f"{'warm ms':>8}  clients")
+    for route in args.routes:
+        for mode in ('eager', 'lazy'):
+            runs = [measure(mode, route) for _ in range(args.repeats)]
+            # The fastest run is the least disturbed by the machine
+            best = min(runs, key=lambda run: run['init_ms'] + run['first_ms'])
+            print(f"{route:>22} {mode:>6} {best['init_ms']:>8.1f} {best['first_ms']:>9.1f} "
+                  f"{best['init_ms'] + best['first_ms']:>8.1f} {best['warm_ms']:>8.1f}  "
+                  f"{','.join(best['clients'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark dog name decryption in GET /dogs listings against moto.
+
+Compares the original one-by-one decrypt loop ("before") with the concurrent
+batch decryption stage ("after") for 10/100/1000-item listings and prints
+p50/p99 latency. Moto answers KMS calls in-process, so --kms-latency-ms adds a
+simulated network round trip to every KMS decrypt to approximate real KMS.
+
+Run from the cdk directory:
+    python benchmarks/bench_decrypt.py --kms-latency-ms 5
+"""
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.support import percentile, moto_aws  # noqa: E402
+
+
+def sequential_decrypt(dogs, items):
+    """The original per-item decrypt loop from get_dogs"""
+    for item in items:
+        if 'encrypted_dog_name' in item:
+            try:
+                item['dog_name'] = dogs.decrypt_dog_name(item['encrypted_dog_name'])
+                del item['encrypted_dog_name']
+            except Exception:
+                item['dog_name'] = "Name unavailable"
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--kms-latency-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    with moto_aws() as aws:
+        import dogs
+
+        kms = aws['kms']
+        real_decrypt = kms.decrypt
+
+        def slow_decrypt(**kwargs):
+            time.sleep(args.kms_latency_ms / 1000)
+            return real_decrypt(**kwargs)
+
+        with patch.object(dogs, 'kms', kms), patch.object(kms, 'decrypt', slow_decrypt):
+            print(f"{'items':>6} {'variant':>8} {'p50 ms':>9} {'p99 ms':>9}")
+            for size in args.sizes:
+                template = [{'dog_id': str(i), 'encrypted_dog_name': dogs.encrypt_dog_name(f'Dog {i}')}
+                            for i in range(size)]
+                for label, decrypt in (('before', lambda items: sequential_decrypt(dogs, items)),
+                                       ('after', dogs.decrypt_dog_names)):
+                    samples = []
+                    for _ in range(args.runs):
+                        items = [dict(item) for item in template]
+                        started = time.perf_counter()
+                        decrypt(items)
+                        samples.append((time.perf_counter() - started) * 1000)
+                    print(f'{size:>6} {label:>8} {percentile(samples, 50):>9.2f} '
+                          f'{percentile(samples, 99):>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
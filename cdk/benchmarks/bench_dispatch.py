@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-invocation request dispatch for the dogs Lambda.
+
+Compares the original if/elif chain over path and method with the route
+table, both when API Gateway supplies the resource template (one dict
+lookup) and when only the path is known (precompiled pattern match). Every
+implementation resolves the same mix of events to the same operation; only
+the time spent before the operation runs is measured.
+
+Run from the cdk directory:
+    python benchmarks/bench_dispatch.py --events 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# support imports the test configuration, which sets the region and the
+# functions path the dogs module needs
+from benchmarks.support import percentile  # noqa: E402
+
+import dogs  # noqa: E402
+
+REQUESTS = [
+    ('GET', '/dogs', '/dogs', {}, None),
+    ('POST', '/dogs', '/dogs', {}, {'dog_name': 'Rex'}),
+    ('POST', '/dogs/batch', '/dogs/batch', {}, '[]'),
+    ('GET', '/dogs/{id}', '/dogs/{dog_id}', {'dog_id': '{id}'}, None),
+    ('PUT', '/dogs/{id}', '/dogs/{dog_id}', {'dog_id': '{id}'}, {'description': 'Calm'}),
+    ('DELETE', '/dogs/{id}', '/dogs/{dog_id}', {'dog_id': '{id}'}, None),
+    ('POST', '/interactions', '/interactions', {}, {'user_id': 'u1'}),
+    ('GET', '/interactions', '/interactions', {}, None),
+    ('GET', '/imports/{id}', '/imports/{job_id}', {'job_id': '{id}'}, None)
+]
+QUERY = {'shelter_id': 'VA#A#S', 'user_id': 'u1'}
+
+
+def synthetic_events(count, seed, with_resource):
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        method, path, resource, path_parameters, body = rng.choice(REQUESTS)
+        identifier = f'id-{rng.randrange(1000)}'
+        event = {
+            'httpMethod': method,
+            'path': path.replace('{id}', identifier),
+            'pathParameters': {name: identifier for name in path_parameters} or None,
+            'queryStringParameters': dict(QUERY),
+            'headers': {'If-None-Match': '"etag"', 'Idempotency-Key': 'k'},
+            'body': json.dumps(body) if isinstance(body, dict) else body
+        }
+        if with_resource:
+            event['resource'] = resource
+        events.append(event)
+    return events
+
+
+def legacy_dispatch(event):
+    """The original if/elif chain from route_request, returning the operation name"""
+    http_method = event['httpMethod']
+    path = event['path']
+    path_parameters = event.get('pathParameters') or {}
+    query_parameters = event.get('queryStringParameters') or {}
+    body = event.get('body')
+
+    if path == '/dogs/batch' and http_method == 'POST':
+        return 'create_dogs_batch'
+
+    request_body = {}
+    if body:
+        request_body = json.loads(body)
+
+    if path == '/dogs':
+        if http_method == 'GET':
+            return 'get_dogs', query_parameters, dogs.get_header(event, 'If-None-Match')
+        elif http_method == 'POST':
+            return 'create_dog', request_body
+    elif path.startswith('/dogs/') and 'dog_id' in path_parameters:
+        dog_id = path_parameters['dog_id']
+        if http_method == 'GET':
+            return 'get_dog', dog_id, dogs.get_header(event, 'If-None-Match')
+        elif http_method == 'PUT':
+            return 'update_dog', dog_id, request_body
+        elif http_method == 'DELETE':
+            return 'delete_dog', dog_id
+    elif path == '/interactions':
+        if http_method == 'POST':
+            return 'create_interaction', request_body, dogs.get_header(event, 'Idempotency-Key')
+        elif http_method == 'GET':
+            return 'get_user_interactions', query_parameters
+    elif path.startswith('/imports/') and 'job_id' in path_parameters:
+        if http_method == 'GET':
+            return 'get_import_job', path_parameters['job_id']
+    return None
+
+
+def table_dispatch(event):
+    """Resolve and validate a request through the route table"""
+    return dogs.ROUTER.resolve(event)
+
+
+def timed(function, events):
+    samples = []
+    for event in events:
+        started = time.perf_counter_ns()
+        function(event)
+        samples.append(time.perf_counter_ns() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    with_resource = synthetic_events(args.events, args.seed, True)
+    path_only = synthetic_events(args.events, args.seed, False)
+    implementations = [
+        ('if/elif', legacy_dispatch, path_only),
+        ('table', table_dispatch, with_resource),
+        ('table (path)', table_dispatch, path_only)
+    ]
+
+    print(f"{'implementation':>15} {'p50 ns':>9} {'p99 ns':>9} {'mean ns':>9}")
+    for name, function, events in implementations:
+        # Warm up caches and the allocator before sampling
+        timed(function, events[:1000])
+        samples = timed(function, events)
+        print(f'{name:>15} {percentile(samples, 50):>9} {percentile(samples, 99):>9} '
+              f'{sum(samples) / len(samples):>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark weight normalization on a synthetic corpus of shelter weights.
+
+Compares the original parse_weight (re imported per call, first digit run,
+units ignored) with the precompiled normalizer called per row and with its
+batch API. Every generated value carries its expected weight in pounds, so
+the accuracy of each implementation is reported alongside its run time.
+
+Run from the cdk directory:
+    python benchmarks/bench_parse_weight.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'functions'))
+
+import weights  # noqa: E402
+
+WORDS = {20: 'twenty', 30: 'thirty', 40: 'forty', 50: 'fifty', 60: 'sixty', 70: 'seventy'}
+DIGITS = ['', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine']
+
+
+def legacy_parse_weight(weight_str):
+    """The original parse_weight from dogs.py"""
+    if isinstance(weight_str, (int, float)):
+        return float(weight_str)
+
+    if isinstance(weight_str, str):
+        import re
+        numbers = re.findall(r'\d+\.?\d*', weight_str.lower())
+        if numbers:
+            return float(numbers[0])
+
+    return None
+
+
+def in_words(pounds):
+    tens, ones = divmod(pounds, 10)
+    return f'{WORDS[tens * 10]} {DIGITS[ones]}'.strip()
+
+
+def synthetic_corpus(rows, seed):
+    """Return ``(raw, expected_pounds)`` pairs in typical shelter spellings"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(rows):
+        pounds = rng.randint(20, 79)
+        kind = rng.randrange(7)
+        if kind == 0:
+            corpus.append((pounds, float(pounds)))
+        elif kind == 1:
+            corpus.append((str(pounds), float(pounds)))
+        elif kind == 2:
+            corpus.append((f'{pounds} {rng.choice(["lbs", "lb", "pounds"])}', float(pounds)))
+        elif kind == 3:
+            corpus.append((f'{in_words(pounds)} pounds', float(pounds)))
+        elif kind == 4:
+            kilograms = rng.randint(10, 35)
+            corpus.append((f'{kilograms} kg', round(kilograms * weights.POUNDS_PER_KILOGRAM, 2)))
+        elif kind == 5:
+            corpus.append((f'{pounds}-{pounds + 10} lbs', pounds + 5.0))
+        else:
+            corpus.append((f'about {pounds}.5 lbs', pounds + 0.5))
+    return corpus
+
+
+def timed(function, values):
+    started = time.perf_counter()
+    result = function(values)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.rows, args.seed)
+    values = [raw for raw, _ in corpus]
+    expected = [pounds for _, pounds in corpus]
+
+    implementations = [
+        ('legacy', lambda column: [legacy_parse_weight(value) for value in column]),
+        ('per-row', lambda column: [weights.parse_weight(value) for value in column]),
+        ('batch', weights.parse_weights)
+    ]
+
+    print(f"{'implementation':>15} {'seconds':>9} {'rows/s':>11} {'correct':>8}")
+    for name, implementation in implementations:
+        weights._parse_text.cache_clear()
+        result, elapsed = timed(implementation, values)
+        correct = sum(1 for got, want in zip(result, expected) if got == want)
+        print(f'{name:>15} {elapsed:>9.3f} {len(values) / elapsed:>11,.0f} '
+              f'{correct / len(values):>7.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Shared helpers for the local benchmarks.
+
+The benchmarks reuse the moto table definitions from tests/conftest.py so they
+exercise the same schema as the unit tests.
+"""
+import contextlib
+import math
+
+import boto3
+from moto import mock_dynamodb, mock_kms
+
+from tests.conftest import create_dogs_table, create_interactions_table
+
+
+def percentile(samples, pct):
+    """Return the nearest-rank percentile of ``samples``"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@contextlib.contextmanager
+def moto_aws():
+    """Moto-backed tables and KMS key wired into the dogs module"""
+    with mock_dynamodb(), mock_kms():
+        import dogs
+
+        dynamodb = boto3.resource('dynamodb')
+        kms = boto3.client('kms')
+        dogs.KMS_KEY_ID = kms.create_key(Description='Benchmark key')['KeyMetadata']['KeyId']
+        dogs.data_key_cache.clear()
+        yield {
+            'dogs': create_dogs_table(dynamodb),
+            'interactions': create_interactions_table(dynamodb),
+            'kms': kms
+        }
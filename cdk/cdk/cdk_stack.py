@@ -1,5 +1,6 @@
 from constructs import Construct
 from aws_cdk import (
+    BundlingOptions,
     Duration,
     Stack,
     RemovalPolicy,
@@ -8,9 +9,15 @@ from aws_cdk import (
     aws_sns as sns,
     aws_sns_subscriptions as subs,
     aws_lambda as _lambda,
+    aws_lambda_event_sources as event_sources,
     aws_apigateway as apigw,
     aws_dynamodb as dynamodb,
-    aws_kms as kms
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_kms as kms,
+    aws_s3 as s3,
+    aws_s3_notifications as s3n,
+    aws_secretsmanager as secretsmanager
 )
 
 
@@ -73,6 +80,60 @@ class CdkStack(Stack):
             )
         )
 
+        # DynamoDB creates one GSI per table update, so an existing table gets
+        # the three indexes below one deployment at a time: deploy with
+        # -c dogs_table_new_indexes=1, then 2, then without the context
+        new_indexes = int(self.node.try_get_context('dogs_table_new_indexes') or 3)
+
+        # GSI for age filters within a state: birth_date is an ISO date, so age
+        # bounds become a range condition on the sort key. Dogs without a
+        # recognized birthday are left out of this sparse index.
+        if new_indexes >= 1:
+            dogs_table.add_global_secondary_index(
+                index_name='StateBirthDateIndex',
+                partition_key=dynamodb.Attribute(
+                    name='state',
+                    type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name='birth_date',
+                    type=dynamodb.AttributeType.STRING
+                )
+            )
+
+        # GSI for "labs in VA, 40-60 lb, brown": partitioned by state and colour
+        # family (state_color, e.g. VA#chocolate) and sorted by weight, so the
+        # weight range is a key condition. Dogs without a weight or a known
+        # colour family are left out of this sparse index.
+        if new_indexes >= 2:
+            dogs_table.add_global_secondary_index(
+                index_name='StateColorWeightIndex',
+                partition_key=dynamodb.Attribute(
+                    name='state_color',
+                    type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name='dog_weight',
+                    type=dynamodb.AttributeType.NUMBER
+                )
+            )
+
+        # GSI for listings sorted by popularity (wags minus growls), kept
+        # current from the interactions stream. Every dog is the same species,
+        # so a listing is one query on one partition, read in popularity order
+        if new_indexes >= 3:
+            dogs_table.add_global_secondary_index(
+                index_name='SpeciesPopularityIndex',
+                partition_key=dynamodb.Attribute(
+                    name='species',
+                    type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name='popularity',
+                    type=dynamodb.AttributeType.NUMBER
+                )
+            )
+
         # DynamoDB table for user interactions (wags/growls)
         interactions_table = dynamodb.Table(
             self, 'UserInteractionsTable',
@@ -89,7 +150,8 @@ class CdkStack(Stack):
             encryption=dynamodb.TableEncryption.CUSTOMER_MANAGED,
             encryption_key=encryption_key,
             point_in_time_recovery=True,
-            removal_policy=RemovalPolicy.DESTROY  # For development only
+            removal_policy=RemovalPolicy.DESTROY,  # For development only
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES
         )
 
         # GSI for querying interactions by dog
@@ -105,46 +167,476 @@ class CdkStack(Stack):
             )
         )
 
+        # DynamoDB table for asynchronous job progress (bulk imports)
+        jobs_table = dynamodb.Table(
+            self, 'JobsTable',
+            table_name='pupper-jobs',
+            partition_key=dynamodb.Attribute(
+                name='job_id',
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            encryption=dynamodb.TableEncryption.CUSTOMER_MANAGED,
+            encryption_key=encryption_key,
+            point_in_time_recovery=True,
+            removal_policy=RemovalPolicy.DESTROY  # For development only
+        )
+
+        # DynamoDB table for submitted records that are not purebred Labradors
+        quarantine_table = dynamodb.Table(
+            self, 'QuarantineTable',
+            table_name='pupper-quarantine',
+            partition_key=dynamodb.Attribute(
+                name='quarantine_id',
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            encryption=dynamodb.TableEncryption.CUSTOMER_MANAGED,
+            encryption_key=encryption_key,
+            point_in_time_recovery=True,
+            time_to_live_attribute='expires_at',
+            removal_policy=RemovalPolicy.DESTROY  # For development only
+        )
+
+        # DynamoDB table for short-lived markers that make retries idempotent
+        idempotency_table = dynamodb.Table(
+            self, 'IdempotencyTable',
+            table_name='pupper-idempotency',
+            partition_key=dynamodb.Attribute(
+                name='idempotency_key',
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            encryption=dynamodb.TableEncryption.CUSTOMER_MANAGED,
+            encryption_key=encryption_key,
+            time_to_live_attribute='expires_at',
+            removal_policy=RemovalPolicy.DESTROY  # For development only
+        )
+
+        # DynamoDB table of description posting lists: one item per term and dog
+        search_table = dynamodb.Table(
+            self, 'SearchTable',
+            table_name='pupper-search',
+            partition_key=dynamodb.Attribute(
+                name='term',
+                type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name='dog_key',
+                type=dynamodb.AttributeType.STRING
+            ),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            encryption=dynamodb.TableEncryption.CUSTOMER_MANAGED,
+            encryption_key=encryption_key,
+            removal_policy=RemovalPolicy.DESTROY  # For development only
+        )
+
+        lambda_environment = {
+            'DOGS_TABLE_NAME': dogs_table.table_name,
+            'INTERACTIONS_TABLE_NAME': interactions_table.table_name,
+            'JOBS_TABLE_NAME': jobs_table.table_name,
+            'QUARANTINE_TABLE_NAME': quarantine_table.table_name,
+            'IDEMPOTENCY_TABLE_NAME': idempotency_table.table_name,
+            'SEARCH_TABLE_NAME': search_table.table_name,
+            'KMS_KEY_ID': encryption_key.key_id
+        }
+
+        # Envelope encryption seals dog names locally with a cached KMS data key
+        # and needs cryptography, which the Lambda runtime lacks. Its layer is
+        # built in Docker at synth time, so the mode is opt-in with
+        # -c name_encryption_mode=envelope; otherwise names use per-record KMS.
+        name_encryption_layers = []
+        name_encryption_environment = {}
+        if self.node.try_get_context('name_encryption_mode') == 'envelope':
+            name_encryption_layers.append(_lambda.LayerVersion(
+                self, 'NameEncryptionLayer',
+                code=_lambda.Code.from_asset('layers/name_encryption', bundling=BundlingOptions(
+                    image=_lambda.Runtime.PYTHON_3_12.bundling_image,
+                    command=['bash', '-c', 'pip install -r requirements.txt -t /asset-output/python']
+                )),
+                compatible_runtimes=[_lambda.Runtime.PYTHON_3_12],
+                description='cryptography for envelope encryption of dog names'
+            ))
+            name_encryption_environment['NAME_ENCRYPTION_MODE'] = 'envelope'
+
+        # Browser and stage cache lifetimes of GET /dogs/{dog_id} and GET /dogs;
+        # edits are not purged from the stage cache, so they stay short
+        dog_cache_ttl = Duration.seconds(10)
+        listing_cache_ttl = Duration.seconds(5)
+
+        # Key the API signs next_token continuation tokens with. CloudFormation
+        # resolves it into the function's environment at deploy time.
+        page_token_secret = secretsmanager.Secret(
+            self, 'PageTokenSigningKey',
+            description='HMAC key for Pupper API pagination tokens',
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                password_length=64,
+                exclude_punctuation=True
+            ),
+            removal_policy=RemovalPolicy.DESTROY  # For development only
+        )
+
         # Lambda function for dog CRUD operations
         dogs_lambda = _lambda.Function(
             self, 'DogsHandler',
             runtime=_lambda.Runtime.PYTHON_3_12,
             code=_lambda.Code.from_asset('functions'),
             handler='dogs.handler',
+            layers=name_encryption_layers,
             environment={
-                'DOGS_TABLE_NAME': dogs_table.table_name,
-                'INTERACTIONS_TABLE_NAME': interactions_table.table_name,
-                'KMS_KEY_ID': encryption_key.key_id
+                **lambda_environment,
+                **name_encryption_environment,
+                'PAGE_TOKEN_SIGNING_KEY': page_token_secret.secret_value.unsafe_unwrap(),
+                'DOG_CACHE_CONTROL': f'public, max-age={dog_cache_ttl.to_seconds()}',
+                'LISTING_CACHE_CONTROL': f'public, max-age={listing_cache_ttl.to_seconds()}'
             },
             timeout=Duration.seconds(30)
         )
 
-        # Grant Lambda permissions to access DynamoDB tables
-        dogs_table.grant_read_write_data(dogs_lambda)
-        interactions_table.grant_read_write_data(dogs_lambda)
-        
-        # Grant Lambda permissions to use KMS key for encryption/decryption
-        encryption_key.grant_encrypt_decrypt(dogs_lambda)
+        # Lambda function for one-off maintenance tasks (e.g. re-wrapping dog names)
+        maintenance_lambda = _lambda.Function(
+            self, 'DogsMaintenance',
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=_lambda.Code.from_asset('functions'),
+            handler='dogs.maintenance_handler',
+            layers=name_encryption_layers,
+            environment={**lambda_environment, **name_encryption_environment},
+            timeout=Duration.minutes(15)
+        )
+
+        # Per-dog wag/growl counters aggregated from the interactions stream
+        aggregator_lambda = _lambda.Function(
+            self, 'InteractionAggregator',
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=_lambda.Code.from_asset('functions'),
+            handler='popularity.stream_handler',
+            environment=lambda_environment,
+            timeout=Duration.seconds(60)
+        )
+
+        aggregator_dead_letter_queue = sqs.Queue(
+            self, 'InteractionAggregatorDeadLetterQueue',
+            retention_period=Duration.days(14)
+        )
+
+        # Stream markers expire after two days, so records older than one day
+        # are sent to the dead-letter queue instead of being retried
+        aggregator_lambda.add_event_source(event_sources.DynamoEventSource(
+            interactions_table,
+            starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+            batch_size=100,
+            max_batching_window=Duration.seconds(5),
+            retry_attempts=10,
+            max_record_age=Duration.days(1),
+            report_batch_item_failures=True,
+            on_failure=event_sources.SqsDlq(aggregator_dead_letter_queue)
+        ))
+        dogs_table.grant_write_data(aggregator_lambda)
+        idempotency_table.grant_write_data(aggregator_lambda)
+
+        # Deletes the interactions of deleted dogs off the API path, recording
+        # progress in a tombstone in the jobs table
+        cleanup_lambda = _lambda.Function(
+            self, 'DogCleanupWorker',
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=_lambda.Code.from_asset('functions'),
+            handler='cleanup.stream_handler',
+            environment=lambda_environment,
+            timeout=Duration.minutes(5)
+        )
+
+        cleanup_dead_letter_queue = sqs.Queue(
+            self, 'DogCleanupDeadLetterQueue',
+            retention_period=Duration.days(14)
+        )
+
+        # DynamoDB serves at most two concurrent readers per stream shard
+        # before throttling them. The dogs stream has two: this worker and
+        # RecommenderBuilder. A further consumer must share one of them.
+        cleanup_lambda.add_event_source(event_sources.DynamoEventSource(
+            dogs_table,
+            starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+            batch_size=10,
+            retry_attempts=10,
+            report_batch_item_failures=True,
+            on_failure=event_sources.SqsDlq(cleanup_dead_letter_queue),
+            # Only deletes; edits and counter updates never invoke the worker
+            filters=[_lambda.FilterCriteria.filter({
+                'eventName': _lambda.FilterRule.is_equal('REMOVE')
+            })]
+        ))
+        interactions_table.grant_read_write_data(cleanup_lambda)
+        jobs_table.grant_read_write_data(cleanup_lambda)
+
+        # Dog recommendations: a feature matrix artifact kept current from the
+        # dogs stream and memory-mapped by the API function
+        recommender_bucket = s3.Bucket(
+            self, 'RecommenderModelBucket',
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            lifecycle_rules=[s3.LifecycleRule(
+                # Versions the builder tagged once the manifest moved on; the live
+                # version is never tagged. Warm containers re-read the manifest every minute
+                prefix='recommender/model-',
+                tag_filters={'superseded': 'true'},
+                expiration=Duration.days(2)
+            )],
+            removal_policy=RemovalPolicy.DESTROY  # For development only
+        )
+
+        # NumPy is not in the Lambda runtime; default to the AWS SDK for pandas layer
+        numpy_layer = _lambda.LayerVersion.from_layer_version_arn(
+            self, 'NumpyLayer',
+            self.node.try_get_context('numpy_layer_arn') or
+            f'arn:aws:lambda:{self.region}:336392948345:layer:AWSSDKPandas-Python312:13'
+        )
+        recommender_environment = {
+            **lambda_environment,
+            'RECOMMENDER_BUCKET_NAME': recommender_bucket.bucket_name
+        }
+
+        recommender_builder_lambda = _lambda.Function(
+            self, 'RecommenderBuilder',
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=_lambda.Code.from_asset('functions'),
+            handler='recommender.build_handler',
+            layers=[numpy_layer],
+            environment={**recommender_environment, 'SCAN_SEGMENTS': '8'},
+            memory_size=1024,
+            timeout=Duration.minutes(5),
+            # One writer at a time keeps manifest conflicts rare
+            reserved_concurrent_executions=1
+        )
+        recommender_dead_letter_queue = sqs.Queue(
+            self, 'RecommenderBuilderDeadLetterQueue',
+            retention_period=Duration.days(14)
+        )
+
+        # Every batch publishes a full copy of the matrix, so batches are
+        # collected for up to five minutes. Batches that still fail go to the
+        # dead-letter queue; the daily rebuild picks up their changes.
+        recommender_builder_lambda.add_event_source(event_sources.DynamoEventSource(
+            dogs_table,
+            starting_position=_lambda.StartingPosition.LATEST,
+            batch_size=10000,
+            max_batching_window=Duration.minutes(5),
+            retry_attempts=5,
+            report_batch_item_failures=True,
+            on_failure=event_sources.SqsDlq(recommender_dead_letter_queue)
+        ))
+        dogs_table.grant_read_data(recommender_builder_lambda)
+        recommender_bucket.grant_read_write(recommender_builder_lambda)
+
+        # Daily full rebuild ages dogs into new buckets and repairs any drift
+        events.Rule(
+            self, 'RecommenderDailyRebuild',
+            schedule=events.Schedule.rate(Duration.days(1)),
+            targets=[targets.LambdaFunction(
+                recommender_builder_lambda,
+                event=events.RuleTargetInput.from_object({'task': 'rebuild'})
+            )]
+        )
+
+        recommendations_lambda = _lambda.Function(
+            self, 'RecommendationsHandler',
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=_lambda.Code.from_asset('functions'),
+            handler='recommender.handler',
+            layers=[numpy_layer, *name_encryption_layers],
+            environment={**recommender_environment, **name_encryption_environment},
+            memory_size=1024,
+            timeout=Duration.seconds(30)
+        )
+        dogs_table.grant_read_data(recommendations_lambda)
+        interactions_table.grant_read_data(recommendations_lambda)
+        recommender_bucket.grant_read(recommendations_lambda)
+        encryption_key.grant_decrypt(recommendations_lambda)
+
+        # S3 bucket and Lambda function for bulk NDJSON exports of the dogs table
+        export_bucket = s3.Bucket(
+            self, 'DogExportBucket',
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            removal_policy=RemovalPolicy.DESTROY  # For development only
+        )
+
+        export_lambda = _lambda.Function(
+            self, 'DogsExport',
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=_lambda.Code.from_asset('functions'),
+            handler='dogs.export_handler',
+            environment={
+                **lambda_environment,
+                'EXPORT_BUCKET_NAME': export_bucket.bucket_name,
+                'SCAN_SEGMENTS': '8'
+            },
+            memory_size=1024,
+            timeout=Duration.minutes(15)
+        )
+        dogs_table.grant_read_data(export_lambda)
+        export_bucket.grant_put(export_lambda)
+
+        # Bulk imports: files dropped under imports/ are split into SQS chunks
+        # that a worker validates and writes in batches
+        import_bucket = s3.Bucket(
+            self, 'DogImportBucket',
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            removal_policy=RemovalPolicy.DESTROY  # For development only
+        )
+
+        import_dead_letter_queue = sqs.Queue(
+            self, 'ImportDeadLetterQueue',
+            retention_period=Duration.days(14)
+        )
+
+        import_queue = sqs.Queue(
+            self, 'ImportQueue',
+            # Must exceed the worker timeout
+            visibility_timeout=Duration.seconds(300),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=5,
+                queue=import_dead_letter_queue
+            )
+        )
+
+        import_topic = sns.Topic(
+            self, 'ImportEvents',
+            display_name='Pupper import notifications'
+        )
+
+        import_environment = {
+            **lambda_environment,
+            'IMPORT_QUEUE_URL': import_queue.queue_url,
+            'IMPORT_TOPIC_ARN': import_topic.topic_arn
+        }
+
+        import_split_lambda = _lambda.Function(
+            self, 'ImportSplitter',
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=_lambda.Code.from_asset('functions'),
+            handler='imports.split_handler',
+            environment=import_environment,
+            memory_size=512,
+            timeout=Duration.minutes(15)
+        )
+        import_bucket.grant_read(import_split_lambda)
+        import_queue.grant_send_messages(import_split_lambda)
+        import_bucket.add_event_notification(
+            s3.EventType.OBJECT_CREATED,
+            s3n.LambdaDestination(import_split_lambda),
+            s3.NotificationKeyFilter(prefix='imports/')
+        )
+
+        import_worker_lambda = _lambda.Function(
+            self, 'ImportWorker',
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            code=_lambda.Code.from_asset('functions'),
+            handler='imports.worker_handler',
+            layers=name_encryption_layers,
+            environment={**import_environment, **name_encryption_environment},
+            memory_size=512,
+            timeout=Duration.minutes(2)
+        )
+        import_worker_lambda.add_event_source(event_sources.SqsEventSource(
+            import_queue,
+            batch_size=5,
+            report_batch_item_failures=True
+        ))
+
+        for function in (import_split_lambda, import_worker_lambda):
+            jobs_table.grant_read_write_data(function)
+            import_topic.grant_publish(function)
+        dogs_table.grant_read_write_data(import_worker_lambda)
+        quarantine_table.grant_write_data(import_worker_lambda)
+        search_table.grant_write_data(import_worker_lambda)
+        encryption_key.grant_encrypt_decrypt(import_worker_lambda)
+
+        idempotency_table.grant_read_write_data(dogs_lambda)
+
+        for function in (dogs_lambda, maintenance_lambda):
+            # Grant Lambda permissions to access DynamoDB tables
+            dogs_table.grant_read_write_data(function)
+            interactions_table.grant_read_write_data(function)
+            jobs_table.grant_read_data(function)
+            quarantine_table.grant_read_write_data(function)
+            search_table.grant_read_write_data(function)
+
+            # Grant Lambda permissions to use KMS key for encryption/decryption
+            encryption_key.grant_encrypt_decrypt(function)
 
         # API Gateway
         api = apigw.RestApi(
             self, 'PupperApi',
             rest_api_name='Pupper API',
             description='API for Pupper dog adoption application',
+            # Compressed responses are base64-encoded by the functions; API Gateway
+            # only decodes them for binary media types, and matches on Accept
+            binary_media_types=['*/*'],
             default_cors_preflight_options=apigw.CorsOptions(
                 allow_origins=apigw.Cors.ALL_ORIGINS,
                 allow_methods=apigw.Cors.ALL_METHODS,
-                allow_headers=['Content-Type', 'X-Amz-Date', 'Authorization', 'X-Api-Key']
+                allow_headers=['Content-Type', 'X-Amz-Date', 'Authorization', 'X-Api-Key',
+                               'Idempotency-Key', 'If-None-Match']
+            ),
+            # Stage cache for dog reads only; TTLs match the Cache-Control max-age
+            # the function sends. Entries hold decrypted names, so they are encrypted.
+            # Writes do not purge it, which is why the TTLs are short.
+            deploy_options=apigw.StageOptions(
+                cache_cluster_enabled=True,
+                cache_cluster_size='0.5',
+                method_options={
+                    '/dogs/GET': apigw.MethodDeploymentOptions(
+                        caching_enabled=True,
+                        cache_ttl=listing_cache_ttl,
+                        cache_data_encrypted=True
+                    ),
+                    '/dogs/{dog_id}/GET': apigw.MethodDeploymentOptions(
+                        caching_enabled=True,
+                        cache_ttl=dog_cache_ttl,
+                        cache_data_encrypted=True
+                    )
+                }
             )
         )
 
+        def cached_integration(*query_parameters, path_parameters=()):
+            """Integration and method parameters keying the stage cache
+
+            Every parameter that changes the response is part of the key,
+            including the negotiated encoding and the conditional request.
+            """
+            parameters = [f'method.request.path.{name}' for name in path_parameters] + [
+                f'method.request.querystring.{name}' for name in query_parameters
+            ] + [
+                'method.request.header.Accept-Encoding',
+                'method.request.header.If-None-Match'
+            ]
+            return {
+                'integration': apigw.LambdaIntegration(dogs_lambda, cache_key_parameters=parameters),
+                'request_parameters': {
+                    parameter: parameter.startswith('method.request.path.') for parameter in parameters
+                }
+            }
+
         # API Resources and Methods
         dogs_resource = api.root.add_resource('dogs')
-        dogs_resource.add_method('GET', apigw.LambdaIntegration(dogs_lambda))  # Get all dogs with filters
+        dogs_resource.add_method('GET', **cached_integration(  # Get all dogs with filters
+            'state', 'min_weight', 'max_weight', 'color', 'min_age', 'max_age', 'sort', 'q',
+            'fields', 'limit', 'next_token'
+        ))
         dogs_resource.add_method('POST', apigw.LambdaIntegration(dogs_lambda))  # Create new dog
 
+        dogs_batch_resource = dogs_resource.add_resource('batch')
+        dogs_batch_resource.add_method('POST', apigw.LambdaIntegration(dogs_lambda))  # Bulk create dogs
+
         dog_resource = dogs_resource.add_resource('{dog_id}')
-        dog_resource.add_method('GET', apigw.LambdaIntegration(dogs_lambda))  # Get specific dog
+        dog_resource.add_method('GET', **cached_integration(  # Get specific dog
+            'shelter_id', 'fields', path_parameters=('dog_id',)
+        ))
         dog_resource.add_method('PUT', apigw.LambdaIntegration(dogs_lambda))  # Update dog
         dog_resource.add_method('DELETE', apigw.LambdaIntegration(dogs_lambda))  # Delete dog
 
@@ -153,6 +645,15 @@ class CdkStack(Stack):
         interactions_resource.add_method('POST', apigw.LambdaIntegration(dogs_lambda))  # Wag/Growl
         interactions_resource.add_method('GET', apigw.LambdaIntegration(dogs_lambda))  # Get user's interactions
 
+        # Bulk import progress
+        imports_resource = api.root.add_resource('imports')
+        import_job_resource = imports_resource.add_resource('{job_id}')
+        import_job_resource.add_method('GET', apigw.LambdaIntegration(dogs_lambda))  # Poll import job
+
+        # Dog recommendations for a user
+        recommendations_resource = api.root.add_resource('recommendations')
+        recommendations_resource.add_method('GET', apigw.LambdaIntegration(recommendations_lambda))
+
         # Output the API URL
         self.api_url = api.url
 
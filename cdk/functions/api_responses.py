@@ -0,0 +1,148 @@
+"""
+API Gateway response serialization, field projection and compression.
+
+Bodies are compact JSON with DynamoDB numbers (Decimal) written as JSON
+numbers rather than strings. Large bodies are compressed when the client's
+Accept-Encoding allows it and returned base64-encoded with
+``isBase64Encoded`` set, which API Gateway decodes for the binary media
+types configured on the RestApi. Brotli is used when the ``brotli`` module
+is importable (it is not part of the Lambda runtime), gzip otherwise.
+"""
+import base64
+import gzip
+import json
+import os
+import re
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment package
+    brotli = None
+
+# Smaller bodies fit in a packet or two; compressing them only costs CPU
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+# Moderate levels: most of the size reduction at a fraction of the CPU time
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+MAX_FIELDS = 30
+_FIELD_RE = re.compile(r'^[a-z_]{1,64}$')
+# Always returned so clients can fetch, page and vote on projected dogs
+KEY_FIELDS = ('shelter_id', 'dog_id')
+
+
+def json_default(value: Any) -> Any:
+    """Encode the non-JSON types DynamoDB items carry"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+def dumps(body: Any) -> str:
+    """Compact JSON for a response body"""
+    return json.dumps(body, default=json_default, separators=(',', ':'))
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Validate the optional comma-separated fields query parameter
+
+    Returns None when every field is wanted. Raises ValueError for malformed
+    field names.
+    """
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    if not names:
+        raise ValueError('fields must name at least one field')
+    if len(names) > MAX_FIELDS:
+        raise ValueError(f'fields may name at most {MAX_FIELDS} fields')
+    for name in names:
+        if not _FIELD_RE.match(name):
+            raise ValueError(f'Invalid field name: {name}')
+    return tuple(dict.fromkeys(KEY_FIELDS + tuple(names)))
+
+
+def project(items: Iterable[Dict[str, Any]],
+            fields: Optional[Tuple[str, ...]]) -> List[Dict[str, Any]]:
+    """New dicts holding only ``fields``; the items themselves when fields is None"""
+    if fields is None:
+        return list(items)
+    return [{name: item[name] for name in fields if name in item} for item in items]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported content coding the client accepts, or None"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    supported = ('br', 'gzip') if brotli is not None else ('gzip',)
+    best = None
+    for coding in supported:
+        weight = weights.get(coding, weights.get('*', 0.0))
+        # Ties keep the earlier, denser coding
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (coding, weight)
+    return best[0] if best else None
+
+
+def compress(data: bytes, coding: str) -> bytes:
+    if coding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # A fixed mtime keeps identical bodies byte-identical
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response: Dict[str, Any],
+                      accept_encoding: Optional[str]) -> Dict[str, Any]:
+    """Compress a large response body if the client accepts an encoding we support"""
+    body = response.get('body')
+    if not isinstance(body, str) or response.get('isBase64Encoded'):
+        return response
+    data = body.encode('utf-8')
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return response
+
+    headers = dict(response.get('headers') or {})
+    headers['Vary'] = 'Accept-Encoding'
+    coding = negotiate(accept_encoding)
+    compressed = compress(data, coding) if coding else None
+    if compressed is None or len(compressed) >= len(data):
+        return {**response, 'headers': headers}
+
+    headers['Content-Encoding'] = coding
+    return {
+        **response,
+        'headers': headers,
+        'body': base64.b64encode(compressed).decode('ascii'),
+        'isBase64Encoded': True
+    }
@@ -0,0 +1,74 @@
+"""
+In-process LRU cache with per-entry TTL and versioned invalidation.
+
+Entries survive across invocations of a warm Lambda container. Every entry
+carries the version of the record it was built from, so an invalidation for
+version N only drops entries older than N.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire ``ttl_seconds`` after insertion"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int, float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry[2]:
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, version: int = 0) -> None:
+        """Store ``value`` built from ``version`` of the record"""
+        with self._lock:
+            self._entries[key] = (value, version, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable, version: Optional[int] = None) -> bool:
+        """Drop the entry for ``key`` if it is older than ``version`` (or always)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (version is not None and entry[1] >= version):
+                return False
+            del self._entries[key]
+            self.evictions += 1
+            return True
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for structured logs"""
+        with self._lock:
+            return {
+                'cache_hits': self.hits,
+                'cache_misses': self.misses,
+                'cache_evictions': self.evictions,
+                'cache_size': len(self._entries)
+            }
@@ -0,0 +1,130 @@
+"""
+Asynchronous cleanup of a deleted dog's interactions.
+
+``DELETE /dogs/{dog_id}`` only removes the dog item, so the request costs the
+same however many users voted on the dog. The DogsTable stream delivers the
+REMOVE to ``stream_handler``, which pages through DogInteractionsIndex for
+the dog's key and deletes the matching interactions with BatchWriteItem in
+chunks of 25, backing off on unprocessed items.
+
+Progress is kept in a tombstone in the jobs table, ``dog-cleanup:<dog_key>``,
+which records how many interactions were deleted and when the cleanup
+completed. Deleting interactions is idempotent, so a redelivered REMOVE
+record just finds nothing left to delete.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+import client_config
+import dogs
+import dynamo_batch
+import search
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+JOB_TYPE = 'dog_cleanup'
+# Interactions per index page, one BatchWriteItem round per 25 of them
+CLEANUP_PAGE_SIZE = 500
+
+interactions_table = dogs.interactions_table
+jobs_table = dogs.jobs_table
+
+
+def stream_handler(event, context):
+    """
+    Handle a DogsTable stream batch by cleaning up after deleted dogs
+    """
+    client_config.start_invocation(context)
+    stats = {'records': len(event['Records']), 'dogs': 0, 'deleted_interactions': 0}
+    failures = []
+    for record in event['Records']:
+        if record.get('eventName') != 'REMOVE':
+            continue
+        keys = record['dynamodb']['Keys']
+        shelter_id, dog_id = keys['shelter_id']['S'], keys['dog_id']['S']
+        try:
+            stats['deleted_interactions'] += clean_up_dog(shelter_id, dog_id)
+            stats['dogs'] += 1
+        except Exception as e:
+            logger.error("Dog cleanup failed", extra={
+                "shelter_id": shelter_id,
+                "dog_id": dog_id,
+                "error": str(e)
+            })
+            # Later records are retried with it; cleanups can safely run twice
+            failures.append({'itemIdentifier': record['dynamodb']['SequenceNumber']})
+            break
+
+    logger.info("Dog cleanup batch processed", extra={**stats, "failed": len(failures)})
+    return {'batchItemFailures': failures}
+
+
+def clean_up_dog(shelter_id: str, dog_id: str) -> int:
+    """Delete every interaction with a dog and return how many were deleted
+
+    Raises RuntimeError if some deletes are still unprocessed after backoff;
+    the tombstone then stays ``cleaning`` with the count deleted so far.
+    """
+    dog_key = search.dog_key(shelter_id, dog_id)
+    job_key = {'job_id': dogs.cleanup_job_id(shelter_id, dog_id)}
+    now = datetime.now(timezone.utc).isoformat()
+    jobs_table.update_item(
+        Key=job_key,
+        UpdateExpression='SET job_type = :job_type, #status = :cleaning, shelter_id = :shelter_id, '
+                         'dog_id = :dog_id, deleted_at = if_not_exists(deleted_at, :now), '
+                         'deleted_interactions = if_not_exists(deleted_interactions, :zero)',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={
+            ':job_type': JOB_TYPE,
+            ':cleaning': 'cleaning',
+            ':shelter_id': shelter_id,
+            ':dog_id': dog_id,
+            ':now': now,
+            ':zero': 0
+        }
+    )
+
+    deleted = 0
+    query_kwargs: Dict[str, Any] = {
+        'IndexName': 'DogInteractionsIndex',
+        'KeyConditionExpression': 'dog_key = :dog_key',
+        'ProjectionExpression': 'user_id, dog_key',
+        'ExpressionAttributeValues': {':dog_key': dog_key},
+        'Limit': CLEANUP_PAGE_SIZE
+    }
+    while True:
+        response = interactions_table.query(**query_kwargs)
+        requests = [{'DeleteRequest': {'Key': {'user_id': item['user_id'], 'dog_key': dog_key}}}
+                    for item in response['Items']]
+        unprocessed = dynamo_batch.batch_write(dogs.dynamodb, dogs.INTERACTIONS_TABLE_NAME, requests)
+        page_deleted = len(requests) - len(unprocessed)
+        deleted += page_deleted
+        if page_deleted:
+            jobs_table.update_item(
+                Key=job_key,
+                UpdateExpression='ADD deleted_interactions :deleted',
+                ExpressionAttributeValues={':deleted': page_deleted}
+            )
+        if unprocessed:
+            raise RuntimeError(f'{len(unprocessed)} interaction deletes left unprocessed')
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    jobs_table.update_item(
+        Key=job_key,
+        UpdateExpression='SET #status = :completed, completed_at = :now',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={
+            ':completed': 'completed',
+            ':now': datetime.now(timezone.utc).isoformat()
+        }
+    )
+    logger.info("Dog cleanup completed", extra={
+        "shelter_id": shelter_id,
+        "dog_id": dog_id,
+        "deleted_interactions": deleted
+    })
+    return deleted
@@ -0,0 +1,96 @@
+"""
+botocore configuration shared by the functions' AWS clients.
+
+botocore's defaults suit neither a burst of traffic nor a 30 s Lambda:
+legacy retries back off without slowing the send rate, a client pools 10
+connections however many threads share it, and connect and read timeouts
+of 60 s let one stalled call outlive the invocation. ``config()`` builds the
+Config clients.py creates every client with:
+
+- adaptive retry mode, which retries throttled calls and also rate limits
+  the client: after a throttling error, a token bucket shared by every
+  thread using the client paces further requests until they succeed again
+- a connection pool as large as the most concurrent path using one client
+  (see ``size_pool``)
+- TCP keepalive, so pooled connections survive between warm invocations
+- connect and read timeouts sized so that every attempt, with the backoff
+  between attempts, fits in the time left in the invocation that created
+  the client (see ``start_invocation``)
+
+Clients live as long as the container, so their timeouts come from the
+first invocation that needs them. A function's invocations all start with
+the same remaining time, so later invocations get the same budget.
+"""
+import os
+from typing import Any, Optional, Tuple
+
+# Attempts per call, the first one included
+MAX_ATTEMPTS = int(os.environ.get('CLIENT_MAX_ATTEMPTS', '4'))
+# Upper bounds, also used outside an invocation (tests, local scripts)
+CONNECT_TIMEOUT_SECONDS = float(os.environ.get('CLIENT_CONNECT_TIMEOUT_SECONDS', '2'))
+READ_TIMEOUT_SECONDS = float(os.environ.get('CLIENT_READ_TIMEOUT_SECONDS', '10'))
+MIN_TIMEOUT_SECONDS = 0.5
+# Left to the function to handle a failed call and respond before Lambda times out
+RESPONSE_RESERVE_MS = int(os.environ.get('CLIENT_RESPONSE_RESERVE_MS', '1000'))
+# botocore's longest backoff between two attempts after a throttling error
+MAX_BACKOFF_SECONDS = 20
+
+_max_pool_connections = 10
+_remaining_ms: Optional[int] = None
+
+
+def size_pool(concurrency: int) -> None:
+    """Pool enough connections for ``concurrency`` threads sharing a client
+
+    Call at import time, before the clients are created. The largest size
+    asked for wins.
+    """
+    global _max_pool_connections
+    _max_pool_connections = max(_max_pool_connections, concurrency)
+
+
+def start_invocation(context: Any) -> None:
+    """Record the time left in this invocation for the clients it creates
+
+    Contexts without a remaining time (local calls, tests) leave it unchanged.
+    """
+    global _remaining_ms
+    get_remaining_time = getattr(context, 'get_remaining_time_in_millis', None)
+    if get_remaining_time is not None:
+        _remaining_ms = get_remaining_time()
+
+
+def backoff_allowance(attempts: int) -> float:
+    """Longest total backoff botocore sleeps between ``attempts`` throttled attempts"""
+    return float(sum(min(2 ** attempt, MAX_BACKOFF_SECONDS) for attempt in range(attempts - 1)))
+
+
+def timeouts(remaining_ms: Optional[int]) -> Tuple[float, float]:
+    """Connect and read timeouts that fit MAX_ATTEMPTS attempts in ``remaining_ms``
+
+    Without a remaining time the upper bounds are returned. A quarter of each
+    attempt's share goes to connecting; neither timeout drops below
+    MIN_TIMEOUT_SECONDS, so a nearly expired invocation still gets to try.
+    """
+    if remaining_ms is None:
+        return CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS
+    budget = (remaining_ms - RESPONSE_RESERVE_MS) / 1000 - backoff_allowance(MAX_ATTEMPTS)
+    per_attempt = max(budget, 0) / MAX_ATTEMPTS
+    connect_timeout = max(MIN_TIMEOUT_SECONDS, min(CONNECT_TIMEOUT_SECONDS, per_attempt / 4))
+    read_timeout = max(MIN_TIMEOUT_SECONDS, min(READ_TIMEOUT_SECONDS, per_attempt - connect_timeout))
+    return connect_timeout, read_timeout
+
+
+def config() -> Any:
+    """botocore Config for a client created now"""
+    # Imported here: botocore.config pulls in most of botocore
+    from botocore.config import Config
+
+    connect_timeout, read_timeout = timeouts(_remaining_ms)
+    return Config(
+        retries={'mode': 'adaptive', 'total_max_attempts': MAX_ATTEMPTS},
+        max_pool_connections=_max_pool_connections,
+        tcp_keepalive=True,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout
+    )
@@ -0,0 +1,48 @@
+"""
+Lazily created, memoized AWS clients.
+
+Importing boto3 and building a client (which loads and parses the service
+model) are the bulk of a cold start. Functions that create every client at
+import time pay for all of them on each cold start, even when the request
+only needs DynamoDB. ``client(service)`` imports boto3 and creates the
+client on first use, then reuses it for the lifetime of the container.
+``LazyClient`` wraps that in an object that can stand in for a module-level
+client. Every client is created with the retry, pooling and timeout
+settings from client_config.
+"""
+import threading
+from typing import Any, Dict, List
+
+import client_config
+
+_clients: Dict[str, Any] = {}
+# boto3's default session is not safe to create clients from concurrently
+_lock = threading.Lock()
+
+
+def client(service_name: str) -> Any:
+    """The container's client for ``service_name``, created on first use"""
+    existing = _clients.get(service_name)
+    if existing is None:
+        with _lock:
+            existing = _clients.get(service_name)
+            if existing is None:
+                import boto3
+                existing = _clients[service_name] = boto3.client(
+                    service_name, config=client_config.config())
+    return existing
+
+
+def created() -> List[str]:
+    """Services whose clients exist, for cold-start logging and tests"""
+    return sorted(_clients)
+
+
+class LazyClient:
+    """A stand-in for a boto3 client that creates it on first attribute access"""
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(client(self.service_name), name)
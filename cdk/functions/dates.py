@@ -0,0 +1,120 @@
+"""
+Normalization of shelter dates and age filters.
+
+Birthdays and shelter entry dates arrive as "4/23/2014", "2020-05-10",
+"May 10, 2020" and so on. They are stored as ISO dates (YYYY-MM-DD), which
+sort lexicographically, so an age filter becomes a plain range condition on
+the stored birth date instead of a per-item parse at read time.
+"""
+import re
+from datetime import date, datetime
+from typing import Any, Optional, Tuple
+
+_MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# 2020-05-10, 2020/05/10, 2020-05-10T12:00:00Z
+_YEAR_FIRST_RE = re.compile(r'^(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})(?:[ t].*)?$')
+# 5/10/2020, 05-10-20 (US month-first order)
+_MONTH_FIRST_RE = re.compile(r'^(\d{1,2})[-/.](\d{1,2})[-/.](\d{2}|\d{4})$')
+# May 10, 2020 / May 10 2020
+_MONTH_NAME_FIRST_RE = re.compile(r'^([a-z]{3})[a-z]*\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})$')
+# 10 May 2020
+_DAY_FIRST_NAME_RE = re.compile(r'^(\d{1,2})(?:st|nd|rd|th)?\s+([a-z]{3})[a-z]*\.?,?\s+(\d{4})$')
+
+
+def _build(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_date(value: Any, today: Optional[date] = None) -> Optional[date]:
+    """Parse a shelter date, or return None if the format is not recognized"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+
+    text = value.strip().lower()
+    match = _YEAR_FIRST_RE.match(text)
+    if match:
+        return _build(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+    match = _MONTH_FIRST_RE.match(text)
+    if match:
+        year = int(match.group(3))
+        if year < 100:
+            # Two-digit years are the most recent year with those digits
+            current = (today or date.today()).year
+            year += current - current % 100
+            if year > current:
+                year -= 100
+        return _build(year, int(match.group(1)), int(match.group(2)))
+
+    match = _MONTH_NAME_FIRST_RE.match(text)
+    if match and match.group(1) in _MONTHS:
+        return _build(int(match.group(3)), _MONTHS[match.group(1)], int(match.group(2)))
+
+    match = _DAY_FIRST_NAME_RE.match(text)
+    if match and match.group(2) in _MONTHS:
+        return _build(int(match.group(3)), _MONTHS[match.group(2)], int(match.group(1)))
+
+    return None
+
+
+def normalize_date(value: Any) -> Optional[str]:
+    """Return the ISO (YYYY-MM-DD) form of a shelter date, or None"""
+    parsed = parse_date(value)
+    return parsed.isoformat() if parsed else None
+
+
+def months_before(day: date, months: int) -> date:
+    """The same calendar day ``months`` earlier, clamped to the month's end"""
+    index = day.year * 12 + day.month - 1 - months
+    year, month = divmod(index, 12)
+    month += 1
+    for candidate in (day.day, 30, 29, 28):
+        result = _build(year, month, min(day.day, candidate))
+        if result:
+            return result
+    raise ValueError(f'Cannot step back {months} months from {day}')
+
+
+def parse_age(value: str, param: str) -> int:
+    """Parse an age in years (fractions allowed) into whole months"""
+    try:
+        years = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{param} must be a number of years')
+    if not 0 <= years <= 100:
+        raise ValueError(f'{param} must be between 0 and 100')
+    return round(years * 12)
+
+
+def birth_date_range(min_age: Optional[str], max_age: Optional[str],
+                     today: Optional[date] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Translate age bounds into inclusive ISO birth-date bounds
+
+    A dog is ``max_age`` years old until the day before its next birthday, so
+    the earliest matching birth date is one day after ``max_age + 1`` years ago.
+    Raises ValueError for ages that cannot be parsed.
+    """
+    today = today or date.today()
+    earliest = latest = None
+    if max_age is not None:
+        months = parse_age(max_age, 'max_age')
+        # Whole years extend to the next birthday; fractional ages are exact
+        months += 12 if months % 12 == 0 else 0
+        earliest = date.fromordinal(months_before(today, months).toordinal() + 1)
+    if min_age is not None:
+        latest = months_before(today, parse_age(min_age, 'min_age'))
+    if earliest and latest and earliest > latest:
+        raise ValueError('min_age must not be greater than max_age')
+    return (earliest.isoformat() if earliest else None,
+            latest.isoformat() if latest else None)
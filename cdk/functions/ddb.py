@@ -0,0 +1,204 @@
+"""
+DynamoDB tables over the low-level client, without boto3's resource layer.
+
+The resource layer builds its classes from a resource model on first use
+and converts every attribute through TypeSerializer/TypeDeserializer, whose
+generic dispatch is a visible share of the time spent reading a page of
+items. ``DynamoDB`` and ``Table`` keep the resource calling convention the
+functions are written against: plain Python values in and out (numbers as
+Decimal), ``Table(name).query(...)``, ``batch_get_item``,
+``batch_write_item`` and ``transact_write_items``. Underneath they call the
+low-level client, created on first use, and convert values with converters
+looked up by exact type.
+"""
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+import clients
+
+# Request and response members holding attribute maps
+_ITEM_MEMBERS = ('Key', 'Item', 'ExclusiveStartKey', 'ExpressionAttributeValues')
+_RESULT_MEMBERS = ('Item', 'Attributes', 'LastEvaluatedKey')
+
+
+def _serialize_number(value: Any) -> Dict[str, str]:
+    return {'N': str(value)}
+
+
+def _serialize_float(value: float) -> Dict[str, str]:
+    # Same rule as the resource layer: floats would silently lose precision
+    raise TypeError('Float types are not supported. Use Decimal types instead.')
+
+
+def _serialize_set(values: Any) -> Dict[str, List[Any]]:
+    if not values:
+        raise ValueError('DynamoDB sets cannot be empty')
+    sample = next(iter(values))
+    if isinstance(sample, str):
+        return {'SS': list(values)}
+    if isinstance(sample, (bytes, bytearray)):
+        return {'BS': [bytes(value) for value in values]}
+    return {'NS': [str(value) for value in values]}
+
+
+_SERIALIZERS: Dict[type, Callable[[Any], Dict[str, Any]]] = {
+    str: lambda value: {'S': value},
+    Decimal: _serialize_number,
+    int: _serialize_number,
+    float: _serialize_float,
+    bool: lambda value: {'BOOL': value},
+    type(None): lambda value: {'NULL': True},
+    dict: lambda value: {'M': serialize_item(value)},
+    list: lambda value: {'L': [serialize(element) for element in value]},
+    tuple: lambda value: {'L': [serialize(element) for element in value]},
+    bytes: lambda value: {'B': value},
+    bytearray: lambda value: {'B': bytes(value)},
+    set: _serialize_set,
+    frozenset: _serialize_set
+}
+
+_DESERIALIZERS: Dict[str, Callable[[Any], Any]] = {
+    'S': lambda value: value,
+    'N': Decimal,
+    'BOOL': lambda value: value,
+    'NULL': lambda value: None,
+    'M': lambda value: deserialize_item(value),
+    'L': lambda value: [deserialize(element) for element in value],
+    'B': bytes,
+    'SS': set,
+    'NS': lambda values: {Decimal(value) for value in values},
+    'BS': lambda values: {bytes(value) for value in values}
+}
+
+
+def serialize(value: Any) -> Dict[str, Any]:
+    """DynamoDB attribute value for a Python value"""
+    serializer = _SERIALIZERS.get(type(value))
+    if serializer is None:
+        # Subclasses and boto3 types such as Binary take the generic path
+        from boto3.dynamodb.types import TypeSerializer
+        return TypeSerializer().serialize(value)
+    return serializer(value)
+
+
+def deserialize(attribute: Dict[str, Any]) -> Any:
+    """Python value of a DynamoDB attribute value"""
+    for tag, value in attribute.items():
+        return _DESERIALIZERS[tag](value)
+    raise ValueError('Empty attribute value')
+
+
+def serialize_item(item: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {name: serialize(value) for name, value in item.items()}
+
+
+def deserialize_item(item: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {name: deserialize(value) for name, value in item.items()}
+
+
+def _serialize_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a request with its attribute maps in DynamoDB form"""
+    request = dict(request)
+    for member in _ITEM_MEMBERS:
+        if member in request:
+            request[member] = serialize_item(request[member])
+    return request
+
+
+def _deserialize_result(response: Dict[str, Any]) -> Dict[str, Any]:
+    for member in _RESULT_MEMBERS:
+        if member in response:
+            response[member] = deserialize_item(response[member])
+    if 'Items' in response:
+        response['Items'] = [deserialize_item(item) for item in response['Items']]
+    return response
+
+
+def _serialize_writes(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{kind: _serialize_request(body) for kind, body in request.items()}
+            for request in requests]
+
+
+def _deserialize_writes(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{kind: {member: deserialize_item(value) for member, value in body.items()}
+             for kind, body in request.items()} for request in requests]
+
+
+class Table:
+    """One table, called like a boto3 resource Table"""
+
+    def __init__(self, dynamodb: 'DynamoDB', name: str):
+        self.dynamodb = dynamodb
+        self.name = name
+
+    def _call(self, operation: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = getattr(self.dynamodb.client, operation)
+        return _deserialize_result(method(TableName=self.name, **_serialize_request(request)))
+
+    def get_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call('get_item', kwargs)
+
+    def put_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call('put_item', kwargs)
+
+    def update_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call('update_item', kwargs)
+
+    def delete_item(self, **kwargs) -> Dict[str, Any]:
+        return self._call('delete_item', kwargs)
+
+    def query(self, **kwargs) -> Dict[str, Any]:
+        return self._call('query', kwargs)
+
+    def scan(self, **kwargs) -> Dict[str, Any]:
+        return self._call('scan', kwargs)
+
+
+class DynamoDB:
+    """Service-level operations, called like the boto3 DynamoDB resource
+
+    ``client`` is the low-level client, passed in or created on first use.
+    """
+
+    def __init__(self, client: Optional[Any] = None):
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        return self._client if self._client is not None else clients.client('dynamodb')
+
+    def Table(self, name: str) -> Table:  # noqa: N802 - mirrors the resource API
+        return Table(self, name)
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]],  # noqa: N803
+                       **kwargs) -> Dict[str, Any]:
+        request_items = {
+            table_name: dict(request, Keys=[serialize_item(key) for key in request['Keys']])
+            for table_name, request in RequestItems.items()
+        }
+        response = self.client.batch_get_item(RequestItems=request_items, **kwargs)
+        response['Responses'] = {
+            table_name: [deserialize_item(item) for item in items]
+            for table_name, items in response.get('Responses', {}).items()
+        }
+        response['UnprocessedKeys'] = {
+            table_name: dict(request, Keys=[deserialize_item(key) for key in request['Keys']])
+            for table_name, request in response.get('UnprocessedKeys', {}).items()
+        }
+        return response
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]],  # noqa: N803
+                         **kwargs) -> Dict[str, Any]:
+        request_items = {table_name: _serialize_writes(requests)
+                         for table_name, requests in RequestItems.items()}
+        response = self.client.batch_write_item(RequestItems=request_items, **kwargs)
+        response['UnprocessedItems'] = {
+            table_name: _deserialize_writes(requests)
+            for table_name, requests in response.get('UnprocessedItems', {}).items()
+        }
+        return response
+
+    def transact_write_items(self, TransactItems: List[Dict[str, Any]],  # noqa: N803
+                             **kwargs) -> Dict[str, Any]:
+        return self.client.transact_write_items(TransactItems=_serialize_writes(TransactItems),
+                                                **kwargs)
@@ -1,91 +1,185 @@
 import json
-import boto3
+import hashlib
 import os
 import uuid
 import logging
+import math
+import re
+import threading
+import time
+from botocore.exceptions import ClientError
 from datetime import datetime, timezone
 from decimal import Decimal
 import base64
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import api_responses
+import cache
+import client_config
+import clients
+import dates
+import ddb
+import dynamo_batch
+import envelope
+import pagination
+import parallel_scan
+import router
+import search
+import species
+import weights
 
 # Configure structured logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
-kms = boto3.client('kms')
+# AWS clients are created on first use, so a cold start only pays for the
+# services the request needs
+dynamodb = ddb.DynamoDB()
+kms = clients.LazyClient('kms')
+s3 = clients.LazyClient('s3')
 
 # Environment variables
 DOGS_TABLE_NAME = os.environ['DOGS_TABLE_NAME']
 INTERACTIONS_TABLE_NAME = os.environ['INTERACTIONS_TABLE_NAME']
 KMS_KEY_ID = os.environ['KMS_KEY_ID']
+# 'kms' encrypts every name with its own KMS call; 'envelope' seals names locally
+# with a cached data key (see envelope.py). Both formats are always decryptable.
+NAME_ENCRYPTION_MODE = os.environ.get('NAME_ENCRYPTION_MODE', 'kms')
+# Upper bound on concurrent KMS calls per request
+KMS_MAX_WORKERS = int(os.environ.get('KMS_MAX_WORKERS', '8'))
+# Largest POST /dogs/batch upload accepted in one request
+MAX_BATCH_DOGS = int(os.environ.get('MAX_BATCH_DOGS', '500'))
+
+# Paginated listings: largest page a client may ask for, and how many DynamoDB
+# pages one request may read while filling a page after filtering
+MAX_PAGE_LIMIT = int(os.environ.get('MAX_PAGE_LIMIT', '100'))
+MAX_PAGES_PER_REQUEST = int(os.environ.get('MAX_PAGES_PER_REQUEST', '10'))
+# Continuation tokens are tamper-evident. The stack passes a generated secret;
+# the fallback is derived from non-secret identifiers and only suits local runs
+PAGE_TOKEN_SIGNING_KEY = os.environ.get(
+    'PAGE_TOKEN_SIGNING_KEY', f'{KMS_KEY_ID}:{DOGS_TABLE_NAME}'
+).encode('utf-8')
+
+# Segments read concurrently by unfiltered listings and exports
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '4'))
+EXPORT_BUCKET_NAME = os.environ.get('EXPORT_BUCKET_NAME')
+# Progress records for asynchronous jobs such as bulk imports
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME', 'pupper-jobs')
+# Submitted records whose species is not a purebred Labrador Retriever
+QUARANTINE_TABLE_NAME = os.environ.get('QUARANTINE_TABLE_NAME', 'pupper-quarantine')
+QUARANTINE_RETENTION_DAYS = int(os.environ.get('QUARANTINE_RETENTION_DAYS', '90'))
+# Short-lived markers that make retried writes and stream records idempotent
+IDEMPOTENCY_TABLE_NAME = os.environ.get('IDEMPOTENCY_TABLE_NAME', 'pupper-idempotency')
+# How long a response is replayed for a repeated Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+# How long a claimed key blocks retries before it can be claimed again; at
+# least the function timeout, so a crashed request never holds a key for a day
+IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get('IDEMPOTENCY_LEASE_SECONDS', '30'))
+# Posting lists of description terms behind GET /dogs?q=
+SEARCH_TABLE_NAME = os.environ.get('SEARCH_TABLE_NAME', 'pupper-search')
+# Browser and stage cache lifetimes of dog reads. Writes do not purge the stage
+# cache, so an edit can take this long (plus DOG_CACHE_TTL_SECONDS) to show;
+# the stack sets both and the stage cache TTLs from the same numbers.
+DOG_CACHE_CONTROL = os.environ.get('DOG_CACHE_CONTROL', 'public, max-age=10')
+LISTING_CACHE_CONTROL = os.environ.get('LISTING_CACHE_CONTROL', 'public, max-age=5')
+
+# Fields PUT /dogs/{dog_id} may change; shelter, city and state make up the key
+UPDATABLE_DOG_FIELDS = ('dog_name', 'species', 'description', 'shelter_entry_date',
+                        'dog_birthday', 'dog_weight', 'dog_color')
+NOT_LABRADOR_ERROR = 'Only Labrador Retrievers are accepted'
+INTERACTION_TYPES = ('wag', 'growl')
+
+DOG_KEY_ATTRIBUTES = ('shelter_id', 'dog_id')
+# Attributes an ETag is computed from. Counter updates do not bump version,
+# so the counters are included; updated_at covers items without a version.
+ETAG_ATTRIBUTES = ('version', 'updated_at', 'wag_count', 'growl_count', 'popularity')
+
+# Lab coat colours grouped into the families StateColorWeightIndex is
+# partitioned by; a dog belongs to the family of the first colour word in its
+# color, so "Chocolate Brown" is chocolate and "Black and tan" is black
+COLOR_FAMILIES = {
+    'black': 'black', 'charcoal': 'black',
+    'yellow': 'yellow', 'golden': 'yellow', 'gold': 'yellow', 'cream': 'yellow',
+    'white': 'yellow', 'red': 'yellow', 'fox': 'yellow', 'champagne': 'yellow',
+    'chocolate': 'chocolate', 'brown': 'chocolate', 'liver': 'chocolate', 'silver': 'chocolate'
+}
+COLOR_WORD_RE = re.compile(r'[a-z]+')
+
+# Estimated fraction of the table each key condition selects, used by the
+# listing planner to rank access paths: dogs spread over ~50 states and three
+# colour families, and a range bound typically keeps a third of a partition
+STATE_SELECTIVITY = 1 / 50
+COLOR_FAMILY_SELECTIVITY = 1 / 3
+RANGE_SELECTIVITY = 1 / 3
+
+# Listing orders accepted by the sort query parameter
+SORT_ORDERS = ('popularity',)
 
 dogs_table = dynamodb.Table(DOGS_TABLE_NAME)
 interactions_table = dynamodb.Table(INTERACTIONS_TABLE_NAME)
+jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
+quarantine_table = dynamodb.Table(QUARANTINE_TABLE_NAME)
+idempotency_table = dynamodb.Table(IDEMPOTENCY_TABLE_NAME)
+
+# KMS calls and scan segments run on threads sharing one client each
+client_config.size_pool(max(KMS_MAX_WORKERS, SCAN_SEGMENTS))
+
+# Data keys live for the lifetime of the warm container, within the cache bounds
+data_key_cache = envelope.cache_from_environment()
+
+# Decrypted dog records served by get_dog. Writes in this container drop their
+# entry; other warm containers serve an edited dog for at most the TTL.
+dog_cache = cache.TTLCache(
+    max_entries=int(os.environ.get('DOG_CACHE_MAX_ENTRIES', '1024')),
+    ttl_seconds=float(os.environ.get('DOG_CACHE_TTL_SECONDS', '30'))
+)
+
+# Created on first use and reused by later invocations in the same container
+_kms_executor: Optional[ThreadPoolExecutor] = None
+
+# Seconds clients are told to wait after a 503
+RETRY_AFTER_SECONDS = 1
+
+class DogsUnavailable(RuntimeError):
+    """Dogs a batch read left unread after its retries, usually from throttling"""
 
 def handler(event, context):
     """
     Main Lambda handler for dog-related operations
     """
     request_id = context.aws_request_id if context else str(uuid.uuid4())
+    client_config.start_invocation(context)
     
     # Structured logging
     logger.info("Request started", extra={
         "request_id": request_id,
         "http_method": event.get('httpMethod'),
         "path": event.get('path'),
-        "user_agent": event.get('headers', {}).get('User-Agent', 'Unknown')
+        "user_agent": get_header(event, 'User-Agent') or 'Unknown'
     })
     
+    response = route_request(event, request_id)
+    return api_responses.compress_response(response, get_header(event, 'Accept-Encoding'))
+
+def route_request(event: Dict[str, Any], request_id: str) -> Dict[str, Any]:
+    """
+    Dispatch an API Gateway request to its operation through the route table
+    """
     try:
-        http_method = event['httpMethod']
-        path = event['path']
-        path_parameters = event.get('pathParameters') or {}
-        query_parameters = event.get('queryStringParameters') or {}
-        body = event.get('body')
-        
-        # Parse request body if present
-        request_body = {}
-        if body:
-            try:
-                request_body = json.loads(body)
-            except json.JSONDecodeError as e:
-                logger.error("Invalid JSON in request body", extra={
-                    "request_id": request_id,
-                    "error": str(e),
-                    "body": body[:100]  # Log first 100 chars for debugging
-                })
-                return create_response(400, {'error': 'Invalid JSON in request body'})
-        
-        # Route requests based on path and method
-        if path == '/dogs':
-            if http_method == 'GET':
-                return get_dogs(query_parameters, request_id)
-            elif http_method == 'POST':
-                return create_dog(request_body, request_id)
-        
-        elif path.startswith('/dogs/') and 'dog_id' in path_parameters:
-            dog_id = path_parameters['dog_id']
-            if http_method == 'GET':
-                return get_dog(dog_id, query_parameters, request_id)
-            elif http_method == 'PUT':
-                return update_dog(dog_id, request_body, request_id)
-            elif http_method == 'DELETE':
-                return delete_dog(dog_id, query_parameters, request_id)
-        
-        elif path == '/interactions':
-            if http_method == 'POST':
-                return create_interaction(request_body, request_id)
-            elif http_method == 'GET':
-                return get_user_interactions(query_parameters, request_id)
-        
-        logger.warning("Endpoint not found", extra={
-            "request_id": request_id,
-            "path": path,
-            "method": http_method
-        })
-        return create_response(404, {'error': 'Endpoint not found'})
+        try:
+            route, request = ROUTER.resolve(event)
+        except router.RouteError as e:
+            logger.warning("Request not routed", extra={
+                "request_id": request_id,
+                "path": event.get('path'),
+                "method": event.get('httpMethod'),
+                "status_code": e.status_code,
+                "error": str(e)
+            })
+            return create_response(e.status_code, {'error': str(e)}, e.headers)
+        
+        return route.operation(request)
         
     except Exception as e:
         logger.error("Unhandled exception", extra={
@@ -95,62 +189,72 @@ def handler(event, context):
         })
         return create_response(500, {'error': 'Internal server error'})
 
+def maintenance_handler(event, context):
+    """
+    Lambda handler for one-off maintenance tasks, invoked directly with {"task": ...}
+    """
+    client_config.start_invocation(context)
+    task = event.get('task')
+    if task not in MAINTENANCE_TASKS:
+        raise ValueError(f'Unknown maintenance task: {task}')
+
+    logger.info("Maintenance task started", extra={"task": task})
+    result = MAINTENANCE_TASKS[task]()
+    logger.info("Maintenance task finished", extra={"task": task, "result": result})
+    return result
+
+def export_handler(event, context):
+    """
+    Lambda handler that exports every dog to S3 as NDJSON using a parallel scan
+
+    Accepts an optional {"segments": N} override. Dog names are never exported,
+    not even encrypted.
+    """
+    client_config.start_invocation(context)
+    total_segments = int(event.get('segments') or SCAN_SEGMENTS)
+    started_at = datetime.now(timezone.utc)
+    
+    items = parallel_scan.parallel_scan(dogs_table.scan, {}, total_segments, DOG_KEY_ATTRIBUTES)
+    lines = []
+    for item in items:
+        item.pop('encrypted_dog_name', None)
+        lines.append(json.dumps(item, default=str))
+    
+    key = f"exports/{started_at.strftime('%Y%m%dT%H%M%SZ')}.ndjson"
+    s3.put_object(
+        Bucket=EXPORT_BUCKET_NAME,
+        Key=key,
+        Body=('\n'.join(lines) + '\n').encode('utf-8') if lines else b'',
+        ContentType='application/x-ndjson'
+    )
+    
+    logger.info("Dog export finished", extra={
+        "bucket": EXPORT_BUCKET_NAME,
+        "key": key,
+        "count": len(lines),
+        "segments": total_segments
+    })
+    return {'bucket': EXPORT_BUCKET_NAME, 'key': key, 'count': len(lines)}
+
 def create_dog(dog_data: Dict[str, Any]) -> Dict[str, Any]:
     """Create a new dog entry"""
     try:
-        # Validate required fields
-        required_fields = ['shelter', 'city', 'state', 'dog_name', 'species', 'description']
-        for field in required_fields:
-            if field not in dog_data:
-                return create_response(400, {'error': f'Missing required field: {field}'})
-        
-        # Validate that it's a Labrador Retriever
-        species = dog_data.get('species', '').lower()
-        if 'labrador' not in species and 'lab' not in species:
-            return create_response(400, {'error': 'Only Labrador Retrievers are accepted'})
-        
-        # Generate IDs
-        shelter_id = generate_shelter_id(dog_data['shelter'], dog_data['city'], dog_data['state'])
-        dog_id = str(uuid.uuid4())
+        error = validate_dog_data(dog_data)
+        if error == NOT_LABRADOR_ERROR:
+            quarantine_id = quarantine_dogs([dog_data], 'api')[0]
+            return create_response(400, {'error': error, 'quarantine_id': quarantine_id})
+        if error:
+            return create_response(400, {'error': error})
         
         # Encrypt dog name
         encrypted_name = encrypt_dog_name(dog_data['dog_name'])
         
         # Prepare dog item
-        dog_item = {
-            'shelter_id': shelter_id,
-            'dog_id': dog_id,
-            'shelter': dog_data['shelter'],
-            'city': dog_data['city'],
-            'state': dog_data['state'],
-            'encrypted_dog_name': encrypted_name,
-            'species': dog_data['species'],
-            'description': dog_data['description'],
-            'created_at': datetime.now(timezone.utc).isoformat(),
-            'updated_at': datetime.now(timezone.utc).isoformat()
-        }
-        
-        # Optional fields with validation
-        if 'shelter_entry_date' in dog_data:
-            dog_item['shelter_entry_date'] = dog_data['shelter_entry_date']
-        
-        if 'dog_birthday' in dog_data:
-            dog_item['dog_birthday'] = dog_data['dog_birthday']
-        
-        if 'dog_weight' in dog_data:
-            try:
-                # Handle weight conversion from string to number
-                weight = parse_weight(dog_data['dog_weight'])
-                if weight:
-                    dog_item['dog_weight'] = Decimal(str(weight))
-            except (ValueError, TypeError):
-                print(f"Invalid weight format: {dog_data['dog_weight']}")
-        
-        if 'dog_color' in dog_data:
-            dog_item['dog_color'] = dog_data['dog_color']
+        dog_item = build_dog_item(dog_data, encrypted_name)
         
         # Store in DynamoDB
         dogs_table.put_item(Item=dog_item)
+        index_dogs([dog_item])
         
         # Return response without encrypted name
         response_item = dog_item.copy()
@@ -166,170 +270,1382 @@ def create_dog(dog_data: Dict[str, Any]) -> Dict[str, Any]:
         print(f'Error creating dog: {str(e)}')
         return create_response(500, {'error': 'Failed to create dog'})
 
-def get_dogs(query_params: Dict[str, str]) -> Dict[str, Any]:
-    """Get dogs with optional filtering"""
+def validate_dog_data(dog_data: Any) -> Optional[str]:
+    """Return the validation error for a dog record, or None if it is acceptable"""
+    if not isinstance(dog_data, dict):
+        return 'Dog record must be a JSON object'
+    
+    # Validate required fields
+    required_fields = ['shelter', 'city', 'state', 'dog_name', 'species', 'description']
+    for field in required_fields:
+        if field not in dog_data:
+            return f'Missing required field: {field}'
+    
+    # Validate that it's a Labrador Retriever (not a mix or a lookalike)
+    if not species.is_labrador(dog_data['species']):
+        return NOT_LABRADOR_ERROR
+    
+    return None
+
+def build_dog_item(dog_data: Dict[str, Any], encrypted_name: str,
+                   dog_id: Optional[str] = None,
+                   weight: Optional[float] = None) -> Dict[str, Any]:
+    """Normalize a validated dog record into a DynamoDB item
+
+    Bulk callers pass ``weight`` pre-parsed with ``weights.parse_weights``.
+    """
+    # Generate IDs; imports pass a deterministic dog_id so retries are idempotent
+    shelter_id = generate_shelter_id(dog_data['shelter'], dog_data['city'], dog_data['state'])
+    dog_id = dog_id or str(uuid.uuid4())
+    
+    dog_item = {
+        'shelter_id': shelter_id,
+        'dog_id': dog_id,
+        'shelter': dog_data['shelter'],
+        'city': dog_data['city'],
+        'state': dog_data['state'],
+        'encrypted_dog_name': encrypted_name,
+        # Canonical species is the SpeciesIndex partition; the submitted value is kept
+        'species': species.LABRADOR_SPECIES,
+        'species_raw': dog_data['species'],
+        'description': dog_data['description'],
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+        # Bumped on every change; cached copies older than this are stale
+        'version': 1,
+        # Maintained from the interactions stream; popularity sorts SpeciesPopularityIndex
+        'wag_count': 0,
+        'growl_count': 0,
+        'popularity': 0
+    }
+    
+    # Optional fields with validation
+    # Dates are stored as ISO strings when recognized, the raw value otherwise
+    if 'shelter_entry_date' in dog_data:
+        dog_item['shelter_entry_date'] = (
+            dates.normalize_date(dog_data['shelter_entry_date']) or dog_data['shelter_entry_date']
+        )
+    
+    if 'dog_birthday' in dog_data:
+        birth_date = dates.normalize_date(dog_data['dog_birthday'])
+        dog_item['dog_birthday'] = birth_date or dog_data['dog_birthday']
+        if birth_date:
+            # Sortable key behind the age filters
+            dog_item['birth_date'] = birth_date
+    
+    if 'dog_weight' in dog_data:
+        # Handle weight conversion from string to number
+        if weight is None:
+            weight = parse_weight(dog_data['dog_weight'])
+        if weight:
+            dog_item['dog_weight'] = Decimal(str(weight))
+        elif weight is None:
+            print(f"Invalid weight format: {dog_data['dog_weight']}")
+    
+    if 'dog_color' in dog_data:
+        dog_item['dog_color'] = dog_data['dog_color']
+        family = color_family(dog_data['dog_color'])
+        if family:
+            # Partition key of StateColorWeightIndex
+            dog_item['state_color'] = f"{dog_data['state']}#{family}"
+    
+    return dog_item
+
+def parse_batch_body(body: Optional[str]) -> List[Any]:
+    """Parse a batch upload body given as a JSON array or as NDJSON"""
+    if not body or not body.strip():
+        raise ValueError('Request body must contain at least one dog')
+    
+    text = body.strip()
+    if text.startswith('['):
+        records = json.loads(text)
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    
+    if len(records) > MAX_BATCH_DOGS:
+        raise ValueError(f'At most {MAX_BATCH_DOGS} dogs can be uploaded per request')
+    return records
+
+def create_dogs_batch(body: Optional[str]) -> Dict[str, Any]:
+    """Create many dogs from a JSON array or NDJSON body"""
     try:
-        # Start with scanning the table (can be optimized with GSI queries)
-        scan_kwargs = {}
-        filter_expressions = []
-        expression_attribute_values = {}
-        expression_attribute_names = {}
-        
-        # Filter by state using GSI
-        if 'state' in query_params:
-            response = dogs_table.query(
-                IndexName='StateIndex',
-                KeyConditionExpression='#state = :state',
-                ExpressionAttributeNames={'#state': 'state'},
-                ExpressionAttributeValues={':state': query_params['state']}
-            )
-            items = response['Items']
-        else:
-            # Scan all items if no state filter
-            response = dogs_table.scan()
-            items = response['Items']
+        try:
+            records = parse_batch_body(body)
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError too
+            return create_response(400, {'error': f'Invalid batch body: {str(e)}'})
         
-        # Apply additional filters
-        filtered_items = []
-        for item in items:
-            # Filter by species (ensure only Labrador Retrievers)
-            species = item.get('species', '').lower()
-            if 'labrador' not in species and 'lab' not in species:
+        results: List[Dict[str, Any]] = []
+        accepted = []
+        not_labradors = []
+        for index, dog_data in enumerate(records):
+            error = validate_dog_data(dog_data)
+            if error:
+                results.append({'index': index, 'status': 'rejected', 'error': error})
+                if error == NOT_LABRADOR_ERROR:
+                    not_labradors.append((index, dog_data))
+            else:
+                results.append({'index': index})
+                accepted.append((index, dog_data))
+        
+        quarantine_ids = quarantine_dogs([dog_data for _, dog_data in not_labradors], 'batch')
+        for (index, _), quarantine_id in zip(not_labradors, quarantine_ids):
+            results[index]['quarantine_id'] = quarantine_id
+        
+        # Encrypt names in bulk, then normalize and write in chunks of 25
+        encrypted_names = encrypt_dog_names([dog_data['dog_name'] for _, dog_data in accepted])
+        parsed_weights = weights.parse_weights([dog_data.get('dog_weight') for _, dog_data in accepted])
+        items_by_key = {}
+        for (index, dog_data), encrypted_name, weight in zip(accepted, encrypted_names, parsed_weights):
+            result = results[index]
+            if encrypted_name is None:
+                result.update({'status': 'failed', 'error': 'Failed to encrypt dog name'})
                 continue
-            
-            # Filter by weight range
-            if 'min_weight' in query_params or 'max_weight' in query_params:
-                weight = item.get('dog_weight')
-                if weight:
-                    weight = float(weight)
-                    if 'min_weight' in query_params and weight < float(query_params['min_weight']):
-                        continue
-                    if 'max_weight' in query_params and weight > float(query_params['max_weight']):
-                        continue
-            
-            # Filter by color
-            if 'color' in query_params:
-                dog_color = item.get('dog_color', '').lower()
-                if query_params['color'].lower() not in dog_color:
-                    continue
-            
-            # Decrypt dog name for response
-            if 'encrypted_dog_name' in item:
-                try:
-                    item['dog_name'] = decrypt_dog_name(item['encrypted_dog_name'])
-                    del item['encrypted_dog_name']
-                except Exception as e:
-                    print(f"Error decrypting dog name: {str(e)}")
-                    item['dog_name'] = "Name unavailable"
-            
-            filtered_items.append(item)
+            dog_item = build_dog_item(dog_data, encrypted_name, weight=weight)
+            result.update({'status': 'created', 'shelter_id': dog_item['shelter_id'],
+                           'dog_id': dog_item['dog_id']})
+            items_by_key[(dog_item['shelter_id'], dog_item['dog_id'])] = dog_item
         
-        return create_response(200, {
-            'dogs': filtered_items,
-            'count': len(filtered_items)
+        unprocessed = dynamo_batch.batch_write(
+            dynamodb, DOGS_TABLE_NAME,
+            [{'PutRequest': {'Item': item}} for item in items_by_key.values()]
+        )
+        failed_keys = {
+            (request['PutRequest']['Item']['shelter_id'], request['PutRequest']['Item']['dog_id'])
+            for request in unprocessed
+        }
+        for result in results:
+            if (result.get('shelter_id'), result.get('dog_id')) in failed_keys:
+                result['status'] = 'failed'
+                result['error'] = 'Failed to store dog'
+        index_dogs([item for key, item in items_by_key.items() if key not in failed_keys])
+        
+        created = sum(1 for result in results if result['status'] == 'created')
+        logger.info("Dog batch processed", extra={
+            "records": len(records),
+            "dogs_created": created,
+            "dogs_rejected": sum(1 for result in results if result['status'] == 'rejected'),
+            "dogs_failed": sum(1 for result in results if result['status'] == 'failed')
+        })
+        
+        return create_response(201 if created == len(records) else 207, {
+            'message': f'{created} of {len(records)} dogs created',
+            'created': created,
+            'results': results
         })
         
+    except Exception as e:
+        print(f'Error creating dog batch: {str(e)}')
+        return create_response(500, {'error': 'Failed to create dogs'})
+
+def quarantine_dogs(records: List[Dict[str, Any]], source: str,
+                    quarantine_ids: Optional[List[str]] = None) -> List[str]:
+    """Park records whose species is not a Labrador Retriever for review
+
+    Dog names are not kept. Callers that may retry pass deterministic
+    ``quarantine_ids``; otherwise new ones are generated. Returns the ids.
+    """
+    now = datetime.now(timezone.utc)
+    expires_at = int(now.timestamp()) + QUARANTINE_RETENTION_DAYS * 86400
+    quarantine_ids = quarantine_ids or [str(uuid.uuid4()) for _ in records]
+    items = []
+    for dog_data, quarantine_id in zip(records, quarantine_ids):
+        breed_code, matched_by = species.classify(dog_data.get('species', ''))
+        record = {field: value for field, value in dog_data.items() if field != 'dog_name'}
+        items.append({
+            'quarantine_id': quarantine_id,
+            'source': source,
+            'reason': NOT_LABRADOR_ERROR,
+            'species_raw': str(dog_data.get('species', '')),
+            'breed_code': breed_code,
+            'matched_by': matched_by,
+            'record': json.dumps(record, default=str),
+            'received_at': now.isoformat(),
+            'expires_at': expires_at
+        })
+    
+    unprocessed = dynamo_batch.batch_write(
+        dynamodb, QUARANTINE_TABLE_NAME, [{'PutRequest': {'Item': item}} for item in items]
+    )
+    if unprocessed:
+        logger.warning("Failed to quarantine records", extra={
+            "source": source,
+            "records": len(unprocessed)
+        })
+    logger.info("Records quarantined", extra={
+        "source": source,
+        "breed_codes": sorted({item['breed_code'] for item in items})
+    })
+    return [item['quarantine_id'] for item in items]
+
+def get_dogs(query_params: Dict[str, str], if_none_match: Optional[str] = None) -> Dict[str, Any]:
+    """Get dogs with optional filtering, one page at a time when limit is given"""
+    try:
+        try:
+            filters = compile_dog_filters(query_params)
+            limit = parse_limit(query_params.get('limit'))
+            parse_sort(query_params.get('sort'))
+            terms = search.parse_query(query_params['q']) if 'q' in query_params else None
+            fields = api_responses.parse_fields(query_params.get('fields'))
+        except ValueError as e:
+            return create_response(400, {'error': str(e)})
+        
+        if terms is not None:
+            if query_params.get('sort'):
+                return create_response(400, {'error': 'sort cannot be combined with q'})
+            return search_dogs(terms, query_params, filters, limit, fields, if_none_match)
+        
+        # Read through the cheapest index that can serve the filters
+        plan = plan_dog_query(query_params, filters)
+        scan_kwargs = plan.request(filters)
+        # Resume keys need the index key; residual checks need their attributes
+        read_attributes = None
+        if fields is not None:
+            read_attributes = (stored_attributes(fields) + list(plan.key_attributes)
+                               + filters.residual_attributes + list(ETAG_ATTRIBUTES))
+            apply_projection(scan_kwargs, read_attributes)
+        
+        start_key = None
+        if query_params.get('next_token'):
+            try:
+                start_key = pagination.decode_token(
+                    query_params['next_token'], plan.token_scope, PAGE_TOKEN_SIGNING_KEY
+                )
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+        
+        if limit is not None:
+            scan_kwargs['Limit'] = limit
+        
+        usage = ReadUsage()
+        if plan.reads_everything and not plan.descending and limit is None and start_key is None:
+            # Unpaged listing of every dog: read the index scan segments in parallel
+            scan_request = plan.scan_request(filters)
+            if read_attributes is not None:
+                apply_projection(scan_request, read_attributes)
+            items = parallel_scan.parallel_scan(
+                usage.metered(dogs_table.scan), scan_request,
+                SCAN_SEGMENTS, DOG_KEY_ATTRIBUTES
+            )
+            filtered_items = [item for item in items if filters.matches(item)]
+            resume_key = None
+        else:
+            # Keep reading pages until the page is filled after filtering
+            items = pagination.iter_items(
+                usage.metered(dogs_table.query), scan_kwargs, plan.key_attributes, start_key,
+                max_pages=MAX_PAGES_PER_REQUEST if limit is not None else None
+            )
+            filtered_items, resume_key = pagination.collect(
+                items, filters.matches, limit
+            )
+        
+        logger.info("Dog listing plan", extra={
+            "plan": plan.name,
+            "estimated_cost": plan.cost,
+            "dogs_returned": len(filtered_items),
+            "projected_fields": len(fields) if fields is not None else None,
+            **usage.stats()
+        })
+        
+        return listing_response(filtered_items, fields, resume_key, plan.token_scope,
+                                if_none_match)
+        
+    except DogsUnavailable as e:
+        print(f'Error getting dogs: {str(e)}')
+        return create_response(503, {'error': 'Dogs are temporarily unavailable, try again'},
+                               {'Retry-After': str(RETRY_AFTER_SECONDS)})
     except Exception as e:
         print(f'Error getting dogs: {str(e)}')
         return create_response(500, {'error': 'Failed to retrieve dogs'})
 
-def get_dog(dog_id: str, query_params: Dict[str, str]) -> Dict[str, Any]:
+class DogFilters:
+    """Listing filters compiled into a DynamoDB FilterExpression plus residual checks
+
+    Conditions DynamoDB can evaluate exactly are pushed down so non-matching
+    items never leave the table. Only semantics it cannot express, such as
+    case-insensitive substring matching, are left for ``matches``. Range
+    conditions are kept apart so a plan reading an index sorted by the same
+    attribute can serve them from its key condition instead.
+    """
+
+    def __init__(self):
+        self.conditions: List[str] = []
+        self.names: Dict[str, str] = {}
+        self.values: Dict[str, Any] = {}
+        self.residual: List[Callable[[Dict[str, Any]], bool]] = []
+        # Attributes the residual checks read, which projections must keep
+        self.residual_attributes: List[str] = []
+        # attribute -> [(operator, placeholder, value)], lower bound first
+        self.ranges: Dict[str, List[Tuple[str, str, Any]]] = {}
+        self.color_family: Optional[str] = None
+
+    def push_down(self, condition: str, names: Dict[str, str],
+                  values: Optional[Dict[str, Any]] = None) -> None:
+        self.conditions.append(condition)
+        self.names.update(names)
+        self.values.update(values or {})
+
+    def add_range(self, attribute: str, operator: str, placeholder: str, value: Any) -> None:
+        bounds = self.ranges.setdefault(attribute, [])
+        bounds.append((operator, placeholder, value))
+        bounds.sort(key=lambda bound: bound[0] != '>=')
+
+    def range_condition(self, attribute: str,
+                        key: bool = False) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Condition for the bounds on ``attribute``; key conditions use BETWEEN"""
+        bounds = self.ranges[attribute]
+        if key and len(bounds) == 2:
+            condition = f'#{attribute} BETWEEN {bounds[0][1]} AND {bounds[1][1]}'
+        else:
+            condition = ' AND '.join(
+                f'#{attribute} {operator} {placeholder}' for operator, placeholder, _ in bounds
+            )
+        return (condition, {f'#{attribute}': attribute},
+                {placeholder: value for _, placeholder, value in bounds})
+
+    def apply(self, request: Dict[str, Any], key_attributes: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """Merge the FilterExpression into query/scan keyword arguments
+
+        Ranges on ``key_attributes`` are served by the key condition; DynamoDB
+        rejects filters on the key attributes of the index being queried.
+        """
+        conditions = [request['FilterExpression']] if 'FilterExpression' in request else []
+        conditions += self.conditions
+        names = dict(self.names)
+        values = dict(self.values)
+        for attribute in self.ranges:
+            if attribute in key_attributes:
+                continue
+            condition, range_names, range_values = self.range_condition(attribute)
+            conditions.append(condition)
+            names.update(range_names)
+            values.update(range_values)
+        
+        if conditions:
+            request['FilterExpression'] = ' AND '.join(conditions)
+            request['ExpressionAttributeNames'] = {
+                **request.get('ExpressionAttributeNames', {}), **names
+            }
+            if values:
+                request['ExpressionAttributeValues'] = {
+                    **request.get('ExpressionAttributeValues', {}), **values
+                }
+        return request
+
+    def matches(self, item: Dict[str, Any]) -> bool:
+        """Apply the checks DynamoDB could not evaluate"""
+        return all(check(item) for check in self.residual)
+
+    def matches_fetched(self, item: Dict[str, Any]) -> bool:
+        """Apply every filter in Python, for items read by key
+
+        The only pushed-down condition, that a colour exists, is implied by
+        the residual colour check.
+        """
+        for attribute, bounds in self.ranges.items():
+            if attribute not in item:
+                return False
+            for operator, _, value in bounds:
+                if operator == '>=' and not item[attribute] >= value:
+                    return False
+                if operator == '<=' and not item[attribute] <= value:
+                    return False
+        return self.matches(item)
+
+def compile_dog_filters(query_params: Dict[str, str]) -> DogFilters:
+    """Compile the weight, age and color listing filters
+
+    Species needs no filter: only canonical Labrador Retrievers are stored.
+    Raises ValueError for parameters that cannot be parsed.
+    """
+    filters = DogFilters()
+    
+    # Filter by weight range; dogs without a recorded weight never match
+    bounds = {}
+    for param, operator in (('min_weight', '>='), ('max_weight', '<=')):
+        if param in query_params:
+            try:
+                value = float(query_params[param])
+            except (TypeError, ValueError):
+                raise ValueError(f'{param} must be a number')
+            # NaN and infinity parse as floats but fail DynamoDB validation
+            if not math.isfinite(value):
+                raise ValueError(f'{param} must be a number')
+            bounds[param] = Decimal(str(value))
+            filters.add_range('dog_weight', operator, f':{param}', bounds[param])
+    if len(bounds) == 2 and bounds['min_weight'] > bounds['max_weight']:
+        raise ValueError('min_weight must not be greater than max_weight')
+    
+    # Filter by age; dogs without a recognized birthday never match
+    if 'min_age' in query_params or 'max_age' in query_params:
+        earliest, latest = dates.birth_date_range(
+            query_params.get('min_age'), query_params.get('max_age')
+        )
+        if earliest:
+            filters.add_range('birth_date', '>=', ':earliest_birth_date', earliest)
+        if latest:
+            filters.add_range('birth_date', '<=', ':latest_birth_date', latest)
+    
+    # Filter by color: case-insensitive substring matching stays in Python, but
+    # dogs without a color can never match a non-empty color. A term naming a
+    # colour family only matches dogs of that family.
+    if 'color' in query_params:
+        color = query_params['color'].lower()
+        if color:
+            filters.push_down('attribute_exists(#dog_color)', {'#dog_color': 'dog_color'})
+        filters.color_family = color_family(color)
+        family = filters.color_family
+        filters.residual_attributes.append('dog_color')
+        filters.residual.append(
+            lambda item: color in item.get('dog_color', '').lower()
+            and (family is None or color_family(item.get('dog_color', '')) == family)
+        )
+    
+    return filters
+
+def color_family(color: Any) -> Optional[str]:
+    """Family of the first colour word in ``color``, e.g. "Chocolate Brown" is chocolate"""
+    for word in COLOR_WORD_RE.findall(str(color).lower()):
+        if word in COLOR_FAMILIES:
+            return COLOR_FAMILIES[word]
+    return None
+
+class QueryPlan:
+    """An access path for a dog listing and its estimated relative read cost
+
+    ``partition`` is the (attribute, value) equality of the key condition and
+    ``sort_attribute`` the filter range the index sort key serves, if any.
+    ``equalities`` are (attribute, value) conditions the index cannot key on
+    and ``descending`` reads the index sort key from highest to lowest.
+    """
+
+    def __init__(self, index_name: str, cost: float, key_attributes: Tuple[str, ...],
+                 partition: Tuple[str, str], sort_attribute: Optional[str] = None,
+                 equalities: Tuple[Tuple[str, str], ...] = (), descending: bool = False):
+        self.index_name = index_name
+        self.cost = cost
+        self.key_attributes = key_attributes
+        self.partition = partition
+        self.sort_attribute = sort_attribute
+        self.equalities = equalities
+        self.descending = descending
+
+    @property
+    def name(self) -> str:
+        return self.index_name
+
+    @property
+    def reads_everything(self) -> bool:
+        """Plans expected to read every dog are better served by a parallel scan"""
+        return self.cost >= 1.0
+
+    @property
+    def token_scope(self) -> str:
+        """Continuation tokens are only valid for the plan that issued them"""
+        return ':'.join([self.index_name, self.partition[1]]
+                        + [value for _, value in self.equalities])
+
+    def _equality_filter(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if self.equalities:
+            request['FilterExpression'] = ' AND '.join(
+                f'#{attribute} = :{attribute}' for attribute, _ in self.equalities
+            )
+            for attribute, value in self.equalities:
+                request['ExpressionAttributeNames'][f'#{attribute}'] = attribute
+                request['ExpressionAttributeValues'][f':{attribute}'] = value
+        return request
+
+    def request(self, filters: DogFilters) -> Dict[str, Any]:
+        """Query keyword arguments with the filters that remain"""
+        attribute, value = self.partition
+        condition = f'#{attribute} = :{attribute}'
+        names = {f'#{attribute}': attribute}
+        values = {f':{attribute}': value}
+        key_attributes: Tuple[str, ...] = ()
+        if self.sort_attribute:
+            range_condition, range_names, range_values = filters.range_condition(
+                self.sort_attribute, key=True
+            )
+            condition = f'{condition} AND {range_condition}'
+            names.update(range_names)
+            values.update(range_values)
+            key_attributes = (self.sort_attribute,)
+        request = self._equality_filter({
+            'IndexName': self.index_name,
+            'KeyConditionExpression': condition,
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': values
+        })
+        if self.descending:
+            request['ScanIndexForward'] = False
+        return filters.apply(request, key_attributes)
+
+    def scan_request(self, filters: DogFilters) -> Dict[str, Any]:
+        """Scan keyword arguments reading the same items from the index in segments"""
+        attribute, value = self.partition
+        return filters.apply({
+            'IndexName': self.index_name,
+            'FilterExpression': f'#{attribute} = :{attribute}',
+            'ExpressionAttributeNames': {f'#{attribute}': attribute},
+            'ExpressionAttributeValues': {f':{attribute}': value}
+        })
+
+def candidate_plans(query_params: Dict[str, str], filters: DogFilters) -> List[QueryPlan]:
+    """Every access path able to serve the listing, widest first"""
+    state = query_params.get('state')
+    if query_params.get('sort') == 'popularity':
+        # Only the popularity index returns dogs in popularity order
+        return [QueryPlan(
+            'SpeciesPopularityIndex', 1.0,
+            DOG_KEY_ATTRIBUTES + ('species', 'popularity'), ('species', species.LABRADOR_SPECIES),
+            equalities=(('state', state),) if state else (), descending=True
+        )]
+    
+    if not state:
+        # Every stored dog is a canonical Labrador Retriever
+        return [QueryPlan(
+            'SpeciesIndex', 1.0,
+            DOG_KEY_ATTRIBUTES + ('species', 'created_at'), ('species', species.LABRADOR_SPECIES)
+        )]
+    
+    plans = [QueryPlan(
+        'StateIndex', STATE_SELECTIVITY,
+        DOG_KEY_ATTRIBUTES + ('state', 'created_at'), ('state', state)
+    )]
+    if 'birth_date' in filters.ranges:
+        plans.append(QueryPlan(
+            'StateBirthDateIndex', STATE_SELECTIVITY * RANGE_SELECTIVITY,
+            DOG_KEY_ATTRIBUTES + ('state', 'birth_date'), ('state', state), 'birth_date'
+        ))
+    # Dogs without a weight are not in the index, so it needs a weight filter
+    if filters.color_family and 'dog_weight' in filters.ranges:
+        plans.append(QueryPlan(
+            'StateColorWeightIndex',
+            STATE_SELECTIVITY * COLOR_FAMILY_SELECTIVITY * RANGE_SELECTIVITY,
+            DOG_KEY_ATTRIBUTES + ('state_color', 'dog_weight'),
+            ('state_color', f'{state}#{filters.color_family}'), 'dog_weight'
+        ))
+    return plans
+
+def plan_dog_query(query_params: Dict[str, str], filters: DogFilters) -> QueryPlan:
+    """Pick the access path with the lowest estimated read cost"""
+    return min(candidate_plans(query_params, filters), key=lambda plan: plan.cost)
+
+class ReadUsage:
+    """Pages, items and capacity consumed while serving one listing"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.scanned = 0
+        self.returned = 0
+        self.capacity_units = 0.0
+
+    def metered(self, read_page: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        """Wrap a query/scan so every page reports its consumed capacity"""
+        def read(**kwargs):
+            response = read_page(ReturnConsumedCapacity='TOTAL', **kwargs)
+            with self._lock:
+                self.pages += 1
+                self.scanned += response.get('ScannedCount', 0)
+                self.returned += response.get('Count', 0)
+                self.capacity_units += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+            return response
+        return read
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for structured logs"""
+        with self._lock:
+            return {
+                'pages_read': self.pages,
+                'scanned_count': self.scanned,
+                'returned_count': self.returned,
+                'consumed_capacity_units': self.capacity_units
+            }
+
+def parse_limit(limit: Optional[str]) -> Optional[int]:
+    """Validate the optional limit query parameter"""
+    if limit is None:
+        return None
+    try:
+        value = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if not 1 <= value <= MAX_PAGE_LIMIT:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_LIMIT}')
+    return value
+
+def parse_sort(sort: Optional[str]) -> Optional[str]:
+    """Validate the optional sort query parameter"""
+    if sort is not None and sort not in SORT_ORDERS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_ORDERS)}")
+    return sort
+
+def stored_attributes(fields: Tuple[str, ...]) -> List[str]:
+    """Item attributes behind response fields; names are stored encrypted"""
+    return ['encrypted_dog_name' if field == 'dog_name' else field for field in fields]
+
+def apply_projection(request: Dict[str, Any], attributes: Iterable[str]) -> Dict[str, Any]:
+    """Add a ProjectionExpression reading only ``attributes`` to a read request
+
+    Placeholders are numbered so they cannot clash with filter placeholders
+    or reserved words.
+    """
+    attributes = list(dict.fromkeys(attributes))
+    placeholders = {f'#field{index}': attribute for index, attribute in enumerate(attributes)}
+    request['ProjectionExpression'] = ', '.join(placeholders)
+    request['ExpressionAttributeNames'] = {
+        **request.get('ExpressionAttributeNames', {}), **placeholders
+    }
+    return request
+
+def wants_dog_name(fields: Optional[Tuple[str, ...]]) -> bool:
+    """Whether names must be decrypted for the response"""
+    return fields is None or 'dog_name' in fields
+
+def search_dogs(terms: List[str], query_params: Dict[str, str], filters: DogFilters,
+                limit: Optional[int], fields: Optional[Tuple[str, ...]] = None,
+                if_none_match: Optional[str] = None) -> Dict[str, Any]:
+    """Dogs whose description has every term, in dog key order
+
+    The posting lists are intersected first; only matching dogs are read, in
+    batches, and the other listing filters are applied to them in Python. A
+    page the filters leave short may still carry a ``next_token``.
+    """
+    scope = 'search:' + ' '.join(sorted(terms))
+    start_after = None
+    if query_params.get('next_token'):
+        try:
+            start_key = pagination.decode_token(
+                query_params['next_token'], scope, PAGE_TOKEN_SIGNING_KEY
+            )
+        except ValueError as e:
+            return create_response(400, {'error': str(e)})
+        start_after = search.dog_key(start_key['shelter_id'], start_key['dog_id'])
+    
+    # Posting lists resume after the last dog returned, not from their start,
+    # and are read only as far as the first limit matches
+    keys, window_end, stats = search.match(dynamodb, SEARCH_TABLE_NAME, terms,
+                                           start_after=start_after, limit=limit)
+    
+    state = query_params.get('state')
+    projection = None
+    if fields is not None:
+        projection = apply_projection({}, stored_attributes(fields) + list(DOG_KEY_ATTRIBUTES)
+                                      + ['state'] + list(filters.ranges) + filters.residual_attributes
+                                      + list(ETAG_ATTRIBUTES))
+    matched: List[Dict[str, Any]] = []
+    resume_key = None
+    chunk_size = dynamo_batch.MAX_BATCH_GET_KEYS
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        items, unprocessed = dynamo_batch.batch_get(dynamodb, DOGS_TABLE_NAME, [
+            {'shelter_id': shelter_id, 'dog_id': dog_id} for shelter_id, dog_id in chunk
+        ], projection=projection)
+        if unprocessed:
+            raise DogsUnavailable(f'{len(unprocessed)} dogs left unread after retries')
+        # Postings of deleted dogs find nothing and are skipped
+        by_key = {(item['shelter_id'], item['dog_id']): item for item in items}
+        for position, key in enumerate(chunk, start):
+            item = by_key.get(key)
+            if item is None or (state and item.get('state') != state) or not filters.matches_fetched(item):
+                continue
+            matched.append(item)
+            if limit is not None and len(matched) >= limit:
+                if position < len(keys) - 1 or window_end is not None:
+                    resume_key = {'shelter_id': key[0], 'dog_id': key[1]}
+                break
+        if limit is not None and len(matched) >= limit:
+            break
+    else:
+        if window_end is not None:
+            # Filters left the page short; the next one starts past the window
+            resume_key = {'shelter_id': window_end[0], 'dog_id': window_end[1]}
+    
+    logger.info("Dog search", extra={
+        **stats,
+        "candidates": len(keys),
+        "dogs_returned": len(matched)
+    })
+    
+    return listing_response(matched, fields, resume_key, scope, if_none_match)
+
+def listing_response(items: List[Dict[str, Any]], fields: Optional[Tuple[str, ...]],
+                     resume_key: Optional[Dict[str, Any]], token_scope: str,
+                     if_none_match: Optional[str]) -> Dict[str, Any]:
+    """A page of dogs, or 304 when the client already has it
+
+    The ETag is checked before any name is decrypted or JSON serialized.
+    """
+    etag = dog_etag(items, fields, token_scope, resume_key)
+    headers = {'ETag': etag, 'Cache-Control': LISTING_CACHE_CONTROL}
+    if api_responses.etag_matches(if_none_match, etag):
+        return create_response(304, None, headers)
+    
+    # Decrypt dog names for response; listings without names need no KMS calls
+    if wants_dog_name(fields):
+        decrypt_dog_names(items)
+    
+    body = {
+        'dogs': api_responses.project(items, fields),
+        'count': len(items)
+    }
+    if resume_key:
+        body['next_token'] = pagination.encode_token(resume_key, token_scope, PAGE_TOKEN_SIGNING_KEY)
+    return create_response(200, body, headers)
+
+def dog_etag(items: List[Dict[str, Any]], *context: Any) -> str:
+    """Weak ETag of dog items as read, before names are decrypted
+
+    ``context`` holds whatever else shapes the response, such as the fields.
+    """
+    digest = hashlib.sha256()
+    for item in items:
+        values = [item.get(name) for name in DOG_KEY_ATTRIBUTES + ETAG_ATTRIBUTES]
+        digest.update(api_responses.dumps(values).encode('utf-8'))
+    digest.update(api_responses.dumps(context).encode('utf-8'))
+    # Weak: compressed and uncompressed bodies share it
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+def get_dog(dog_id: str, query_params: Dict[str, str],
+            if_none_match: Optional[str] = None) -> Dict[str, Any]:
     """Get a specific dog by ID"""
     try:
         # Need shelter_id to get the dog
         shelter_id = query_params.get('shelter_id')
         if not shelter_id:
             return create_response(400, {'error': 'shelter_id query parameter is required'})
+        try:
+            fields = api_responses.parse_fields(query_params.get('fields'))
+        except ValueError as e:
+            return create_response(400, {'error': str(e)})
+        
+        cache_key = (shelter_id, dog_id)
+        cached = dog_cache.get(cache_key)
+        logger.info("Dog cache lookup", extra={
+            "shelter_id": shelter_id,
+            "dog_id": dog_id,
+            "cache_hit": cached is not None,
+            **dog_cache.stats()
+        })
+        if cached is not None:
+            etag = dog_etag([cached], fields)
+            headers = {'ETag': etag, 'Cache-Control': DOG_CACHE_CONTROL}
+            if api_responses.etag_matches(if_none_match, etag):
+                return create_response(304, None, headers)
+            return create_response(200, {'dog': api_responses.project([dict(cached)], fields)[0]},
+                                   headers)
         
-        response = dogs_table.get_item(
-            Key={
+        get_kwargs = {
+            'Key': {
                 'shelter_id': shelter_id,
                 'dog_id': dog_id
             }
-        )
+        }
+        if fields is not None:
+            # Partial items are not cached; the cache only holds whole records
+            apply_projection(get_kwargs, stored_attributes(fields) + list(ETAG_ATTRIBUTES))
+        response = dogs_table.get_item(**get_kwargs)
         
         if 'Item' not in response:
             return create_response(404, {'error': 'Dog not found'})
         
         item = response['Item']
+        etag = dog_etag([item], fields)
+        headers = {'ETag': etag, 'Cache-Control': DOG_CACHE_CONTROL}
+        if api_responses.etag_matches(if_none_match, etag):
+            return create_response(304, None, headers)
         
         # Decrypt dog name
-        if 'encrypted_dog_name' in item:
-            try:
-                item['dog_name'] = decrypt_dog_name(item['encrypted_dog_name'])
-                del item['encrypted_dog_name']
-            except Exception as e:
-                print(f"Error decrypting dog name: {str(e)}")
-                item['dog_name'] = "Name unavailable"
+        if wants_dog_name(fields):
+            decrypt_dog_names([item])
+        if fields is None:
+            dog_cache.put(cache_key, dict(item), int(item.get('version', 0)))
         
-        return create_response(200, {'dog': item})
+        return create_response(200, {'dog': api_responses.project([item], fields)[0]}, headers)
         
     except Exception as e:
         print(f'Error getting dog: {str(e)}')
         return create_response(500, {'error': 'Failed to retrieve dog'})
 
-def create_interaction(interaction_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a user interaction (wag/growl)"""
+def update_dog(dog_id: str, query_params: Dict[str, str], dog_data: Any) -> Dict[str, Any]:
+    """Update only the submitted fields of a dog in a single UpdateItem
+
+    A ``version`` in the body makes the update conditional on the stored
+    version, so clients that read, edit and write back never overwrite an
+    edit they have not seen; a mismatch returns 409.
+    """
+    try:
+        shelter_id = query_params.get('shelter_id')
+        if not shelter_id:
+            return create_response(400, {'error': 'shelter_id query parameter is required'})
+        try:
+            changes, removals, expected_version = dog_changes(dog_data)
+        except ValueError as e:
+            return create_response(400, {'error': str(e)})
+        
+        key = {'shelter_id': shelter_id, 'dog_id': dog_id}
+        # state_color embeds the state as stored; shelter_id starts with it upper-cased,
+        # which is right unless the dog was created with a lower-case state
+        state = shelter_id.split('#', 1)[0]
+        while True:
+            writes = dict(changes, updated_at=datetime.now(timezone.utc).isoformat())
+            if 'dog_color' in changes and 'state_color' not in removals:
+                writes['state_color'] = f"{state}#{color_family(changes['dog_color'])}"
+            try:
+                previous = write_dog_update(key, writes, removals, expected_version, state)
+                break
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                stored = ddb.deserialize_item(e.response.get('Item', {}))
+            if not stored:
+                return create_response(404, {'error': 'Dog not found'})
+            if expected_version is not None and stored.get('version') != expected_version:
+                # Carries the stored version: a fresh GET may still come from the stage cache
+                return create_response(409, {
+                    'error': f'Dog was modified after version {expected_version}',
+                    'version': stored.get('version')
+                })
+            if stored.get('state') == state:
+                raise RuntimeError('Dog update condition failed unexpectedly')
+            # Only the state guess was wrong; retry with the stored one
+            state = stored.get('state')
+        
+        dog_item = {field: value for field, value in previous.items() if field not in removals}
+        dog_item.update(writes)
+        dog_item['version'] = int(previous.get('version', 0)) + 1
+        update_postings(previous, dog_item)
+        dog_cache.invalidate((shelter_id, dog_id), int(dog_item['version']))
+        
+        # The name is only known without a KMS call when it was just submitted
+        response_item = dog_item.copy()
+        response_item.pop('encrypted_dog_name', None)
+        if 'dog_name' in dog_data:
+            response_item['dog_name'] = dog_data['dog_name']
+        logger.info("Dog updated", extra={
+            "shelter_id": shelter_id,
+            "dog_id": dog_id,
+            "updated_fields": sorted(dog_data),
+            "version": dog_item['version']
+        })
+        return create_response(200, {'message': 'Dog updated successfully', 'dog': response_item})
+        
+    except Exception as e:
+        print(f'Error updating dog: {str(e)}')
+        return create_response(500, {'error': 'Failed to update dog'})
+
+def dog_changes(dog_data: Any) -> Tuple[Dict[str, Any], List[str], Optional[int]]:
+    """Normalize a partial dog update like create_dog does a new dog
+
+    Returns the attributes to set, the attributes to remove and the expected
+    version, if any. ``state_color`` is left out because it needs the stored
+    state. Raises ValueError for fields that cannot be updated or values
+    that fail validation.
+    """
+    if not isinstance(dog_data, dict):
+        raise ValueError('Dog record must be a JSON object')
+    fixed = [field for field in dog_data if field not in UPDATABLE_DOG_FIELDS + ('version',)]
+    if fixed:
+        raise ValueError(f'{fixed[0]} cannot be updated')
+    if not any(field in dog_data for field in UPDATABLE_DOG_FIELDS):
+        raise ValueError('Request body must contain at least one field to update')
+    
+    expected_version = None
+    if 'version' in dog_data:
+        expected_version = dog_data['version']
+        if isinstance(expected_version, bool) or not isinstance(expected_version, int):
+            raise ValueError('version must be an integer')
+    
+    changes: Dict[str, Any] = {}
+    removals: List[str] = []
+    if 'species' in dog_data:
+        if not species.is_labrador(dog_data['species']):
+            raise ValueError(NOT_LABRADOR_ERROR)
+        changes['species'] = species.LABRADOR_SPECIES
+        changes['species_raw'] = dog_data['species']
+    if 'description' in dog_data:
+        changes['description'] = dog_data['description']
+    if 'shelter_entry_date' in dog_data:
+        changes['shelter_entry_date'] = (
+            dates.normalize_date(dog_data['shelter_entry_date']) or dog_data['shelter_entry_date']
+        )
+    if 'dog_birthday' in dog_data:
+        birth_date = dates.normalize_date(dog_data['dog_birthday'])
+        changes['dog_birthday'] = birth_date or dog_data['dog_birthday']
+        if birth_date:
+            changes['birth_date'] = birth_date
+        else:
+            # Keep the age filters from matching on the old birthday
+            removals.append('birth_date')
+    if 'dog_weight' in dog_data:
+        weight = parse_weight(dog_data['dog_weight'])
+        if weight is None:
+            raise ValueError(f"Invalid weight format: {dog_data['dog_weight']}")
+        if weight:
+            changes['dog_weight'] = Decimal(str(weight))
+        else:
+            removals.append('dog_weight')
+    if 'dog_color' in dog_data:
+        changes['dog_color'] = dog_data['dog_color']
+        if not color_family(dog_data['dog_color']):
+            removals.append('state_color')
+    # Names are only encrypted, and KMS only called, when the name changes
+    if 'dog_name' in dog_data:
+        changes['encrypted_dog_name'] = encrypt_dog_name(dog_data['dog_name'])
+    return changes, removals, expected_version
+
+def write_dog_update(key: Dict[str, str], sets: Dict[str, Any], removals: List[str],
+                     expected_version: Optional[int], state: str) -> Dict[str, Any]:
+    """Apply a dog update in one conditional UpdateItem and return the previous item
+
+    Every attribute gets a numbered placeholder, so the expression never
+    clashes with reserved words, and ``version`` is bumped in the same write.
+    When ``state_color`` is set, the stored state must equal ``state``.
+    Raises ClientError with the stored item attached when a condition fails.
+    """
+    names = {'#dog_id': 'dog_id', '#version': 'version'}
+    values: Dict[str, Any] = {':one': 1, ':zero': 0}
+    assignments = ['#version = if_not_exists(#version, :zero) + :one']
+    for index, (attribute, value) in enumerate(sets.items()):
+        names[f'#field{index}'] = attribute
+        values[f':value{index}'] = value
+        assignments.append(f'#field{index} = :value{index}')
+    expression = 'SET ' + ', '.join(assignments)
+    if removals:
+        offset = len(sets)
+        names.update({f'#field{offset + index}': attribute for index, attribute in enumerate(removals)})
+        expression += ' REMOVE ' + ', '.join(f'#field{offset + index}' for index in range(len(removals)))
+    
+    conditions = ['attribute_exists(#dog_id)']
+    if expected_version is not None:
+        conditions.append('#version = :expected_version')
+        values[':expected_version'] = expected_version
+    if 'state_color' in sets:
+        conditions.append('#state = :state')
+        names['#state'] = 'state'
+        values[':state'] = state
+    
+    response = dogs_table.update_item(
+        Key=key,
+        UpdateExpression=expression,
+        ConditionExpression=' AND '.join(conditions),
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+        ReturnValues='ALL_OLD',
+        ReturnValuesOnConditionCheckFailure='ALL_OLD'
+    )
+    return response['Attributes']
+
+def delete_dog(dog_id: str, query_params: Dict[str, str]) -> Dict[str, Any]:
+    """Delete a dog and its description postings
+
+    Its interactions are deleted afterwards by the cleanup worker, which
+    picks the delete up from the table stream.
+    """
+    try:
+        shelter_id = query_params.get('shelter_id')
+        if not shelter_id:
+            return create_response(400, {'error': 'shelter_id query parameter is required'})
+        
+        try:
+            response = dogs_table.delete_item(
+                Key={'shelter_id': shelter_id, 'dog_id': dog_id},
+                ConditionExpression='attribute_exists(dog_id)',
+                ReturnValues='ALL_OLD'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            return create_response(404, {'error': 'Dog not found'})
+        update_postings(response['Attributes'], None)
+        dog_cache.invalidate((shelter_id, dog_id))
+        
+        return create_response(200, {
+            'message': 'Dog deleted successfully',
+            'dog_id': dog_id,
+            'cleanup_job_id': cleanup_job_id(shelter_id, dog_id)
+        })
+        
+    except Exception as e:
+        print(f'Error deleting dog: {str(e)}')
+        return create_response(500, {'error': 'Failed to delete dog'})
+
+def get_import_job(job_id: str) -> Dict[str, Any]:
+    """Get the progress of a bulk import job"""
+    try:
+        response = jobs_table.get_item(Key={'job_id': job_id})
+        job = response.get('Item')
+        if not job or job.get('job_type') != 'import':
+            return create_response(404, {'error': 'Import job not found'})
+        
+        # Bookkeeping for idempotent chunk counting, not part of the API
+        job.pop('processed_chunk_ids', None)
+        job.pop('upload_sequencer', None)
+        for field, value in job.items():
+            if isinstance(value, Decimal):
+                job[field] = int(value)
+        return create_response(200, {'job': job})
+        
+    except Exception as e:
+        print(f'Error getting import job: {str(e)}')
+        return create_response(500, {'error': 'Failed to retrieve import job'})
+
+def create_interaction(interaction_data: Dict[str, Any],
+                       idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+    """Create or change a user interaction (wag/growl)
+
+    A repeated ``idempotency_key`` replays the first response instead of
+    writing again.
+    """
     try:
         required_fields = ['user_id', 'shelter_id', 'dog_id', 'interaction_type']
         for field in required_fields:
             if field not in interaction_data:
                 return create_response(400, {'error': f'Missing required field: {field}'})
         
-        if interaction_data['interaction_type'] not in ['wag', 'growl']:
+        if interaction_data['interaction_type'] not in INTERACTION_TYPES:
             return create_response(400, {'error': 'interaction_type must be "wag" or "growl"'})
         
-        dog_key = f"{interaction_data['shelter_id']}#{interaction_data['dog_id']}"
-        
-        interaction_item = {
-            'user_id': interaction_data['user_id'],
-            'dog_key': dog_key,
-            'shelter_id': interaction_data['shelter_id'],
-            'dog_id': interaction_data['dog_id'],
-            'interaction_type': interaction_data['interaction_type'],
-            'created_at': datetime.now(timezone.utc).isoformat()
-        }
-        
-        interactions_table.put_item(Item=interaction_item)
-        
-        return create_response(201, {
-            'message': 'Interaction recorded successfully',
-            'interaction': interaction_item
-        })
+        if idempotency_key:
+            # Keys are scoped per user so clients cannot collide with each other
+            return run_idempotent(
+                f"interaction:{interaction_data['user_id']}:{idempotency_key}",
+                interaction_data,
+                lambda: upsert_interaction(interaction_data)
+            )
+        return upsert_interaction(interaction_data)
         
     except Exception as e:
         print(f'Error creating interaction: {str(e)}')
         return create_response(500, {'error': 'Failed to record interaction'})
 
+def upsert_interaction(interaction_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Write the interaction only if its type changes, returning the previous state
+
+    Re-sending the current vote costs a conditional check instead of a write
+    and emits no stream record, so popularity counters only see real changes.
+    Votes for dogs that do not exist are rejected with 404.
+    """
+    dog = dogs_table.get_item(
+        Key={'shelter_id': interaction_data['shelter_id'], 'dog_id': interaction_data['dog_id']},
+        ProjectionExpression='dog_id'
+    ).get('Item')
+    if not dog:
+        return create_response(404, {'error': 'Dog not found'})
+    
+    dog_key = f"{interaction_data['shelter_id']}#{interaction_data['dog_id']}"
+    now = datetime.now(timezone.utc).isoformat()
+    key = {'user_id': interaction_data['user_id'], 'dog_key': dog_key}
+    
+    try:
+        response = interactions_table.update_item(
+            Key=key,
+            UpdateExpression='SET interaction_type = :interaction_type, shelter_id = :shelter_id, '
+                             'dog_id = :dog_id, updated_at = :now, '
+                             'created_at = if_not_exists(created_at, :now)',
+            ConditionExpression='attribute_not_exists(interaction_type) '
+                                'OR interaction_type <> :interaction_type',
+            ExpressionAttributeValues={
+                ':interaction_type': interaction_data['interaction_type'],
+                ':shelter_id': interaction_data['shelter_id'],
+                ':dog_id': interaction_data['dog_id'],
+                ':now': now
+            },
+            ReturnValues='ALL_OLD',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        # Same vote as before: nothing was written
+        previous = ddb.deserialize_item(e.response.get('Item', {}))
+        return create_response(200, {
+            'message': 'Interaction unchanged',
+            'interaction': previous,
+            'previous': previous,
+            'changed': False
+        })
+    
+    previous = response.get('Attributes')
+    interaction_item = {
+        **key,
+        'shelter_id': interaction_data['shelter_id'],
+        'dog_id': interaction_data['dog_id'],
+        'interaction_type': interaction_data['interaction_type'],
+        'created_at': previous.get('created_at', now) if previous else now,
+        'updated_at': now
+    }
+    if previous:
+        return create_response(200, {
+            'message': 'Interaction updated',
+            'interaction': interaction_item,
+            'previous': previous,
+            'changed': True
+        })
+    return create_response(201, {
+        'message': 'Interaction recorded successfully',
+        'interaction': interaction_item,
+        'previous': None,
+        'changed': True
+    })
+
+def run_idempotent(key: str, request: Dict[str, Any],
+                   operation: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """Run ``operation`` once per idempotency key and replay its response to retries
+
+    The key is claimed with a conditional put before the operation runs, so a
+    concurrent retry sees it in progress instead of writing twice. The claim
+    lasts IDEMPOTENCY_LEASE_SECONDS and is only kept for IDEMPOTENCY_TTL_SECONDS
+    once the response is stored, so a request that dies mid-way frees its key
+    after the lease. Reusing a key for a different request is rejected.
+    Server errors release the key.
+    """
+    fingerprint = hashlib.sha256(
+        json.dumps(request, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    now = int(time.time())
+    marker_key = {'idempotency_key': key}
+    
+    try:
+        # TTL deletion lags, so expired markers and lapsed claims can be claimed again
+        idempotency_table.put_item(
+            Item={
+                **marker_key,
+                'status': 'in_progress',
+                'fingerprint': fingerprint,
+                'expires_at': now + IDEMPOTENCY_LEASE_SECONDS
+            },
+            ConditionExpression='attribute_not_exists(idempotency_key) OR expires_at < :now',
+            ExpressionAttributeValues={':now': now}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        marker = idempotency_table.get_item(Key=marker_key, ConsistentRead=True).get('Item', {})
+        if marker.get('fingerprint') != fingerprint:
+            return create_response(422, {
+                'error': 'Idempotency-Key was already used for a different request'
+            })
+        if marker.get('status') != 'completed':
+            return create_response(409, {
+                'error': 'A request with this Idempotency-Key is still in progress'
+            })
+        logger.info("Idempotent response replayed", extra={"idempotency_key": key})
+        return json.loads(marker['response'])
+    
+    try:
+        response = operation()
+    except Exception:
+        idempotency_table.delete_item(Key=marker_key)
+        raise
+    
+    if response['statusCode'] >= 500:
+        idempotency_table.delete_item(Key=marker_key)
+        return response
+    
+    try:
+        idempotency_table.update_item(
+            Key=marker_key,
+            UpdateExpression='SET #status = :completed, #response = :response, '
+                             'expires_at = :expires_at',
+            ExpressionAttributeNames={'#status': 'status', '#response': 'response'},
+            ExpressionAttributeValues={
+                ':completed': 'completed',
+                ':response': json.dumps(response),
+                ':expires_at': int(time.time()) + IDEMPOTENCY_TTL_SECONDS
+            }
+        )
+    except Exception as e:
+        # The write happened; retries see the key in progress until the lease ends
+        logger.warning("Failed to store idempotent response", extra={
+            "idempotency_key": key,
+            "error": str(e)
+        })
+    return response
+
 def get_user_interactions(query_params: Dict[str, str]) -> Dict[str, Any]:
-    """Get user's interactions"""
+    """Get a user's interactions, one page at a time when limit is given
+
+    ``expand=dog`` attaches each interaction's dog, read in bulk instead of
+    one ``GET /dogs/{dog_id}`` per interaction.
+    """
     try:
         user_id = query_params.get('user_id')
         if not user_id:
             return create_response(400, {'error': 'user_id query parameter is required'})
         
-        response = interactions_table.query(
-            KeyConditionExpression='user_id = :user_id',
-            ExpressionAttributeValues={':user_id': user_id}
+        interaction_type = query_params.get('interaction_type')
+        if interaction_type is not None and interaction_type not in INTERACTION_TYPES:
+            return create_response(400, {'error': 'interaction_type must be "wag" or "growl"'})
+        expand = query_params.get('expand')
+        if expand is not None and expand != 'dog':
+            return create_response(400, {'error': 'expand must be "dog"'})
+        try:
+            limit = parse_limit(query_params.get('limit'))
+        except ValueError as e:
+            return create_response(400, {'error': str(e)})
+        
+        query_kwargs: Dict[str, Any] = {
+            'KeyConditionExpression': 'user_id = :user_id',
+            'ExpressionAttributeValues': {':user_id': user_id}
+        }
+        if interaction_type:
+            query_kwargs['FilterExpression'] = 'interaction_type = :interaction_type'
+            query_kwargs['ExpressionAttributeValues'][':interaction_type'] = interaction_type
+        if limit is not None:
+            query_kwargs['Limit'] = limit
+        
+        # Tokens only continue the same user's listing with the same filter
+        token_scope = f"interactions:{user_id}:{interaction_type or ''}"
+        start_key = None
+        if query_params.get('next_token'):
+            try:
+                start_key = pagination.decode_token(
+                    query_params['next_token'], token_scope, PAGE_TOKEN_SIGNING_KEY
+                )
+            except ValueError as e:
+                return create_response(400, {'error': str(e)})
+        
+        items = pagination.iter_items(
+            interactions_table.query, query_kwargs, ('user_id', 'dog_key'), start_key,
+            max_pages=MAX_PAGES_PER_REQUEST if limit is not None else None
         )
+        interactions, resume_key = pagination.collect(items, lambda item: True, limit)
         
-        return create_response(200, {
-            'interactions': response['Items'],
-            'count': len(response['Items'])
-        })
+        if expand == 'dog':
+            attach_dogs(interactions)
+        
+        body = {
+            'interactions': interactions,
+            'count': len(interactions)
+        }
+        if resume_key:
+            body['next_token'] = pagination.encode_token(
+                resume_key, token_scope, PAGE_TOKEN_SIGNING_KEY
+            )
+        return create_response(200, body)
         
+    except DogsUnavailable as e:
+        print(f'Error getting user interactions: {str(e)}')
+        return create_response(503, {'error': 'Dogs are temporarily unavailable, try again'},
+                               {'Retry-After': str(RETRY_AFTER_SECONDS)})
     except Exception as e:
         print(f'Error getting user interactions: {str(e)}')
         return create_response(500, {'error': 'Failed to retrieve interactions'})
 
+def attach_dogs(interactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Set ``dog`` on every interaction, None when the dog no longer exists
+
+    Distinct dogs are served from the warm-container cache when possible; the
+    rest are read with BatchGetItem (100 keys per request) and their names
+    decrypted together. Raises DogsUnavailable when some could not be read,
+    rather than passing them off as deleted.
+    """
+    keys = list(dict.fromkeys(
+        (interaction['shelter_id'], interaction['dog_id']) for interaction in interactions
+    ))
+    dogs_by_key: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    missing = []
+    for key in keys:
+        cached = dog_cache.get(key)
+        if cached is not None:
+            dogs_by_key[key] = dict(cached)
+        else:
+            missing.append(key)
+    
+    if missing:
+        items, unprocessed = dynamo_batch.batch_get(dynamodb, DOGS_TABLE_NAME, [
+            {'shelter_id': shelter_id, 'dog_id': dog_id} for shelter_id, dog_id in missing
+        ])
+        if unprocessed:
+            logger.warning("Dogs left unread after retries", extra={
+                "unprocessed": len(unprocessed)
+            })
+            raise DogsUnavailable(f'{len(unprocessed)} dogs left unread after retries')
+        decrypt_dog_names(items)
+        for item in items:
+            key = (item['shelter_id'], item['dog_id'])
+            dog_cache.put(key, dict(item), int(item.get('version', 0)))
+            dogs_by_key[key] = item
+    
+    logger.info("Interaction dogs expanded", extra={
+        "dogs": len(keys),
+        "cache_hits": len(keys) - len(missing),
+        "batch_reads": -(-len(missing) // dynamo_batch.MAX_BATCH_GET_KEYS)
+    })
+    for interaction in interactions:
+        interaction['dog'] = dogs_by_key.get((interaction['shelter_id'], interaction['dog_id']))
+    return interactions
+
 # Helper functions
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    """Case-insensitive request header lookup"""
+    name = name.lower()
+    for header, value in (event.get('headers') or {}).items():
+        if header.lower() == name:
+            return value
+    return None
+
+def index_dogs(items: List[Dict[str, Any]]) -> int:
+    """Add the description postings of stored dogs; returns how many failed
+
+    The dogs are already stored, so failures are logged rather than raised;
+    the ``backfill_search_index`` task writes any missing postings.
+    """
+    requests = [{'PutRequest': {'Item': posting}}
+                for item in items for posting in search.postings(item)]
+    unprocessed = dynamo_batch.batch_write(dynamodb, SEARCH_TABLE_NAME, requests)
+    if unprocessed:
+        logger.warning("Failed to index dog descriptions", extra={
+            "dogs": len(items),
+            "postings": len(unprocessed)
+        })
+    return len(unprocessed)
+
+def update_postings(old_item: Dict[str, Any], new_item: Optional[Dict[str, Any]]) -> int:
+    """Move a dog's postings to its new description, or drop them when it is deleted
+
+    Only terms that were added or removed are written. Returns how many
+    writes failed; like ``index_dogs``, failures are logged rather than raised.
+    """
+    old = {posting['term']: posting for posting in search.postings(old_item)}
+    new = {posting['term']: posting for posting in search.postings(new_item)} if new_item else {}
+    requests = [{'DeleteRequest': {'Key': {'term': term, 'dog_key': posting['dog_key']}}}
+                for term, posting in old.items() if term not in new]
+    requests += [{'PutRequest': {'Item': posting}}
+                 for term, posting in new.items() if term not in old]
+    unprocessed = dynamo_batch.batch_write(dynamodb, SEARCH_TABLE_NAME, requests)
+    if unprocessed:
+        logger.warning("Failed to reindex dog description", extra={
+            "shelter_id": old_item['shelter_id'],
+            "dog_id": old_item['dog_id'],
+            "postings": len(unprocessed)
+        })
+    return len(unprocessed)
+
+def cleanup_job_id(shelter_id: str, dog_id: str) -> str:
+    """Jobs table key of the tombstone tracking a deleted dog's cleanup"""
+    return f'dog-cleanup:{search.dog_key(shelter_id, dog_id)}'
+
 def generate_shelter_id(shelter: str, city: str, state: str) -> str:
     """Generate a consistent shelter ID"""
     return f"{state}#{city}#{shelter}".replace(' ', '_').upper()
 
+def use_envelope_encryption() -> bool:
+    """Return True if new dog names should be sealed with a cached data key"""
+    if NAME_ENCRYPTION_MODE != 'envelope':
+        return False
+    if not envelope.is_available():
+        logger.warning("Envelope encryption requested but cryptography is unavailable, using KMS")
+        return False
+    return True
+
 def encrypt_dog_name(name: str) -> str:
-    """Encrypt dog name using KMS"""
+    """Encrypt dog name using KMS or a cached envelope data key"""
     try:
+        if use_envelope_encryption():
+            return envelope.encrypt(data_key_cache, kms, KMS_KEY_ID, name)
         response = kms.encrypt(
             KeyId=KMS_KEY_ID,
             Plaintext=name.encode('utf-8')
@@ -340,8 +1656,10 @@ def encrypt_dog_name(name: str) -> str:
         raise
 
 def decrypt_dog_name(encrypted_name: str) -> str:
-    """Decrypt dog name using KMS"""
+    """Decrypt dog name from either an envelope token or a per-record KMS ciphertext"""
     try:
+        if envelope.is_envelope(encrypted_name):
+            return envelope.decrypt(data_key_cache, kms, encrypted_name)
         ciphertext_blob = base64.b64decode(encrypted_name.encode('utf-8'))
         response = kms.decrypt(CiphertextBlob=ciphertext_blob)
         return response['Plaintext'].decode('utf-8')
@@ -349,29 +1667,415 @@ def decrypt_dog_name(encrypted_name: str) -> str:
         print(f"Error decrypting dog name: {str(e)}")
         raise
 
+def get_kms_executor() -> ThreadPoolExecutor:
+    """Return the bounded thread pool shared by batch decryption"""
+    global _kms_executor
+    if _kms_executor is None:
+        _kms_executor = ThreadPoolExecutor(
+            max_workers=KMS_MAX_WORKERS,
+            thread_name_prefix='kms'
+        )
+    return _kms_executor
+
+def _decrypt_or_none(encrypted_name: str) -> Optional[str]:
+    try:
+        return decrypt_dog_name(encrypted_name)
+    except Exception:
+        return None
+
+def _encrypt_or_none(name: Any) -> Optional[str]:
+    try:
+        return encrypt_dog_name(str(name))
+    except Exception:
+        return None
+
+def encrypt_dog_names(names: List[Any]) -> List[Optional[str]]:
+    """Encrypt many dog names, None for any that failed
+
+    Envelope mode seals locally with the cached data key; per-record KMS mode
+    fans the calls out over the shared KMS thread pool.
+    """
+    if len(names) > 1 and not use_envelope_encryption():
+        return list(get_kms_executor().map(_encrypt_or_none, names))
+    return [_encrypt_or_none(name) for name in names]
+
+def decrypt_dog_names(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace encrypted_dog_name with dog_name on every item, in place
+
+    Identical ciphertexts are decrypted once, and distinct ones are decrypted
+    concurrently on a bounded pool that shares the module-level KMS client.
+    Items whose name cannot be decrypted get "Name unavailable".
+    """
+    ciphertexts = list(dict.fromkeys(
+        item['encrypted_dog_name'] for item in items if 'encrypted_dog_name' in item
+    ))
+    if len(ciphertexts) > 1:
+        plaintexts = get_kms_executor().map(_decrypt_or_none, ciphertexts)
+    else:
+        plaintexts = map(_decrypt_or_none, ciphertexts)
+    names = dict(zip(ciphertexts, plaintexts))
+
+    for item in items:
+        if 'encrypted_dog_name' in item:
+            name = names[item.pop('encrypted_dog_name')]
+            item['dog_name'] = name if name is not None else "Name unavailable"
+    return items
+
+def migrate_dog_name_encryption() -> Dict[str, int]:
+    """Re-wrap legacy per-record KMS ciphertexts as envelope tokens"""
+    if not envelope.is_available():
+        raise RuntimeError('cryptography is required to migrate dog names')
+
+    stats = {'scanned': 0, 'rewrapped': 0, 'skipped': 0, 'failed': 0}
+    scan_kwargs = {
+        'ProjectionExpression': 'shelter_id, dog_id, encrypted_dog_name'
+    }
+    while True:
+        response = dogs_table.scan(**scan_kwargs)
+        for item in response['Items']:
+            stats['scanned'] += 1
+            old_name = item.get('encrypted_dog_name')
+            if not old_name or envelope.is_envelope(old_name):
+                stats['skipped'] += 1
+                continue
+            try:
+                new_name = envelope.encrypt(
+                    data_key_cache, kms, KMS_KEY_ID, decrypt_dog_name(old_name)
+                )
+                # Only replace the value we read, so a concurrent edit always wins
+                dogs_table.update_item(
+                    Key={'shelter_id': item['shelter_id'], 'dog_id': item['dog_id']},
+                    UpdateExpression='SET encrypted_dog_name = :new',
+                    ConditionExpression='encrypted_dog_name = :old',
+                    ExpressionAttributeValues={':new': new_name, ':old': old_name}
+                )
+                stats['rewrapped'] += 1
+            except Exception as e:
+                logger.warning("Failed to re-wrap dog name", extra={
+                    "shelter_id": item['shelter_id'],
+                    "dog_id": item['dog_id'],
+                    "error": str(e)
+                })
+                stats['failed'] += 1
+        if 'LastEvaluatedKey' not in response:
+            return stats
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def normalize_dog_dates() -> Dict[str, int]:
+    """Backfill ISO dates and the birth_date key on existing dogs"""
+    stats = {'scanned': 0, 'updated': 0, 'skipped': 0, 'unparseable': 0, 'failed': 0}
+    scan_kwargs = {
+        'ProjectionExpression': 'shelter_id, dog_id, dog_birthday, shelter_entry_date, birth_date'
+    }
+    while True:
+        response = dogs_table.scan(**scan_kwargs)
+        for item in response['Items']:
+            stats['scanned'] += 1
+            updates = {}
+            for field in ('dog_birthday', 'shelter_entry_date'):
+                if field not in item:
+                    continue
+                normalized = dates.normalize_date(item[field])
+                if normalized is None:
+                    stats['unparseable'] += 1
+                elif normalized != item[field]:
+                    updates[field] = normalized
+            birth_date = dates.normalize_date(item.get('dog_birthday'))
+            if birth_date and item.get('birth_date') != birth_date:
+                updates['birth_date'] = birth_date
+            if not updates:
+                stats['skipped'] += 1
+                continue
+            
+            names = {f'#{field}': field for field in updates}
+            values = {f':{field}': value for field, value in updates.items()}
+            assignments = ', '.join(f'#{field} = :{field}' for field in updates)
+            # Only rewrite the values we read, so a concurrent edit always wins
+            checks = []
+            for field in ('dog_birthday', 'shelter_entry_date'):
+                if field in item:
+                    names[f'#{field}'] = field
+                    values[f':old_{field}'] = item[field]
+                    checks.append(f'#{field} = :old_{field}')
+            try:
+                dogs_table.update_item(
+                    Key={'shelter_id': item['shelter_id'], 'dog_id': item['dog_id']},
+                    UpdateExpression=f'SET {assignments}, version = if_not_exists(version, :zero) + :one',
+                    ConditionExpression=' AND '.join(checks),
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues={**values, ':zero': 0, ':one': 1}
+                )
+                stats['updated'] += 1
+            except Exception as e:
+                logger.warning("Failed to normalize dog dates", extra={
+                    "shelter_id": item['shelter_id'],
+                    "dog_id": item['dog_id'],
+                    "error": str(e)
+                })
+                stats['failed'] += 1
+        if 'LastEvaluatedKey' not in response:
+            return stats
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def backfill_color_keys() -> Dict[str, int]:
+    """Add the StateColorWeightIndex partition key to existing dogs"""
+    stats = {'scanned': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+    scan_kwargs = {
+        'ProjectionExpression': 'shelter_id, dog_id, #state, dog_color, state_color',
+        'ExpressionAttributeNames': {'#state': 'state'}
+    }
+    while True:
+        response = dogs_table.scan(**scan_kwargs)
+        for item in response['Items']:
+            stats['scanned'] += 1
+            family = color_family(item.get('dog_color', ''))
+            if not family or 'state' not in item or item.get('state_color') == f"{item['state']}#{family}":
+                stats['skipped'] += 1
+                continue
+            try:
+                # Only index the colour we read, so a concurrent edit always wins
+                dogs_table.update_item(
+                    Key={'shelter_id': item['shelter_id'], 'dog_id': item['dog_id']},
+                    UpdateExpression='SET state_color = :state_color, '
+                                     'version = if_not_exists(version, :zero) + :one',
+                    ConditionExpression='dog_color = :dog_color AND #state = :state',
+                    ExpressionAttributeNames={'#state': 'state'},
+                    ExpressionAttributeValues={
+                        ':state_color': f"{item['state']}#{family}",
+                        ':dog_color': item['dog_color'],
+                        ':state': item['state'],
+                        ':zero': 0,
+                        ':one': 1
+                    }
+                )
+                stats['updated'] += 1
+            except Exception as e:
+                logger.warning("Failed to index dog color", extra={
+                    "shelter_id": item['shelter_id'],
+                    "dog_id": item['dog_id'],
+                    "error": str(e)
+                })
+                stats['failed'] += 1
+        if 'LastEvaluatedKey' not in response:
+            return stats
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def backfill_search_index() -> Dict[str, int]:
+    """Write the description postings of every dog
+
+    Postings are keyed by term and dog, so rerunning the task rewrites the
+    same items.
+    """
+    stats = {'scanned': 0, 'postings': 0, 'failed': 0}
+    items = parallel_scan.parallel_scan(dogs_table.scan, {
+        'ProjectionExpression': 'shelter_id, dog_id, #description',
+        'ExpressionAttributeNames': {'#description': 'description'}
+    }, SCAN_SEGMENTS, DOG_KEY_ATTRIBUTES)
+    stats['scanned'] = len(items)
+    stats['postings'] = sum(len(search.postings(item)) for item in items)
+    stats['failed'] = index_dogs(items)
+    return stats
+
+def backfill_popularity() -> Dict[str, int]:
+    """Count existing interactions into the counters of dogs that have none
+
+    Dogs the interactions stream has already counted are skipped, so run this
+    right after the aggregator is deployed.
+    """
+    stats = {'scanned': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+    scan_kwargs = {'ProjectionExpression': 'shelter_id, dog_id, popularity'}
+    while True:
+        response = dogs_table.scan(**scan_kwargs)
+        for item in response['Items']:
+            stats['scanned'] += 1
+            if 'popularity' in item:
+                stats['skipped'] += 1
+                continue
+            try:
+                dog_key = f"{item['shelter_id']}#{item['dog_id']}"
+                counts = {
+                    interaction_type: count_interactions(dog_key, interaction_type)
+                    for interaction_type in ('wag', 'growl')
+                }
+                dogs_table.update_item(
+                    Key={'shelter_id': item['shelter_id'], 'dog_id': item['dog_id']},
+                    UpdateExpression='SET wag_count = :wags, growl_count = :growls, '
+                                     'popularity = :popularity, '
+                                     'version = if_not_exists(version, :zero) + :one',
+                    ConditionExpression='attribute_exists(dog_id) AND attribute_not_exists(popularity)',
+                    ExpressionAttributeValues={
+                        ':wags': counts['wag'],
+                        ':growls': counts['growl'],
+                        ':popularity': counts['wag'] - counts['growl'],
+                        ':zero': 0,
+                        ':one': 1
+                    }
+                )
+                stats['updated'] += 1
+            except Exception as e:
+                logger.warning("Failed to backfill dog popularity", extra={
+                    "shelter_id": item['shelter_id'],
+                    "dog_id": item['dog_id'],
+                    "error": str(e)
+                })
+                stats['failed'] += 1
+        if 'LastEvaluatedKey' not in response:
+            return stats
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def count_interactions(dog_key: str, interaction_type: str) -> int:
+    """Count a dog's interactions of one type through DogInteractionsIndex"""
+    query_kwargs = {
+        'IndexName': 'DogInteractionsIndex',
+        'KeyConditionExpression': 'dog_key = :dog_key AND interaction_type = :interaction_type',
+        'ExpressionAttributeValues': {':dog_key': dog_key, ':interaction_type': interaction_type},
+        'Select': 'COUNT'
+    }
+    count = 0
+    while True:
+        response = interactions_table.query(**query_kwargs)
+        count += response['Count']
+        if 'LastEvaluatedKey' not in response:
+            return count
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def classify_dog_species() -> Dict[str, int]:
+    """Canonicalize species on existing dogs and quarantine the non-Labradors"""
+    stats = {'scanned': 0, 'canonicalized': 0, 'quarantined': 0, 'skipped': 0, 'failed': 0}
+    scan_kwargs: Dict[str, Any] = {}
+    while True:
+        response = dogs_table.scan(**scan_kwargs)
+        for item in response['Items']:
+            stats['scanned'] += 1
+            raw = item.get('species_raw', item.get('species', ''))
+            key = {'shelter_id': item['shelter_id'], 'dog_id': item['dog_id']}
+            try:
+                if species.is_labrador(raw):
+                    if item.get('species') == species.LABRADOR_SPECIES and 'species_raw' in item:
+                        stats['skipped'] += 1
+                        continue
+                    # Only rewrite the species we read, so a concurrent edit always wins
+                    dogs_table.update_item(
+                        Key=key,
+                        UpdateExpression='SET species = :canonical, species_raw = :raw, '
+                                         'version = if_not_exists(version, :zero) + :one',
+                        ConditionExpression='species = :species',
+                        ExpressionAttributeValues={
+                            ':canonical': species.LABRADOR_SPECIES,
+                            ':raw': raw,
+                            ':species': item.get('species'),
+                            ':zero': 0,
+                            ':one': 1
+                        }
+                    )
+                    stats['canonicalized'] += 1
+                    continue
+
+                # Move the dog to quarantine and delete it in one transaction;
+                # the ddb wrapper serializes plain Python values for the low-level client
+                breed_code, matched_by = species.classify(raw)
+                quarantined = {
+                    'quarantine_id': f"{item['shelter_id']}#{item['dog_id']}",
+                    'source': 'classify_dog_species',
+                    'reason': NOT_LABRADOR_ERROR,
+                    'species_raw': raw,
+                    'breed_code': breed_code,
+                    'matched_by': matched_by,
+                    'record': json.dumps(item, default=str),
+                    'received_at': datetime.now(timezone.utc).isoformat(),
+                    'expires_at': int(datetime.now(timezone.utc).timestamp())
+                                  + QUARANTINE_RETENTION_DAYS * 86400
+                }
+                delete = {
+                    'TableName': DOGS_TABLE_NAME,
+                    'Key': key,
+                    'ConditionExpression': 'attribute_not_exists(species)'
+                }
+                if 'species' in item:
+                    delete['ConditionExpression'] = 'species = :species'
+                    delete['ExpressionAttributeValues'] = {':species': item['species']}
+                dynamodb.transact_write_items(TransactItems=[
+                    {'Put': {
+                        'TableName': QUARANTINE_TABLE_NAME,
+                        'Item': quarantined
+                    }},
+                    {'Delete': delete}
+                ])
+                stats['quarantined'] += 1
+            except Exception as e:
+                logger.warning("Failed to classify dog species", extra={
+                    "shelter_id": item['shelter_id'],
+                    "dog_id": item['dog_id'],
+                    "error": str(e)
+                })
+                stats['failed'] += 1
+        if 'LastEvaluatedKey' not in response:
+            return stats
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
 def parse_weight(weight_str) -> Optional[float]:
-    """Parse weight from various string formats"""
-    if isinstance(weight_str, (int, float)):
-        return float(weight_str)
-    
-    if isinstance(weight_str, str):
-        # Remove common words and extract numbers
-        import re
-        numbers = re.findall(r'\d+\.?\d*', weight_str.lower())
-        if numbers:
-            return float(numbers[0])
-    
-    return None
+    """Parse weight in pounds from various string formats"""
+    return weights.parse_weight(weight_str)
 
-def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
-    """Create standardized API response"""
+def create_response(status_code: int, body: Optional[Dict[str, Any]],
+                    headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Create standardized API response; a None body is sent empty (e.g. 304)"""
     return {
         'statusCode': status_code,
         'headers': {
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,'
+                                            'Idempotency-Key,If-None-Match',
+            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS',
+            'Access-Control-Expose-Headers': 'ETag',
+            **(headers or {})
         },
-        'body': json.dumps(body, default=str)
+        # Decimal attributes become JSON numbers
+        'body': api_responses.dumps(body) if body is not None else ''
     }
+
+MAINTENANCE_TASKS = {
+    'migrate_dog_name_encryption': migrate_dog_name_encryption,
+    'normalize_dog_dates': normalize_dog_dates,
+    'backfill_color_keys': backfill_color_keys,
+    'classify_dog_species': classify_dog_species,
+    'backfill_popularity': backfill_popularity,
+    'backfill_search_index': backfill_search_index
+}
+
+ROUTES = {
+    ('GET', '/dogs'): router.Route(
+        lambda request: get_dogs(request.query_parameters, request.header('If-None-Match'))
+    ),
+    ('POST', '/dogs'): router.Route(lambda request: create_dog(request.json), json_body=True),
+    # Batch uploads may be NDJSON, so they parse their own body
+    ('POST', '/dogs/batch'): router.Route(lambda request: create_dogs_batch(request.body)),
+    ('GET', '/dogs/{dog_id}'): router.Route(
+        lambda request: get_dog(request.path_parameters['dog_id'], request.query_parameters,
+                                request.header('If-None-Match')),
+        query_parameters=('shelter_id',)
+    ),
+    ('PUT', '/dogs/{dog_id}'): router.Route(
+        lambda request: update_dog(request.path_parameters['dog_id'], request.query_parameters,
+                                   request.json),
+        query_parameters=('shelter_id',), json_body=True
+    ),
+    ('DELETE', '/dogs/{dog_id}'): router.Route(
+        lambda request: delete_dog(request.path_parameters['dog_id'], request.query_parameters),
+        query_parameters=('shelter_id',)
+    ),
+    ('POST', '/interactions'): router.Route(
+        lambda request: create_interaction(request.json, request.header('Idempotency-Key')),
+        json_body=True
+    ),
+    ('GET', '/interactions'): router.Route(
+        lambda request: get_user_interactions(request.query_parameters),
+        query_parameters=('user_id',)
+    ),
+    ('GET', '/imports/{job_id}'): router.Route(
+        lambda request: get_import_job(request.path_parameters['job_id'])
+    )
+}
+
+ROUTER = router.Router(ROUTES)
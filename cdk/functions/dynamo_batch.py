@@ -0,0 +1,120 @@
+"""
+Chunked DynamoDB batch reads and writes with retry and exponential backoff.
+
+BatchWriteItem accepts at most 25 requests and BatchGetItem at most 100 keys,
+and both may hand some of them back (UnprocessedItems/UnprocessedKeys) when a
+partition is throttled, or fail as a whole with a throttling or server error.
+Both are retried with exponentially growing, jittered delays; whatever is
+still unprocessed after the last attempt is returned to the caller so it can
+report per-record status.
+"""
+import logging
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+MAX_BATCH_WRITE_ITEMS = 25
+MAX_BATCH_GET_KEYS = 100
+# Errors failing a whole batch call that are worth retrying, besides any 5xx
+RETRYABLE_ERROR_CODES = frozenset((
+    'ProvisionedThroughputExceededException', 'ThrottlingException',
+    'RequestLimitExceeded', 'InternalServerError', 'ServiceUnavailable'
+))
+
+
+def chunked(values: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    """Yield consecutive slices of at most ``size`` values"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff for the given retry attempt"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def is_retryable(error: ClientError) -> bool:
+    """Whether a failed batch call may succeed if repeated"""
+    if error.response.get('Error', {}).get('Code') in RETRYABLE_ERROR_CODES:
+        return True
+    return error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500
+
+
+def batch_write(dynamodb: Any, table_name: str, requests: Sequence[Dict[str, Any]],
+                max_attempts: int = 5, base_delay: float = 0.05,
+                max_delay: float = 2.0) -> List[Dict[str, Any]]:
+    """Write PutRequest/DeleteRequest entries in chunks of 25
+
+    ``dynamodb`` is a DynamoDB service resource, ``ddb.DynamoDB`` or boto3's.
+    Returns the requests that could not be written after ``max_attempts``
+    attempts.
+    """
+    failed: List[Dict[str, Any]] = []
+    for chunk in chunked(list(requests), MAX_BATCH_WRITE_ITEMS):
+        pending = list(chunk)
+        for attempt in range(max_attempts):
+            try:
+                response = dynamodb.batch_write_item(RequestItems={table_name: pending})
+            except ClientError as e:
+                logger.warning("Batch write failed", extra={
+                    "table": table_name,
+                    "requests": len(pending),
+                    "attempt": attempt + 1,
+                    "error": str(e)
+                })
+                if not is_retryable(e):
+                    break
+            else:
+                pending = response.get('UnprocessedItems', {}).get(table_name, [])
+            if not pending:
+                break
+            if attempt < max_attempts - 1:
+                time.sleep(backoff_delay(attempt, base_delay, max_delay))
+        failed.extend(pending)
+    return failed
+
+
+def batch_get(dynamodb: Any, table_name: str, keys: Sequence[Dict[str, Any]],
+              max_attempts: int = 5, base_delay: float = 0.05,
+              max_delay: float = 2.0,
+              projection: Optional[Dict[str, Any]] = None
+              ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Read items by key in chunks of 100
+
+    ``dynamodb`` is a DynamoDB service resource, ``ddb.DynamoDB`` or boto3's,
+    and ``keys`` must be distinct. ``projection`` holds the ProjectionExpression and
+    ExpressionAttributeNames to read only some attributes. Returns the items
+    found, in no particular order, and the keys that could not be read after
+    ``max_attempts`` attempts.
+    """
+    items: List[Dict[str, Any]] = []
+    failed: List[Dict[str, Any]] = []
+    for chunk in chunked(list(keys), MAX_BATCH_GET_KEYS):
+        pending = list(chunk)
+        for attempt in range(max_attempts):
+            try:
+                response = dynamodb.batch_get_item(
+                    RequestItems={table_name: {**(projection or {}), 'Keys': pending}}
+                )
+            except ClientError as e:
+                logger.warning("Batch get failed", extra={
+                    "table": table_name,
+                    "keys": len(pending),
+                    "attempt": attempt + 1,
+                    "error": str(e)
+                })
+                if not is_retryable(e):
+                    break
+            else:
+                items.extend(response.get('Responses', {}).get(table_name, []))
+                pending = response.get('UnprocessedKeys', {}).get(table_name, {}).get('Keys', [])
+            if not pending:
+                break
+            if attempt < max_attempts - 1:
+                time.sleep(backoff_delay(attempt, base_delay, max_delay))
+        failed.extend(pending)
+    return items, failed
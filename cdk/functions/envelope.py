@@ -0,0 +1,137 @@
+"""
+Envelope encryption for dog names.
+
+A data key is generated through KMS once and cached in the warm Lambda
+container for a bounded lifetime and number of uses. Names are sealed locally
+with AES-GCM, and the KMS-wrapped data key travels with every ciphertext so
+that any container can unwrap it (and cache the unwrapped key) on read.
+
+Token format: ``env1:<base64 wrapped data key>:<base64 nonce + ciphertext>``.
+Legacy per-record KMS ciphertexts are plain base64, which never contains a
+colon, so the two formats cannot be confused.
+"""
+import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # pragma: no cover - depends on the deployment package
+    AESGCM = None
+
+ENVELOPE_PREFIX = 'env1:'
+NONCE_SIZE = 12
+ENCRYPTION_CONTEXT = {'purpose': 'pupper-dog-name'}
+ASSOCIATED_DATA = b'pupper-dog-name'
+
+
+def is_available() -> bool:
+    """Return True when the AES-GCM primitive is importable"""
+    return AESGCM is not None
+
+
+def is_envelope(ciphertext: str) -> bool:
+    """Return True if the ciphertext was produced by :func:`encrypt`"""
+    return ciphertext.startswith(ENVELOPE_PREFIX)
+
+
+class DataKeyCache:
+    """Caches one active encryption data key plus recently unwrapped keys.
+
+    The active key is replaced once it is older than ``max_age_seconds`` or has
+    sealed ``max_uses`` values. Unwrapped keys used for decryption are kept in
+    a small LRU keyed by the wrapped blob and expire after the same lifetime.
+    """
+
+    def __init__(self, max_age_seconds: float = 300, max_uses: int = 1000,
+                 max_unwrapped: int = 32):
+        self.max_age_seconds = max_age_seconds
+        self.max_uses = max_uses
+        self.max_unwrapped = max_unwrapped
+        self._lock = threading.Lock()
+        self._active: Optional[Tuple[bytes, bytes, float]] = None
+        self._active_uses = 0
+        self._unwrapped: 'OrderedDict[bytes, Tuple[bytes, float]]' = OrderedDict()
+
+    def clear(self) -> None:
+        """Drop every cached key"""
+        with self._lock:
+            self._active = None
+            self._active_uses = 0
+            self._unwrapped.clear()
+
+    def encryption_key(self, kms_client: Any, key_id: str) -> Tuple[bytes, bytes]:
+        """Return ``(plaintext_key, wrapped_key)`` for sealing one value"""
+        now = time.monotonic()
+        with self._lock:
+            if (self._active is None
+                    or now - self._active[2] >= self.max_age_seconds
+                    or self._active_uses >= self.max_uses):
+                response = kms_client.generate_data_key(
+                    KeyId=key_id,
+                    KeySpec='AES_256',
+                    EncryptionContext=ENCRYPTION_CONTEXT
+                )
+                self._active = (response['Plaintext'], response['CiphertextBlob'], now)
+                self._active_uses = 0
+                self._remember(response['CiphertextBlob'], response['Plaintext'], now)
+            self._active_uses += 1
+            return self._active[0], self._active[1]
+
+    def decryption_key(self, kms_client: Any, wrapped_key: bytes) -> bytes:
+        """Return the plaintext data key for ``wrapped_key``, unwrapping via KMS once"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._unwrapped.get(wrapped_key)
+            if cached and now - cached[1] < self.max_age_seconds:
+                self._unwrapped.move_to_end(wrapped_key)
+                return cached[0]
+
+        # Unwrap outside the lock so concurrent readers of other keys don't wait
+        response = kms_client.decrypt(
+            CiphertextBlob=wrapped_key,
+            EncryptionContext=ENCRYPTION_CONTEXT
+        )
+        with self._lock:
+            self._remember(wrapped_key, response['Plaintext'], now)
+        return response['Plaintext']
+
+    def _remember(self, wrapped_key: bytes, plaintext_key: bytes, now: float) -> None:
+        self._unwrapped[wrapped_key] = (plaintext_key, now)
+        self._unwrapped.move_to_end(wrapped_key)
+        while len(self._unwrapped) > self.max_unwrapped:
+            self._unwrapped.popitem(last=False)
+
+
+def cache_from_environment() -> DataKeyCache:
+    """Build a DataKeyCache using the DATA_KEY_* environment overrides"""
+    return DataKeyCache(
+        max_age_seconds=float(os.environ.get('DATA_KEY_MAX_AGE_SECONDS', '300')),
+        max_uses=int(os.environ.get('DATA_KEY_MAX_USES', '1000'))
+    )
+
+
+def encrypt(cache: DataKeyCache, kms_client: Any, key_id: str, plaintext: str) -> str:
+    """Seal ``plaintext`` with the cached data key"""
+    if AESGCM is None:
+        raise RuntimeError('cryptography is required for envelope encryption')
+    data_key, wrapped_key = cache.encryption_key(kms_client, key_id)
+    nonce = os.urandom(NONCE_SIZE)
+    sealed = AESGCM(data_key).encrypt(nonce, plaintext.encode('utf-8'), ASSOCIATED_DATA)
+    wrapped_b64 = base64.b64encode(wrapped_key).decode('utf-8')
+    payload_b64 = base64.b64encode(nonce + sealed).decode('utf-8')
+    return f'{ENVELOPE_PREFIX}{wrapped_b64}:{payload_b64}'
+
+
+def decrypt(cache: DataKeyCache, kms_client: Any, token: str) -> str:
+    """Open an envelope token produced by :func:`encrypt`"""
+    if AESGCM is None:
+        raise RuntimeError('cryptography is required for envelope encryption')
+    wrapped_b64, payload_b64 = token[len(ENVELOPE_PREFIX):].split(':', 1)
+    data_key = cache.decryption_key(kms_client, base64.b64decode(wrapped_b64))
+    payload = base64.b64decode(payload_b64)
+    nonce, sealed = payload[:NONCE_SIZE], payload[NONCE_SIZE:]
+    return AESGCM(data_key).decrypt(nonce, sealed, ASSOCIATED_DATA).decode('utf-8')
@@ -0,0 +1,403 @@
+"""
+Asynchronous bulk import of shelter data dumps.
+
+1. A CSV or NDJSON file uploaded to ``imports/<job_id>.csv|.ndjson`` in the
+   import bucket triggers ``split_handler``, which streams the object, cuts it
+   into chunks and enqueues one SQS message per chunk. Job ids are single
+   use: a later upload under the same key is not imported, only recorded on
+   the existing job.
+2. ``worker_handler`` consumes the queue, validates and normalizes each record
+   with the same rules as ``POST /dogs`` and writes the chunk with batched
+   writes.
+3. Progress is kept in a job record in the jobs table, polled through
+   ``GET /imports/{job_id}``; completion is announced on the import topic.
+"""
+import codecs
+import csv
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote_plus
+
+from botocore.exceptions import ClientError
+
+import client_config
+import clients
+import dogs
+import dynamo_batch
+import weights
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3 = clients.LazyClient('s3')
+sqs = clients.LazyClient('sqs')
+sns = clients.LazyClient('sns')
+
+IMPORT_QUEUE_URL = os.environ.get('IMPORT_QUEUE_URL')
+IMPORT_TOPIC_ARN = os.environ.get('IMPORT_TOPIC_ARN')
+# Most records per SQS message
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '100'))
+# SQS rejects a message, and a batch of messages, over 256 KB; chunks and
+# batches are cut below this size whatever their record count
+MAX_MESSAGE_BYTES = 240 * 1024
+IMPORT_PREFIX = 'imports/'
+
+# Namespace for deterministic dog ids, so a redelivered chunk overwrites
+# the dogs it already wrote instead of duplicating them
+IMPORT_NAMESPACE = uuid.UUID('6f1d7c2e-8a4b-4f55-9c1e-2b7d3e9a0c41')
+
+jobs_table = dogs.jobs_table
+
+
+def job_id_for_key(key: str) -> Optional[str]:
+    """Return the job id for ``imports/<job_id>.<ext>`` object keys"""
+    if not key.startswith(IMPORT_PREFIX):
+        return None
+    name = key[len(IMPORT_PREFIX):]
+    job_id, _, extension = name.rpartition('.')
+    if not job_id or '/' in job_id or extension.lower() not in ('csv', 'ndjson', 'jsonl'):
+        return None
+    return job_id
+
+
+def iter_records(lines: Iterator[str], is_csv: bool) -> Iterator[Tuple[Optional[Dict[str, Any]], str]]:
+    """Yield ``(record, raw_line)``; record is None for lines that cannot be parsed"""
+    if is_csv:
+        for row in csv.DictReader(lines):
+            # Empty cells are treated as missing fields
+            yield {field: value for field, value in row.items()
+                   if field and value not in (None, '')}, ''
+        return
+
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            yield None, line
+            continue
+        yield record, line
+
+
+def split_handler(event, context):
+    """
+    S3-triggered Lambda that splits an uploaded data dump into SQS chunks
+    """
+    client_config.start_invocation(context)
+    for s3_record in event['Records']:
+        bucket = s3_record['s3']['bucket']['name']
+        key = unquote_plus(s3_record['s3']['object']['key'])
+        job_id = job_id_for_key(key)
+        if not job_id:
+            logger.warning("Ignoring object outside the import naming scheme", extra={
+                "bucket": bucket,
+                "key": key
+            })
+            continue
+        try:
+            split_object(bucket, key, job_id, s3_record['s3']['object'].get('sequencer'))
+        except Exception as e:
+            # The job is marked failed; other objects in the event still split
+            logger.error("Import split failed", extra={
+                "job_id": job_id,
+                "key": key,
+                "error": str(e)
+            })
+
+
+def split_object(bucket: str, key: str, job_id: str,
+                 sequencer: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Stream one object into chunk messages and record the job
+
+    Job ids are single use. Returns None without splitting when the job
+    already exists, so a redelivered S3 event cannot reset the counters of a
+    running import; a new upload under the same key (another S3
+    ``sequencer``) is recorded on the job as ``rejected_upload``. A split
+    that fails part way marks the job failed and re-raises.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    job = {
+        'job_id': job_id,
+        'job_type': 'import',
+        'status': 'splitting',
+        'source': f's3://{bucket}/{key}',
+        'total_records': 0,
+        'processed_chunks': 0,
+        'created': 0,
+        'rejected': 0,
+        'failed': 0,
+        'created_at': now,
+        'updated_at': now
+    }
+    if sequencer:
+        job['upload_sequencer'] = sequencer
+    try:
+        jobs_table.put_item(Item=job, ConditionExpression='attribute_not_exists(job_id)')
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        logger.warning("Import job already exists", extra={"job_id": job_id, "key": key})
+        if sequencer:
+            record_rejected_upload(job_id, sequencer, now)
+        return None
+
+    try:
+        return split_chunks(bucket, key, job_id)
+    except Exception as e:
+        jobs_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET #status = :failed, #error = :error, updated_at = :now',
+            ExpressionAttributeNames={'#status': 'status', '#error': 'error'},
+            ExpressionAttributeValues={
+                ':failed': 'failed',
+                ':error': str(e),
+                ':now': datetime.now(timezone.utc).isoformat()
+            }
+        )
+        raise
+
+
+def record_rejected_upload(job_id: str, sequencer: str, now: str) -> None:
+    """Note a new upload over an existing job's key; redeliveries of the job's own upload are skipped"""
+    try:
+        jobs_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET rejected_upload = :upload',
+            ConditionExpression='(attribute_not_exists(upload_sequencer) OR upload_sequencer <> :sequencer) '
+                                'AND (attribute_not_exists(rejected_upload) OR rejected_upload.sequencer <> :sequencer)',
+            ExpressionAttributeValues={
+                ':upload': {'sequencer': sequencer, 'received_at': now},
+                ':sequencer': sequencer
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return
+    logger.warning("Rejected upload over an existing import job", extra={
+        "job_id": job_id,
+        "sequencer": sequencer
+    })
+
+
+def split_chunks(bucket: str, key: str, job_id: str) -> Dict[str, Any]:
+    """Enqueue the chunks of a new job's object and move the job to processing"""
+    body = s3.get_object(Bucket=bucket, Key=key)['Body']
+    lines = codecs.iterdecode(body.iter_lines(keepends=True), 'utf-8-sig')
+
+    total_records = 0
+    malformed = 0
+    oversized = 0
+    # Room for records once the message envelope is accounted for
+    record_bytes_limit = MAX_MESSAGE_BYTES - message_bytes(chunk_message(job_id, 0, []))
+    chunk: List[Dict[str, Any]] = []
+    chunk_bytes = 0
+    messages: List[Dict[str, str]] = []
+    total_chunks = 0
+    for record, _ in iter_records(lines, key.lower().endswith('.csv')):
+        if record is None:
+            malformed += 1
+            continue
+        # Each record after the first also costs a ', ' separator
+        record_bytes = len(json.dumps(record).encode('utf-8')) + 2
+        if record_bytes > record_bytes_limit:
+            # Too big for any message; rejected like a malformed line
+            oversized += 1
+            continue
+        total_records += 1
+        if chunk and (len(chunk) == IMPORT_CHUNK_SIZE or chunk_bytes + record_bytes > record_bytes_limit):
+            messages = queue_message(messages, chunk_message(job_id, total_chunks, chunk))
+            total_chunks += 1
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(record)
+        chunk_bytes += record_bytes
+    if chunk:
+        messages = queue_message(messages, chunk_message(job_id, total_chunks, chunk))
+        total_chunks += 1
+    send_messages(messages)
+
+    job = jobs_table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET #status = :processing, total_chunks = :chunks, '
+                         'total_records = :records, updated_at = :now ADD rejected :malformed',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={
+            ':processing': 'processing',
+            ':chunks': total_chunks,
+            ':records': total_records + malformed + oversized,
+            ':malformed': malformed + oversized,
+            ':now': datetime.now(timezone.utc).isoformat()
+        },
+        ReturnValues='ALL_NEW'
+    )['Attributes']
+
+    logger.info("Import split", extra={
+        "job_id": job_id,
+        "chunks": total_chunks,
+        "records": total_records,
+        "malformed": malformed,
+        "oversized": oversized
+    })
+    # Workers may already have finished every chunk
+    complete_job_if_done(job)
+    return job
+
+
+def chunk_message(job_id: str, chunk_index: int, records: List[Dict[str, Any]]) -> Dict[str, str]:
+    return {
+        'Id': str(chunk_index),
+        'MessageBody': json.dumps({'job_id': job_id, 'chunk': chunk_index, 'records': records})
+    }
+
+
+def message_bytes(message: Dict[str, str]) -> int:
+    return len(message['MessageBody'].encode('utf-8'))
+
+
+def queue_message(messages: List[Dict[str, str]], message: Dict[str, str]) -> List[Dict[str, str]]:
+    """Add a chunk message to the pending batch, sending the batch first when it is full"""
+    if len(messages) == 10 or sum(map(message_bytes, messages)) + message_bytes(message) > MAX_MESSAGE_BYTES:
+        send_messages(messages)
+        messages = []
+    messages.append(message)
+    return messages
+
+
+def send_messages(messages: List[Dict[str, str]]) -> None:
+    """Send up to 10 chunk messages, failing loudly on anything not accepted"""
+    if not messages:
+        return
+    response = sqs.send_message_batch(QueueUrl=IMPORT_QUEUE_URL, Entries=messages)
+    if response.get('Failed'):
+        raise RuntimeError(f"Failed to enqueue {len(response['Failed'])} import chunks")
+
+
+def worker_handler(event, context):
+    """
+    SQS-triggered Lambda that validates, normalizes and writes import chunks
+    """
+    client_config.start_invocation(context)
+    failures = []
+    for message in event['Records']:
+        try:
+            process_chunk(json.loads(message['body']))
+        except Exception as e:
+            logger.error("Import chunk failed", extra={
+                "message_id": message['messageId'],
+                "error": str(e)
+            })
+            failures.append({'itemIdentifier': message['messageId']})
+    return {'batchItemFailures': failures}
+
+
+def process_chunk(message: Dict[str, Any]) -> Dict[str, int]:
+    """Write one chunk of records and fold its outcome into the job record"""
+    job_id = message['job_id']
+    chunk_index = message['chunk']
+    records = message['records']
+
+    counts = {'created': 0, 'rejected': 0, 'failed': 0}
+    accepted = []
+    not_labradors = []
+    for row, dog_data in enumerate(records):
+        error = dogs.validate_dog_data(dog_data)
+        if error:
+            counts['rejected'] += 1
+            if error == dogs.NOT_LABRADOR_ERROR:
+                not_labradors.append((row, dog_data))
+        else:
+            accepted.append((row, dog_data))
+    if not_labradors:
+        dogs.quarantine_dogs(
+            [dog_data for _, dog_data in not_labradors], f'import:{job_id}',
+            [str(uuid.uuid5(IMPORT_NAMESPACE, f'{job_id}:{chunk_index}:{row}'))
+             for row, _ in not_labradors]
+        )
+
+    encrypted_names = dogs.encrypt_dog_names([dog_data['dog_name'] for _, dog_data in accepted])
+    parsed_weights = weights.parse_weights([dog_data.get('dog_weight') for _, dog_data in accepted])
+    items = []
+    for (row, dog_data), encrypted_name, weight in zip(accepted, encrypted_names, parsed_weights):
+        if encrypted_name is None:
+            counts['failed'] += 1
+            continue
+        dog_id = str(uuid.uuid5(IMPORT_NAMESPACE, f'{job_id}:{chunk_index}:{row}'))
+        items.append(dogs.build_dog_item(dog_data, encrypted_name, dog_id=dog_id, weight=weight))
+
+    unprocessed = dynamo_batch.batch_write(
+        dogs.dynamodb, dogs.DOGS_TABLE_NAME, [{'PutRequest': {'Item': item}} for item in items]
+    )
+    counts['failed'] += len(unprocessed)
+    counts['created'] += len(items) - len(unprocessed)
+    failed_keys = {(request['PutRequest']['Item']['shelter_id'], request['PutRequest']['Item']['dog_id'])
+                   for request in unprocessed}
+    dogs.index_dogs([item for item in items if (item['shelter_id'], item['dog_id']) not in failed_keys])
+
+    try:
+        # The chunk set makes the counters idempotent under SQS redelivery
+        job = jobs_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='ADD processed_chunks :one, created :created, rejected :rejected, '
+                             'failed :failed, processed_chunk_ids :chunk SET updated_at = :now',
+            ConditionExpression='attribute_exists(job_id) AND NOT contains(processed_chunk_ids, :index)',
+            ExpressionAttributeValues={
+                ':one': 1,
+                ':created': counts['created'],
+                ':rejected': counts['rejected'],
+                ':failed': counts['failed'],
+                ':chunk': {chunk_index},
+                ':index': chunk_index,
+                ':now': datetime.now(timezone.utc).isoformat()
+            },
+            ReturnValues='ALL_NEW'
+        )['Attributes']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        logger.info("Import chunk already counted", extra={"job_id": job_id, "chunk": chunk_index})
+        return counts
+
+    complete_job_if_done(job)
+    return counts
+
+
+def complete_job_if_done(job: Dict[str, Any]) -> bool:
+    """Mark the job completed once every chunk is processed; exactly one caller wins"""
+    if job.get('status') != 'processing' or job.get('processed_chunks') != job.get('total_chunks'):
+        return False
+    try:
+        jobs_table.update_item(
+            Key={'job_id': job['job_id']},
+            UpdateExpression='SET #status = :completed, completed_at = :now',
+            ConditionExpression='#status = :processing AND processed_chunks = total_chunks',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':completed': 'completed',
+                ':processing': 'processing',
+                ':now': datetime.now(timezone.utc).isoformat()
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+    summary = {
+        'job_id': job['job_id'],
+        'status': 'completed',
+        'total_records': int(job.get('total_records', 0)),
+        'created': int(job.get('created', 0)),
+        'rejected': int(job.get('rejected', 0)),
+        'failed': int(job.get('failed', 0))
+    }
+    logger.info("Import completed", extra={"summary": summary})
+    if IMPORT_TOPIC_ARN:
+        sns.publish(TopicArn=IMPORT_TOPIC_ARN, Subject='Pupper import completed',
+                    Message=json.dumps(summary))
+    return True
@@ -0,0 +1,120 @@
+"""
+Paginated DynamoDB reads with opaque continuation tokens.
+
+A continuation token is DynamoDB's LastEvaluatedKey (or the key of the last
+item returned to the client) serialized as JSON, signed with HMAC-SHA256 and
+base64url-encoded. The token is bound to a scope string such as the index
+and partition being read, so it cannot be replayed against another listing.
+"""
+import base64
+import hashlib
+import hmac
+import json
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+SIGNATURE_SIZE = 16
+
+Key = Dict[str, Any]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _sign(payload: bytes, scope: str, signing_key: bytes) -> bytes:
+    message = scope.encode('utf-8') + b'\n' + payload
+    return hmac.new(signing_key, message, hashlib.sha256).digest()[:SIGNATURE_SIZE]
+
+
+def encode_token(key: Key, scope: str, signing_key: bytes) -> str:
+    """Serialize and sign a DynamoDB key as an opaque continuation token"""
+    typed = {
+        name: {'N': str(value)} if isinstance(value, Decimal) else {'S': value}
+        for name, value in key.items()
+    }
+    payload = json.dumps(typed, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return f'{_b64encode(payload)}.{_b64encode(_sign(payload, scope, signing_key))}'
+
+
+def decode_token(token: str, scope: str, signing_key: bytes) -> Key:
+    """Verify a continuation token and return the DynamoDB key it encodes
+
+    Raises ValueError if the token is malformed, was tampered with, or was
+    issued for a different scope.
+    """
+    try:
+        payload_b64, signature_b64 = token.split('.')
+        payload = _b64decode(payload_b64)
+        signature = _b64decode(signature_b64)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Malformed continuation token') from e
+
+    if not hmac.compare_digest(signature, _sign(payload, scope, signing_key)):
+        raise ValueError('Invalid continuation token signature')
+
+    typed = json.loads(payload)
+    return {
+        name: Decimal(value['N']) if 'N' in value else value['S']
+        for name, value in typed.items()
+    }
+
+
+def iter_items(read_page: Callable[..., Dict[str, Any]], request: Dict[str, Any],
+               key_attributes: Sequence[str], exclusive_start_key: Optional[Key] = None,
+               max_pages: Optional[int] = None) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[Key]]]:
+    """Yield ``(item, resume_key)`` for every item across successive pages
+
+    ``resume_key`` is the ExclusiveStartKey that continues right after the
+    item, or None when the read is exhausted. ``key_attributes`` must name the
+    table key plus, for index reads, the index key. Reading stops after
+    ``max_pages`` pages even if more remain; the final pair is then
+    ``(None, LastEvaluatedKey)`` so the caller can still resume.
+    """
+    request = dict(request)
+    if exclusive_start_key:
+        request['ExclusiveStartKey'] = exclusive_start_key
+
+    pages = 0
+    while True:
+        response = read_page(**request)
+        pages += 1
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        items = response['Items']
+        for position, item in enumerate(items):
+            if position < len(items) - 1 or last_evaluated_key:
+                resume_key = {name: item[name] for name in key_attributes if name in item}
+            else:
+                resume_key = None
+            yield item, resume_key
+
+        if not last_evaluated_key:
+            return
+        if max_pages is not None and pages >= max_pages:
+            # Hand the cursor back even if this page was filtered down to nothing
+            yield None, last_evaluated_key
+            return
+        request['ExclusiveStartKey'] = last_evaluated_key
+
+
+def collect(items: Iterator[Tuple[Optional[Dict[str, Any]], Optional[Key]]],
+            predicate: Callable[[Dict[str, Any]], bool],
+            limit: Optional[int]) -> Tuple[List[Dict[str, Any]], Optional[Key]]:
+    """Pull matching items until ``limit`` is filled or the reader runs out
+
+    Returns the matched items and the key to resume from, which is None once
+    nothing is left to read.
+    """
+    matched = []
+    resume_key = None
+    for item, resume_key in items:
+        if item is None or not predicate(item):
+            continue
+        matched.append(item)
+        if limit is not None and len(matched) >= limit:
+            break
+    return matched, resume_key
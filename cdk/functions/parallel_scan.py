@@ -0,0 +1,50 @@
+"""
+Parallel segmented scans.
+
+DynamoDB splits a scan into ``TotalSegments`` disjoint segments that can be
+read independently. Each segment is paged on its own worker thread and the
+segment streams are merged and sorted by key, so callers get the same order
+regardless of the segment count. Workers share the caller's DynamoDB client,
+which is thread-safe.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+def scan_segment(read_page: Callable[..., Dict[str, Any]], request: Dict[str, Any],
+                 segment: int, total_segments: int) -> List[Dict[str, Any]]:
+    """Read every page of one scan segment"""
+    request = dict(request, Segment=segment, TotalSegments=total_segments)
+    items = []
+    while True:
+        response = read_page(**request)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return items
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def parallel_scan(read_page: Callable[..., Dict[str, Any]], request: Dict[str, Any],
+                  total_segments: int, key_attributes: Sequence[str],
+                  max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Scan all segments concurrently and return the items ordered by key
+
+    ``read_page`` is a scan callable such as ``Table.scan``; ``request`` holds
+    any other scan arguments (FilterExpression, ProjectionExpression, ...).
+    """
+    if total_segments < 1:
+        raise ValueError('total_segments must be at least 1')
+
+    if total_segments == 1:
+        items = scan_segment(read_page, request, 0, 1)
+    else:
+        workers = min(max_workers or total_segments, total_segments)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan') as executor:
+            segments = executor.map(
+                lambda segment: scan_segment(read_page, request, segment, total_segments),
+                range(total_segments)
+            )
+            items = [item for segment_items in segments for item in segment_items]
+
+    items.sort(key=lambda item: tuple(str(item.get(name, '')) for name in key_attributes))
+    return items
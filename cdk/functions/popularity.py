@@ -0,0 +1,182 @@
+"""
+Per-dog wag/growl counters maintained from the interactions table stream.
+
+A user has at most one interaction per dog, so every stream record is a
+transition: INSERT adds one to the new type, REMOVE takes one from the old
+type and a MODIFY that changes the type moves one between them. A stream
+batch is folded into one delta per dog, applied as a single transaction: an
+ADD on the dog item plus a marker per stream record in the idempotency
+table. A redelivered record finds its marker and is left out, so stream
+retries never count an interaction twice.
+
+The dog item keeps ``wag_count``, ``growl_count`` and ``popularity``
+(wags minus growls), the sort key of SpeciesPopularityIndex.
+"""
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+import client_config
+import dogs
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Markers must outlive the event source's maximum record age (one day)
+STREAM_MARKER_TTL_SECONDS = int(os.environ.get('STREAM_MARKER_TTL_SECONDS', str(2 * 86400)))
+# TransactWriteItems takes at most 100 items: the dog update plus 99 markers
+MARKERS_PER_TRANSACTION = 99
+
+COUNTERS = {'wag': 'wag_count', 'growl': 'growl_count'}
+POPULARITY_WEIGHTS = {'wag_count': 1, 'growl_count': -1}
+
+# Items are plain Python values; see ddb
+client = dogs.dynamodb
+
+
+class Change:
+    """The counter delta one stream record makes to one dog"""
+
+    def __init__(self, event_id: str, sequence_number: str, deltas: Dict[str, int]):
+        self.event_id = event_id
+        self.sequence_number = sequence_number
+        self.deltas = deltas
+
+
+def _interaction(image: Optional[Dict[str, Any]]) -> Optional[Tuple[Tuple[str, str], str]]:
+    """``((shelter_id, dog_id), counter)`` for a stream image, if it counts"""
+    if not image:
+        return None
+    counter = COUNTERS.get(image.get('interaction_type', {}).get('S'))
+    if counter is None:
+        return None
+    return (image['shelter_id']['S'], image['dog_id']['S']), counter
+
+
+def fold_records(records: List[Dict[str, Any]]) -> Dict[Tuple[str, str], List[Change]]:
+    """Group the counter changes of a stream batch by dog, in stream order"""
+    changes: Dict[Tuple[str, str], List[Change]] = {}
+    for record in records:
+        if record.get('eventSource') != 'aws:dynamodb':
+            continue
+        image = record['dynamodb']
+        old = _interaction(image.get('OldImage'))
+        new = _interaction(image.get('NewImage'))
+        if old == new:
+            continue
+        deltas: Dict[str, int] = {}
+        for interaction, step in ((old, -1), (new, 1)):
+            if interaction:
+                counter = interaction[1]
+                deltas[counter] = deltas.get(counter, 0) + step
+        dog_key = (old or new)[0]
+        changes.setdefault(dog_key, []).append(
+            Change(record['eventID'], image['SequenceNumber'], deltas)
+        )
+    return changes
+
+
+def stream_handler(event, context):
+    """
+    Handle an interactions table stream batch by updating per-dog counters
+    """
+    client_config.start_invocation(context)
+    changes = fold_records(event['Records'])
+    stats = {'records': len(event['Records']), 'dogs': len(changes),
+             'applied': 0, 'duplicates': 0, 'missing_dogs': 0}
+    failures = []
+    for dog_key, dog_changes in changes.items():
+        for start in range(0, len(dog_changes), MARKERS_PER_TRANSACTION):
+            chunk = dog_changes[start:start + MARKERS_PER_TRANSACTION]
+            try:
+                outcome = apply_changes(dog_key, chunk)
+            except Exception as e:
+                logger.error("Counter update failed", extra={
+                    "shelter_id": dog_key[0],
+                    "dog_id": dog_key[1],
+                    "error": str(e)
+                })
+                failures.extend(
+                    {'itemIdentifier': change.sequence_number}
+                    for change in dog_changes[start:]
+                )
+                break
+            for name, count in outcome.items():
+                stats[name] += count
+
+    logger.info("Interaction stream batch processed", extra={
+        **stats,
+        "failed": len(failures)
+    })
+    return {'batchItemFailures': failures}
+
+
+def apply_changes(dog_key: Tuple[str, str], changes: List[Change]) -> Dict[str, int]:
+    """Apply one dog's changes exactly once, skipping records already counted
+
+    Raises ClientError for failures a retry may fix (throttling, conflicts).
+    """
+    outcome = {'applied': 0, 'duplicates': 0, 'missing_dogs': 0}
+    pending = list(changes)
+    while pending:
+        try:
+            client.transact_write_items(TransactItems=transaction(dog_key, pending))
+            outcome['applied'] += len(pending)
+            return outcome
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            reasons = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+            if len(reasons) != len(pending) + 1:
+                raise
+
+        if reasons[0] == 'ConditionalCheckFailed':
+            # The dog was deleted; its counters went with it
+            outcome['missing_dogs'] += len(pending)
+            return outcome
+
+        counted = [change for change, reason in zip(pending, reasons[1:])
+                   if reason == 'ConditionalCheckFailed']
+        if not counted:
+            raise RuntimeError(f'Counter transaction cancelled: {reasons}')
+        outcome['duplicates'] += len(counted)
+        pending = [change for change in pending if change not in counted]
+    return outcome
+
+
+def transaction(dog_key: Tuple[str, str], changes: List[Change]) -> List[Dict[str, Any]]:
+    """The counter update for a dog followed by one marker per stream record"""
+    deltas = {counter: 0 for counter in POPULARITY_WEIGHTS}
+    for change in changes:
+        for counter, step in change.deltas.items():
+            deltas[counter] += step
+    popularity = sum(POPULARITY_WEIGHTS[counter] * step for counter, step in deltas.items())
+
+    expires_at = int(time.time()) + STREAM_MARKER_TTL_SECONDS
+    return [{
+        'Update': {
+            'TableName': dogs.DOGS_TABLE_NAME,
+            'Key': {'shelter_id': dog_key[0], 'dog_id': dog_key[1]},
+            # Counters do not bump version: they must never fail an edit's
+            # optimistic concurrency check or evict cached dog records
+            'UpdateExpression': 'ADD wag_count :wags, growl_count :growls, popularity :popularity',
+            'ConditionExpression': 'attribute_exists(dog_id)',
+            'ExpressionAttributeValues': {
+                ':wags': deltas['wag_count'],
+                ':growls': deltas['growl_count'],
+                ':popularity': popularity
+            }
+        }
+    }] + [{
+        'Put': {
+            'TableName': dogs.IDEMPOTENCY_TABLE_NAME,
+            'Item': {
+                'idempotency_key': f'interaction-stream#{change.event_id}',
+                'expires_at': expires_at
+            },
+            'ConditionExpression': 'attribute_not_exists(idempotency_key)'
+        }
+    } for change in changes]
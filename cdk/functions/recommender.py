@@ -0,0 +1,543 @@
+"""
+Dog recommendations from precomputed feature vectors.
+
+Every dog is a row of a float32 feature matrix built from its weight, age,
+colour family, state and description tokens. A user's preference vector is
+the sum of the rows of the dogs they wagged minus the ones they growled at,
+and recommendations are the top-k rows of a single matrix-vector product.
+
+The matrix is an artifact in S3: ``<prefix>model-<version>.npy`` plus the
+dog keys in ``<prefix>model-<version>.keys.json``, with ``manifest.json``
+naming the current version. ``build_handler`` keeps it current from the
+DogsTable stream and rebuilds it from a full scan when invoked directly.
+``handler`` downloads the current version to /tmp at cold start and
+memory-maps it, re-reading the manifest at most every MODEL_REFRESH_SECONDS.
+
+Every published version is a full copy of the matrix, so stream batches are
+collected for minutes before the builder runs and batches that change no
+feature vector publish nothing. A version the manifest moves away from is
+tagged ``superseded=true``; only tagged objects expire, never the live one.
+"""
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+import api_responses
+import client_config
+import clients
+import dates
+import ddb
+import dogs
+import parallel_scan
+import species
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+s3 = clients.LazyClient('s3')
+
+RECOMMENDER_BUCKET_NAME = os.environ.get('RECOMMENDER_BUCKET_NAME')
+RECOMMENDER_PREFIX = os.environ.get('RECOMMENDER_PREFIX', 'recommender/')
+# Local copies of the artifact, memory-mapped by warm containers
+MODEL_DIR = os.environ.get('MODEL_DIR', '/tmp/recommender')
+MODEL_REFRESH_SECONDS = float(os.environ.get('MODEL_REFRESH_SECONDS', '60'))
+DEFAULT_TOP_K = 10
+MAX_TOP_K = 50
+# A growl pushes the preference away from a dog as hard as a wag pulls
+GROWL_WEIGHT = 1.0
+
+# Bumped whenever dog_features changes; artifacts of older versions are rebuilt
+FEATURE_VERSION = 1
+# Object tag of versions the manifest no longer names, which the bucket expires
+SUPERSEDED_TAG = 'superseded'
+
+# Upper bounds of the weight (lb) and age (months) buckets; the last is open
+WEIGHT_BINS = (50, 65, 80)
+AGE_BINS = (12, 36, 84)
+COLOR_FAMILIES = ('black', 'yellow', 'chocolate')
+STATES = (
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI', 'ID',
+    'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO',
+    'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA',
+    'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
+)
+STATE_INDEX = {state: index for index, state in enumerate(STATES)}
+# Description tokens are hashed into a fixed number of buckets
+DESCRIPTION_BUCKETS = 128
+_TOKEN_RE = re.compile(r'[a-z]{3,}')
+_STOPWORDS = frozenset([
+    'and', 'the', 'for', 'with', 'she', 'her', 'his', 'him', 'has', 'was', 'are',
+    'very', 'who', 'this', 'that', 'dog', 'lab', 'labrador', 'retriever'
+])
+
+# (block, size, weight): one-hot blocks plus the hashed description block;
+# each block has unit length before weighting
+BLOCKS = (
+    ('weight', len(WEIGHT_BINS) + 1, 1.0),
+    ('age', len(AGE_BINS) + 1, 1.0),
+    ('color', len(COLOR_FAMILIES) + 1, 1.0),
+    ('state', len(STATES), 0.5),
+    ('description', DESCRIPTION_BUCKETS, 1.0)
+)
+OFFSETS: Dict[str, int] = {}
+_offset = 0
+for _block, _size, _ in BLOCKS:
+    OFFSETS[_block] = _offset
+    _offset += _size
+DIMENSIONS = _offset
+BLOCK_WEIGHTS = {block: weight for block, _, weight in BLOCKS}
+
+# Attributes dog_features reads
+FEATURE_ATTRIBUTES = ('dog_weight', 'birth_date', 'dog_color', 'state', 'description')
+
+DogKey = Tuple[str, str]
+
+
+def _bucket(value: float, bins: Tuple[int, ...]) -> int:
+    for index, upper in enumerate(bins):
+        if value < upper:
+            return index
+    return len(bins)
+
+
+def dog_features(item: Dict[str, Any], today: Optional[date] = None) -> np.ndarray:
+    """Feature vector of a dog item; missing attributes leave their block empty"""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+
+    def one_hot(block: str, index: Optional[int]) -> None:
+        if index is not None:
+            vector[OFFSETS[block] + index] = BLOCK_WEIGHTS[block]
+
+    if item.get('dog_weight') is not None:
+        one_hot('weight', _bucket(float(item['dog_weight']), WEIGHT_BINS))
+
+    birth_date = dates.parse_date(item.get('birth_date'))
+    if birth_date:
+        today = today or date.today()
+        months = (today.year - birth_date.year) * 12 + today.month - birth_date.month
+        one_hot('age', _bucket(months, AGE_BINS))
+
+    if item.get('dog_color'):
+        family = dogs.color_family(item['dog_color'])
+        one_hot('color', COLOR_FAMILIES.index(family) if family else len(COLOR_FAMILIES))
+
+    one_hot('state', STATE_INDEX.get(str(item.get('state', '')).upper()))
+
+    counts = np.zeros(DESCRIPTION_BUCKETS, dtype=np.float32)
+    for token in _TOKEN_RE.findall(str(item.get('description', '')).lower()):
+        if token not in _STOPWORDS:
+            # crc32 is stable across processes, unlike hash()
+            counts[zlib.crc32(token.encode('utf-8')) % DESCRIPTION_BUCKETS] += 1
+    norm = np.linalg.norm(np.log1p(counts))
+    if norm:
+        start = OFFSETS['description']
+        vector[start:start + DESCRIPTION_BUCKETS] = (
+            np.log1p(counts) / norm * BLOCK_WEIGHTS['description']
+        )
+    return vector
+
+
+class Model:
+    """Feature matrix rows aligned with dog keys"""
+
+    def __init__(self, version: str, features: np.ndarray, keys: List[DogKey]):
+        self.version = version
+        self.features = features
+        self.keys = keys
+        self.index = {key: row for row, key in enumerate(keys)}
+
+    def preference(self, interactions: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Unit preference vector from a user's votes, or None without usable history"""
+        weights = np.zeros(len(self.keys), dtype=np.float32)
+        for interaction in interactions:
+            row = self.index.get((interaction['shelter_id'], interaction['dog_id']))
+            if row is not None:
+                weights[row] += 1.0 if interaction['interaction_type'] == 'wag' else -GROWL_WEIGHT
+        if not weights.any():
+            return None
+        # One pass over the matrix instead of one row lookup per vote
+        preference = weights @ self.features
+        norm = np.linalg.norm(preference)
+        return preference / norm if norm else None
+
+    def top_k(self, preference: np.ndarray, k: int,
+              exclude: Optional[List[int]] = None) -> List[Tuple[int, float]]:
+        """The ``k`` best scoring rows, best first, skipping ``exclude``"""
+        scores = self.features @ preference
+        if exclude:
+            scores[exclude] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(row), float(scores[row])) for row in top]
+
+
+# Artifact storage
+
+def _manifest_key() -> str:
+    return f'{RECOMMENDER_PREFIX}manifest.json'
+
+
+def read_manifest() -> Optional[Tuple[Dict[str, Any], str]]:
+    """Current manifest and its ETag, or None before the first build"""
+    try:
+        response = s3.get_object(Bucket=RECOMMENDER_BUCKET_NAME, Key=_manifest_key())
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return json.loads(response['Body'].read()), response['ETag']
+
+
+def retire(manifest: Dict[str, Any]) -> None:
+    """Tag the objects of a version that is not live so the lifecycle rule expires them"""
+    for key in (manifest['features_key'], manifest['keys_key']):
+        try:
+            s3.put_object_tagging(Bucket=RECOMMENDER_BUCKET_NAME, Key=key, Tagging={
+                'TagSet': [{'Key': SUPERSEDED_TAG, 'Value': 'true'}]
+            })
+        except ClientError as e:
+            # An untagged version is only kept, never lost
+            logger.warning("Failed to retire recommender version", extra={
+                "model_version": manifest['version'],
+                "key": key,
+                "error": str(e)
+            })
+
+
+def save_model(features: np.ndarray, keys: List[DogKey], etag: Optional[str] = None,
+               previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Upload a new artifact version and point the manifest at it
+
+    With ``etag`` the manifest is only replaced if nobody else replaced it
+    first; S3 then raises a PreconditionFailed ClientError and the uploaded
+    version is retired. ``previous``, the manifest being replaced, is retired
+    once the new one is live.
+    """
+    version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+    base = f'{RECOMMENDER_PREFIX}model-{version}'
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(features, dtype=np.float32))
+    s3.put_object(Bucket=RECOMMENDER_BUCKET_NAME, Key=f'{base}.npy', Body=buffer.getvalue())
+    s3.put_object(Bucket=RECOMMENDER_BUCKET_NAME, Key=f'{base}.keys.json',
+                  Body=json.dumps([list(key) for key in keys]).encode('utf-8'))
+
+    manifest = {
+        'version': version,
+        'feature_version': FEATURE_VERSION,
+        'features_key': f'{base}.npy',
+        'keys_key': f'{base}.keys.json',
+        'dogs': len(keys),
+        'dimensions': DIMENSIONS
+    }
+    conditions = {'IfMatch': etag} if etag else {}
+    try:
+        s3.put_object(Bucket=RECOMMENDER_BUCKET_NAME, Key=_manifest_key(),
+                      Body=json.dumps(manifest).encode('utf-8'),
+                      ContentType='application/json', **conditions)
+    except ClientError as e:
+        # Only a refused write surely left the version unpublished
+        if e.response['Error']['Code'] in ('PreconditionFailed', '412'):
+            retire(manifest)
+        raise
+    if previous:
+        retire(previous)
+    return manifest
+
+
+def _read_keys(manifest: Dict[str, Any]) -> List[DogKey]:
+    body = s3.get_object(Bucket=RECOMMENDER_BUCKET_NAME, Key=manifest['keys_key'])['Body'].read()
+    return [tuple(key) for key in json.loads(body)]
+
+
+def load_model(manifest: Dict[str, Any]) -> Model:
+    """Download an artifact version to MODEL_DIR once and memory-map it"""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = os.path.join(MODEL_DIR, f"{manifest['version']}.npy")
+    if not os.path.exists(path):
+        partial = f'{path}.part'
+        s3.download_file(RECOMMENDER_BUCKET_NAME, manifest['features_key'], partial)
+        os.replace(partial, path)
+        # Older versions may still be mapped, which unlinking does not disturb
+        for name in os.listdir(MODEL_DIR):
+            if name != os.path.basename(path):
+                os.remove(os.path.join(MODEL_DIR, name))
+    return Model(manifest['version'], np.load(path, mmap_mode='r'), _read_keys(manifest))
+
+
+_model: Optional[Model] = None
+_model_checked_at = float('-inf')
+_model_lock = threading.Lock()
+
+
+def current_model() -> Optional[Model]:
+    """The memoized model, swapped when the manifest names a newer version"""
+    global _model, _model_checked_at
+    with _model_lock:
+        if time.monotonic() - _model_checked_at < MODEL_REFRESH_SECONDS:
+            return _model
+        loaded = read_manifest()
+        _model_checked_at = time.monotonic()
+        if loaded and (_model is None or loaded[0]['version'] != _model.version):
+            _model = load_model(loaded[0])
+        return _model
+
+
+# Building
+
+def build_handler(event, context):
+    """
+    Apply a DogsTable stream batch to the artifact, or rebuild it from a full
+    scan when invoked directly (e.g. {"task": "rebuild"} from the daily rule)
+    """
+    client_config.start_invocation(context)
+    if 'Records' in event:
+        try:
+            return apply_stream(event['Records'])
+        except Exception as e:
+            logger.error("Recommender stream batch failed", extra={
+                "records": len(event['Records']),
+                "error": str(e)
+            })
+            # The batch is folded into one version, so all of it is retried
+            return {'batchItemFailures': [
+                {'itemIdentifier': record['dynamodb']['SequenceNumber']}
+                for record in event['Records']
+            ]}
+    return rebuild()
+
+
+def rebuild() -> Dict[str, Any]:
+    """Build the artifact from every dog"""
+    items = parallel_scan.parallel_scan(dogs.dogs_table.scan, {
+        'ProjectionExpression': ', '.join(f'#{name}' for name in
+                                          dogs.DOG_KEY_ATTRIBUTES + FEATURE_ATTRIBUTES),
+        'ExpressionAttributeNames': {f'#{name}': name for name in
+                                     dogs.DOG_KEY_ATTRIBUTES + FEATURE_ATTRIBUTES}
+    }, dogs.SCAN_SEGMENTS, dogs.DOG_KEY_ATTRIBUTES)
+    today = date.today()
+    keys = [(item['shelter_id'], item['dog_id']) for item in items]
+    features = (np.vstack([dog_features(item, today) for item in items]) if items
+                else np.zeros((0, DIMENSIONS), dtype=np.float32))
+    loaded = read_manifest()
+    manifest = save_model(features, keys, previous=loaded[0] if loaded else None)
+    logger.info("Recommender rebuilt", extra={
+        "model_version": manifest['version'],
+        "dogs": len(keys)
+    })
+    return {'version': manifest['version'], 'dogs': len(keys)}
+
+
+def stream_changes(records: List[Dict[str, Any]]) -> Dict[DogKey, Optional[Dict[str, Any]]]:
+    """Latest image per dog in a stream batch; None for removed dogs"""
+    changes: Dict[DogKey, Optional[Dict[str, Any]]] = {}
+    for record in records:
+        if record.get('eventSource') != 'aws:dynamodb':
+            continue
+        keys = record['dynamodb']['Keys']
+        key = (keys['shelter_id']['S'], keys['dog_id']['S'])
+        image = record['dynamodb'].get('NewImage')
+        if record['eventName'] == 'REMOVE' or not image:
+            changes[key] = None
+        else:
+            changes[key] = ddb.deserialize_item(image)
+    return changes
+
+
+def apply_changes(features: np.ndarray, keys: List[DogKey],
+                  changes: Dict[DogKey, Optional[Dict[str, Any]]]
+                  ) -> Tuple[np.ndarray, List[DogKey], bool]:
+    """Upsert and remove rows; the flag is False when no row actually changed"""
+    features = np.array(features, dtype=np.float32)
+    index = {key: row for row, key in enumerate(keys)}
+    today = date.today()
+    removed = []
+    added_keys: List[DogKey] = []
+    added_rows = []
+    changed = False
+    for key, item in changes.items():
+        row = index.get(key)
+        if item is None:
+            if row is not None:
+                removed.append(row)
+                changed = True
+            continue
+        vector = dog_features(item, today)
+        if row is None:
+            added_keys.append(key)
+            added_rows.append(vector)
+            changed = True
+        elif not np.array_equal(features[row], vector):
+            # Counter updates and other edits that leave the features alone skip this
+            features[row] = vector
+            changed = True
+
+    if removed:
+        keep = np.ones(len(keys), dtype=bool)
+        keep[removed] = False
+        features = features[keep]
+        keys = [key for key, kept in zip(keys, keep) if kept]
+    if added_rows:
+        features = np.vstack([features, np.vstack(added_rows)])
+        keys = keys + added_keys
+    return features, keys, changed
+
+
+def apply_stream(records: List[Dict[str, Any]], max_attempts: int = 3) -> Dict[str, Any]:
+    """Fold a stream batch into a new artifact version
+
+    Another builder replacing the manifest first makes the conditional write
+    fail; the batch is then re-applied on top of its version. Upserts and
+    removals are idempotent, so redelivered batches are harmless.
+    """
+    changes = stream_changes(records)
+    if not changes:
+        return {'batchItemFailures': []}
+    for _ in range(max_attempts):
+        loaded = read_manifest()
+        if loaded is None or loaded[0].get('feature_version') != FEATURE_VERSION:
+            rebuild()
+            return {'batchItemFailures': []}
+        manifest, etag = loaded
+        body = s3.get_object(Bucket=RECOMMENDER_BUCKET_NAME, Key=manifest['features_key'])['Body']
+        features = np.load(io.BytesIO(body.read()))
+        features, keys, changed = apply_changes(features, _read_keys(manifest), changes)
+        if not changed:
+            return {'batchItemFailures': []}
+        try:
+            updated = save_model(features, keys, etag, previous=manifest)
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('PreconditionFailed', '412'):
+                raise
+            continue
+        logger.info("Recommender updated from stream", extra={
+            "model_version": updated['version'],
+            "dogs": len(keys),
+            "changes": len(changes)
+        })
+        return {'batchItemFailures': []}
+    raise RuntimeError('Recommender manifest kept changing; the batch will be retried')
+
+
+# Serving
+
+def handler(event, context):
+    """
+    API Gateway handler for GET /recommendations
+    """
+    client_config.start_invocation(context)
+    return api_responses.compress_response(
+        get_recommendations(event.get('queryStringParameters') or {}),
+        dogs.get_header(event, 'Accept-Encoding')
+    )
+
+
+def parse_top_k(limit: Optional[str]) -> int:
+    """Validate the optional limit query parameter"""
+    if limit is None:
+        return DEFAULT_TOP_K
+    try:
+        value = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if not 1 <= value <= MAX_TOP_K:
+        raise ValueError(f'limit must be between 1 and {MAX_TOP_K}')
+    return value
+
+
+def user_interactions(user_id: str) -> List[Dict[str, Any]]:
+    """Every vote of a user"""
+    query_kwargs = {
+        'KeyConditionExpression': 'user_id = :user_id',
+        'ExpressionAttributeValues': {':user_id': user_id},
+        'ProjectionExpression': 'shelter_id, dog_id, interaction_type'
+    }
+    interactions = []
+    while True:
+        response = dogs.interactions_table.query(**query_kwargs)
+        interactions.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return interactions
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def popular_dogs(k: int, exclude: set) -> List[Dict[str, Any]]:
+    """Most popular dogs the user has not voted on, for users without history"""
+    response = dogs.dogs_table.query(
+        IndexName='SpeciesPopularityIndex',
+        KeyConditionExpression='species = :species',
+        ExpressionAttributeValues={':species': species.LABRADOR_SPECIES},
+        ScanIndexForward=False,
+        Limit=k + len(exclude)
+    )
+    items = [item for item in response['Items']
+             if (item['shelter_id'], item['dog_id']) not in exclude][:k]
+    dogs.decrypt_dog_names(items)
+    return [{'shelter_id': item['shelter_id'], 'dog_id': item['dog_id'],
+             'score': float(item.get('popularity', 0)), 'dog': item} for item in items]
+
+
+def get_recommendations(query_params: Dict[str, str]) -> Dict[str, Any]:
+    """Recommend dogs a user has not voted on, best match first"""
+    try:
+        user_id = query_params.get('user_id')
+        if not user_id:
+            return dogs.create_response(400, {'error': 'user_id query parameter is required'})
+        try:
+            k = parse_top_k(query_params.get('limit'))
+        except ValueError as e:
+            return dogs.create_response(400, {'error': str(e)})
+
+        model = current_model()
+        if model is None:
+            return dogs.create_response(503, {'error': 'Recommendations are not available yet'})
+
+        interactions = user_interactions(user_id)
+        voted = {(interaction['shelter_id'], interaction['dog_id']) for interaction in interactions}
+        preference = model.preference(interactions)
+        if preference is None:
+            strategy = 'popularity'
+            recommendations = popular_dogs(k, voted)
+        else:
+            strategy = 'preferences'
+            exclude = [model.index[key] for key in voted if key in model.index]
+            recommendations = [
+                {'shelter_id': model.keys[row][0], 'dog_id': model.keys[row][1], 'score': score}
+                for row, score in model.top_k(preference, k, exclude)
+            ]
+            # Dogs deleted since the artifact was built come back as None
+            recommendations = [r for r in dogs.attach_dogs(recommendations) if r['dog']]
+
+        logger.info("Recommendations served", extra={
+            "model_version": model.version,
+            "strategy": strategy,
+            "votes": len(interactions),
+            "recommended": len(recommendations)
+        })
+        return dogs.create_response(200, {
+            'recommendations': recommendations,
+            'count': len(recommendations),
+            'strategy': strategy,
+            'model_version': model.version
+        })
+
+    except dogs.DogsUnavailable as e:
+        print(f'Error getting recommendations: {str(e)}')
+        return dogs.create_response(503, {'error': 'Dogs are temporarily unavailable, try again'},
+                                    {'Retry-After': str(dogs.RETRY_AFTER_SECONDS)})
+    except Exception as e:
+        print(f'Error getting recommendations: {str(e)}')
+        return dogs.create_response(500, {'error': 'Failed to compute recommendations'})
@@ -0,0 +1,124 @@
+"""
+Declarative routing for API Gateway proxy events.
+
+Routes are keyed by ``(method, resource template)``, the same pair API Gateway
+puts in a proxy event's ``httpMethod`` and ``resource`` fields, so resolving a
+request is a single dict lookup. Events without ``resource`` (direct
+invocations, tests) fall back to matching ``path`` against the templates,
+which are compiled once when the router is built.
+"""
+import base64
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_PARAMETER_RE = re.compile(r'\{([a-z_]+)\}')
+
+
+class RouteError(Exception):
+    """A request that cannot be dispatched, with the status it should get"""
+
+    def __init__(self, status_code: int, message: str,
+                 headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class Request:
+    """The parts of a proxy event an operation reads"""
+
+    def __init__(self, event: Dict[str, Any], path_parameters: Dict[str, str]):
+        self.event = event
+        self.path_parameters = path_parameters
+        self.query_parameters: Dict[str, str] = event.get('queryStringParameters') or {}
+        body = event.get('body')
+        # The RestApi treats every media type as binary, so bodies may arrive base64-encoded
+        if body and event.get('isBase64Encoded'):
+            body = base64.b64decode(body).decode('utf-8')
+        self.body: Optional[str] = body
+        self.json: Any = None
+
+    def header(self, name: str) -> Optional[str]:
+        """Case-insensitive request header lookup"""
+        name = name.lower()
+        for header, value in (self.event.get('headers') or {}).items():
+            if header.lower() == name:
+                return value
+        return None
+
+
+class Route:
+    """An operation and the parameters it cannot run without
+
+    ``operation`` is called with the Request. Path parameters come from the
+    resource template; ``query_parameters`` lists the required query string
+    parameters. ``json_body`` routes get their body parsed into ``request.json``,
+    an empty body parsing as ``{}``.
+    """
+
+    def __init__(self, operation: Callable[[Request], Dict[str, Any]],
+                 query_parameters: Tuple[str, ...] = (), json_body: bool = False):
+        self.operation = operation
+        self.query_parameters = query_parameters
+        self.json_body = json_body
+
+    def prepare(self, request: Request, path_parameters: Tuple[str, ...]) -> None:
+        """Validate the request's parameters and parse its body; raises RouteError"""
+        for name in path_parameters:
+            if not request.path_parameters.get(name):
+                raise RouteError(400, f'{name} path parameter is required')
+        for name in self.query_parameters:
+            if not request.query_parameters.get(name):
+                raise RouteError(400, f'{name} query parameter is required')
+        if self.json_body:
+            try:
+                request.json = json.loads(request.body) if request.body else {}
+            except json.JSONDecodeError:
+                raise RouteError(400, 'Invalid JSON in request body')
+
+
+class Router:
+    """Route table resolved by method and resource template"""
+
+    def __init__(self, routes: Dict[Tuple[str, str], Route]):
+        self.routes = dict(routes)
+        self.methods: Dict[str, List[str]] = {}
+        self.path_parameters: Dict[str, Tuple[str, ...]] = {}
+        for method, resource in self.routes:
+            self.methods.setdefault(resource, []).append(method)
+            self.path_parameters[resource] = tuple(_PARAMETER_RE.findall(resource))
+        # Literal segments win over parameters, so /dogs/batch is not a dog_id
+        self._patterns = [
+            (re.compile(_PARAMETER_RE.sub(r'(?P<\1>[^/]+)', resource)), resource)
+            for resource in sorted(self.methods, key=lambda resource: resource.count('{'))
+        ]
+
+    def match_path(self, path: str) -> Tuple[Optional[str], Dict[str, str]]:
+        """Resource template and path parameters of a concrete path"""
+        if path in self.methods:
+            return path, {}
+        for pattern, resource in self._patterns:
+            found = pattern.fullmatch(path)
+            if found:
+                return resource, found.groupdict()
+        return None, {}
+
+    def resolve(self, event: Dict[str, Any]) -> Tuple[Route, Request]:
+        """Route and validated Request for a proxy event; raises RouteError"""
+        resource = event.get('resource')
+        path_parameters = event.get('pathParameters') or {}
+        if resource not in self.methods:
+            resource, matched = self.match_path(event.get('path') or '')
+            path_parameters = {**matched, **path_parameters}
+        if resource is None:
+            raise RouteError(404, 'Endpoint not found')
+
+        route = self.routes.get((event.get('httpMethod'), resource))
+        if route is None:
+            allowed = ','.join(sorted(self.methods[resource]))
+            raise RouteError(405, 'Method not allowed', {'Allow': allowed})
+
+        request = Request(event, path_parameters)
+        route.prepare(request, self.path_parameters[resource])
+        return route, request
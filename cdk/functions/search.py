@@ -0,0 +1,173 @@
+"""
+Description search over an inverted index of posting lists.
+
+Descriptions are tokenized when a dog is written and every distinct term gets
+a posting ``{term, dog_key}`` in the search table, so a term's posting list
+is one partition read in dog_key order. Postings hold only keys, which keeps
+them small enough that a 1 MB query page carries thousands of them.
+
+A query with several terms reads the posting lists a page at a time, all in
+step. Every list has been read up to its last posting, so below the lowest
+of those the intersection is already exact; a search with a ``limit`` stops
+as soon as that window holds ``limit`` dogs and the next page continues
+after it. Otherwise reading goes on until the shortest list is complete: its
+dogs are the candidates, and each other term either already listed a
+candidate or is asked about the rest with BatchGetItem. A search therefore
+costs about as much as its rarest term or its first ``limit`` matches,
+whichever comes first, however common the other terms are. Later pages of a
+search start every posting list after the last dog returned, so they never
+re-read earlier postings.
+"""
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import dynamo_batch
+
+# Postings read per query page while looking for the shortest list
+POSTINGS_PAGE_SIZE = 1000
+MAX_QUERY_TERMS = 8
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has',
+    'he', 'her', 'his', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'she', 'so',
+    'that', 'the', 'this', 'to', 'very', 'was', 'who', 'with'
+])
+
+DogKey = Tuple[str, str]
+
+
+def _stem(word: str) -> str:
+    """Fold simple plurals so "kids" finds "kid" and back"""
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: Any) -> List[str]:
+    """Distinct search terms of ``text`` in order of first appearance"""
+    terms = (_stem(word) for word in _TOKEN_RE.findall(str(text or '').lower())
+             if word not in _STOPWORDS)
+    return list(dict.fromkeys(terms))
+
+
+def dog_key(shelter_id: str, dog_id: str) -> str:
+    """Posting sort key; the same form the interactions table uses"""
+    return f'{shelter_id}#{dog_id}'
+
+
+def postings(item: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Search table items for a dog's description"""
+    key = dog_key(item['shelter_id'], item['dog_id'])
+    return [{'term': term, 'dog_key': key, 'shelter_id': item['shelter_id'],
+             'dog_id': item['dog_id']} for term in tokenize(item.get('description'))]
+
+
+class PostingReader:
+    """One term's posting list after ``start_after``, read a page at a time"""
+
+    def __init__(self, table: Any, term: str, page_size: int, start_after: Optional[str] = None):
+        self.term = term
+        self.keys: Dict[str, DogKey] = {}
+        # Highest dog_key read so far; postings come in dog_key order
+        self.last_key: Optional[str] = None
+        self.done = False
+        self._table = table
+        self._request: Dict[str, Any] = {
+            'KeyConditionExpression': '#term = :term',
+            'ProjectionExpression': '#dog_key, shelter_id, dog_id',
+            'ExpressionAttributeNames': {'#term': 'term', '#dog_key': 'dog_key'},
+            'ExpressionAttributeValues': {':term': term},
+            'Limit': page_size
+        }
+        if start_after is not None:
+            self._request['KeyConditionExpression'] += ' AND #dog_key > :start_after'
+            self._request['ExpressionAttributeValues'][':start_after'] = start_after
+
+    def read_page(self) -> None:
+        response = self._table.query(**self._request)
+        for item in response['Items']:
+            self.keys[item['dog_key']] = (item['shelter_id'], item['dog_id'])
+            self.last_key = item['dog_key']
+        if 'LastEvaluatedKey' in response:
+            self._request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        else:
+            self.done = True
+
+
+def confirmed_window(readers: Sequence[PostingReader]) -> Tuple[List[str], Optional[DogKey]]:
+    """Dog keys in every list up to the lowest point the unfinished lists are read to
+
+    Also returns the key at that point, or None when every list is complete.
+    """
+    unfinished = [reader for reader in readers if not reader.done]
+    if any(reader.last_key is None for reader in unfinished):
+        return [], None
+    edge = min(unfinished, key=lambda reader: reader.last_key) if unfinished else None
+    smallest = min(readers, key=lambda reader: len(reader.keys))
+    keys = sorted(key for key in smallest.keys
+                  if (edge is None or key <= edge.last_key)
+                  and all(key in reader.keys for reader in readers))
+    return keys, edge.keys[edge.last_key] if edge else None
+
+
+def match(dynamodb: Any, table_name: str, terms: Sequence[str],
+          page_size: int = POSTINGS_PAGE_SIZE, start_after: Optional[str] = None,
+          limit: Optional[int] = None) -> Tuple[List[DogKey], Optional[DogKey], Dict[str, int]]:
+    """Keys of the dogs whose description has every term, in dog_key order
+
+    ``dynamodb`` is a DynamoDB service resource, ``ddb.DynamoDB`` or boto3's.
+    Only dogs whose dog_key sorts after ``start_after`` are matched. With a
+    ``limit``, reading may stop once that many dogs are confirmed: the keys
+    are then every match up to the returned window end, and matching resumes
+    after it. The window end is None when the keys are every match. Also
+    returns read counters for structured logs. Raises RuntimeError if a
+    posting lookup is still unprocessed after retries, rather than silently
+    dropping matches.
+    """
+    table = dynamodb.Table(table_name)
+    readers = [PostingReader(table, term, page_size, start_after) for term in dict.fromkeys(terms)]
+    stats = {'terms': len(readers), 'pages': 0, 'lookups': 0}
+    while not any(reader.done for reader in readers):
+        for reader in readers:
+            reader.read_page()
+            stats['pages'] += 1
+        if limit is not None:
+            keys, window_end = confirmed_window(readers)
+            if len(keys) >= limit and window_end is not None:
+                return [readers[0].keys[key] for key in keys], window_end, stats
+
+    shortest = min((reader for reader in readers if reader.done), key=lambda reader: len(reader.keys))
+    candidates: Set[str] = set(shortest.keys)
+    # Complete lists only intersect; the most selective partial lists go first
+    others = sorted((reader for reader in readers if reader is not shortest),
+                    key=lambda reader: (not reader.done, len(reader.keys)))
+    for reader in others:
+        if not candidates:
+            break
+        unknown = [key for key in candidates if key not in reader.keys]
+        candidates &= set(reader.keys)
+        if reader.done or not unknown:
+            continue
+        found, unprocessed = dynamo_batch.batch_get(
+            dynamodb, table_name, [{'term': reader.term, 'dog_key': key} for key in unknown]
+        )
+        if unprocessed:
+            raise RuntimeError(f'{len(unprocessed)} posting lookups left unprocessed')
+        stats['lookups'] += len(unknown)
+        candidates |= {posting['dog_key'] for posting in found}
+
+    return [shortest.keys[key] for key in sorted(candidates)], None, stats
+
+
+def parse_query(q: Optional[str]) -> List[str]:
+    """Validate the q query parameter and return its terms
+
+    Raises ValueError when nothing searchable is left or there are too many terms.
+    """
+    terms = tokenize(q)
+    if not terms:
+        raise ValueError('q must contain at least one searchable word')
+    if len(terms) > MAX_QUERY_TERMS:
+        raise ValueError(f'q may contain at most {MAX_QUERY_TERMS} search terms')
+    return terms
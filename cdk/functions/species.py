@@ -0,0 +1,96 @@
+"""
+Classification of free-text species into canonical breed codes.
+
+Shelters write "Labrador Retriever", "black lab", "Labrador retreiver" or
+"Lab mix". Raw values are normalized (case, punctuation, coat colours and
+other qualifiers dropped) and looked up in a precomputed alias table; values
+that miss the table are matched fuzzily against its keys. Anything mentioning
+a mix is a mix, never a purebred, so "Labradoodle" and "lab mix" are not
+Labrador Retrievers.
+"""
+import difflib
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+
+LABRADOR_RETRIEVER = 'LABRADOR_RETRIEVER'
+LABRADOR_MIX = 'LABRADOR_MIX'
+MIXED_BREED = 'MIXED_BREED'
+UNKNOWN = 'UNKNOWN'
+
+# Stored in the species attribute of every accepted dog (SpeciesIndex partition)
+LABRADOR_SPECIES = 'Labrador Retriever'
+
+_ALIASES = {
+    LABRADOR_RETRIEVER: ['labrador retriever', 'labrador', 'lab', 'lab retriever',
+                         'retriever labrador', 'labrador retriever lab'],
+    LABRADOR_MIX: ['labradoodle', 'goldador', 'borador', 'labmaraner', 'labsky',
+                   'pitador', 'beagador', 'boxador', 'springador'],
+    'GOLDEN_RETRIEVER': ['golden retriever', 'golden'],
+    'CHESAPEAKE_BAY_RETRIEVER': ['chesapeake bay retriever', 'chessie'],
+    'FLAT_COATED_RETRIEVER': ['flat coated retriever', 'flatcoat retriever'],
+    'POODLE': ['poodle', 'standard poodle'],
+    'GERMAN_SHEPHERD': ['german shepherd', 'german shepherd dog', 'alsatian'],
+    'BEAGLE': ['beagle'],
+    'BOXER': ['boxer'],
+    'PIT_BULL': ['pit bull', 'pitbull', 'american pit bull terrier'],
+    'SIBERIAN_HUSKY': ['husky', 'siberian husky']
+}
+
+# Normalized alias -> breed code, built once per container
+ALIAS_TABLE: Dict[str, str] = {
+    alias: code for code, aliases in _ALIASES.items() for alias in aliases
+}
+
+# Words that qualify a breed without changing it
+_QUALIFIERS = frozenset([
+    'black', 'yellow', 'chocolate', 'choc', 'fox', 'red', 'silver', 'charcoal',
+    'champagne', 'white', 'english', 'american', 'british', 'field', 'show',
+    'purebred', 'pure', 'bred', 'full', 'akc', 'registered', 'dog', 'puppy', 'pup', 'breed'
+])
+_MIX_WORDS = frozenset(['mix', 'mixed', 'cross', 'crossbreed', 'x'])
+_TOKEN_RE = re.compile(r'[a-z]+')
+
+FUZZY_CUTOFF = 0.85
+
+
+def normalize(raw: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return ' '.join(_TOKEN_RE.findall(str(raw).lower()))
+
+
+@lru_cache(maxsize=1024)
+def _classify(text: str) -> Tuple[str, str]:
+    tokens = text.split()
+    if not tokens:
+        return UNKNOWN, 'empty'
+
+    if _MIX_WORDS.intersection(tokens):
+        if any(token.startswith('lab') for token in tokens):
+            return LABRADOR_MIX, 'mix'
+        return MIXED_BREED, 'mix'
+
+    if text in ALIAS_TABLE:
+        return ALIAS_TABLE[text], 'alias'
+
+    core = ' '.join(token for token in tokens if token not in _QUALIFIERS)
+    if core in ALIAS_TABLE:
+        return ALIAS_TABLE[core], 'alias'
+
+    matches = difflib.get_close_matches(core or text, ALIAS_TABLE, n=1, cutoff=FUZZY_CUTOFF)
+    if matches:
+        return ALIAS_TABLE[matches[0]], 'fuzzy'
+    return UNKNOWN, 'unmatched'
+
+
+def classify(raw: str) -> Tuple[str, str]:
+    """Return ``(breed_code, matched_by)`` for a raw species string
+
+    ``matched_by`` is 'alias', 'fuzzy', 'mix', 'empty' or 'unmatched'.
+    """
+    return _classify(normalize(raw))
+
+
+def is_labrador(raw: str) -> bool:
+    """True when the raw species classifies as a purebred Labrador Retriever"""
+    return classify(raw)[0] == LABRADOR_RETRIEVER
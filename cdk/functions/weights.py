@@ -0,0 +1,110 @@
+"""
+Normalization of free-text dog weights to pounds.
+
+Shelter data arrives as "45", "45 lbs", "20kg", "thirty-two pounds" or
+"40-50 lb". Words are folded into digits, the first quantity (or range) is
+read with precompiled patterns, kilograms are converted and ranges collapse
+to their midpoint. Distinct raw strings are memoized, so bulk paths that see
+the same handful of spellings over and over pay for each one only once.
+"""
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+POUNDS_PER_KILOGRAM = 2.20462
+
+_UNITS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12,
+    'thirteen': 13, 'fourteen': 14, 'fifteen': 15, 'sixteen': 16,
+    'seventeen': 17, 'eighteen': 18, 'nineteen': 19
+}
+_TENS = {
+    'twenty': 20, 'thirty': 30, 'forty': 40, 'fourty': 40, 'fifty': 50,
+    'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90
+}
+_NUMBER_WORDS = {**_UNITS, **_TENS, 'hundred': 100}
+
+_WORD = r'(?:' + '|'.join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + r')'
+# A run of number words such as "one hundred and five" or "thirty-two"
+_WORD_RUN_RE = re.compile(rf'\b{_WORD}(?:(?:\s+|-)(?:and\s+)?{_WORD})*\b')
+_WORD_SPLIT_RE = re.compile(r'[\s-]+')
+
+# First quantity, optionally a range, followed by an optional unit
+_QUANTITY_RE = re.compile(
+    r'(\d+(?:\.\d+)?)'
+    r'(?:\s*(?:-|–|to|and)\s*(\d+(?:\.\d+)?))?'
+    r'\s*(kgs?|kilo(?:gram)?s?|lbs?|pounds?|#)?'
+)
+
+# Distinct raw strings remembered by the scalar path
+WEIGHT_CACHE_SIZE = 4096
+
+
+def _words_to_numbers(match: 're.Match[str]') -> str:
+    """Replace a run of number words with digits
+
+    An "and" that does not follow "hundred" separates two numbers, so
+    "forty and fifty" stays a range.
+    """
+    numbers: List[int] = []
+    current = 0
+    previous = None
+    for token in _WORD_SPLIT_RE.split(match.group(0)):
+        if token == 'and':
+            if previous != 'hundred':
+                numbers.append(current)
+                current = 0
+        elif token == 'hundred':
+            current = (current or 1) * 100
+        else:
+            current += _NUMBER_WORDS[token]
+        previous = token
+    numbers.append(current)
+    return ' and '.join(str(number) for number in numbers)
+
+
+@lru_cache(maxsize=WEIGHT_CACHE_SIZE)
+def _parse_text(text: str) -> Optional[float]:
+    text = _WORD_RUN_RE.sub(_words_to_numbers, text.lower())
+    match = _QUANTITY_RE.search(text)
+    if not match:
+        return None
+
+    low, high, unit = match.groups()
+    value = float(low) if high is None else (float(low) + float(high)) / 2
+    if unit and unit.startswith('k'):
+        value *= POUNDS_PER_KILOGRAM
+    return round(value, 2)
+
+
+def parse_weight(value: Any) -> Optional[float]:
+    """Return a weight in pounds, or None if no quantity can be found"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    if isinstance(value, str):
+        return _parse_text(value.strip())
+    return None
+
+
+def parse_weights(values: Iterable[Any]) -> List[Optional[float]]:
+    """Normalize a whole column of raw weights in one pass
+
+    Each distinct value is parsed once no matter how often it repeats.
+    Unhashable values (JSON lists and objects) skip the memo.
+    """
+    parsed: Dict[Any, Optional[float]] = {}
+    results: List[Optional[float]] = []
+    for value in values:
+        key = (type(value), value)
+        try:
+            if key not in parsed:
+                parsed[key] = parse_weight(value)
+        except TypeError:
+            results.append(parse_weight(value))
+            continue
+        results.append(parsed[key])
+    return results
@@ -0,0 +1,209 @@
+import os
+import sys
+import zlib
+
+import boto3
+import pytest
+from moto import mock_dynamodb, mock_kms
+
+# dogs.py reads its configuration and builds its AWS clients at import time
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('DOGS_TABLE_NAME', 'test-pupper-dogs')
+os.environ.setdefault('INTERACTIONS_TABLE_NAME', 'test-pupper-interactions')
+os.environ.setdefault('KMS_KEY_ID', 'test-key-id')
+os.environ.setdefault('JOBS_TABLE_NAME', 'test-pupper-jobs')
+os.environ.setdefault('QUARANTINE_TABLE_NAME', 'test-pupper-quarantine')
+os.environ.setdefault('IDEMPOTENCY_TABLE_NAME', 'test-pupper-idempotency')
+os.environ.setdefault('SEARCH_TABLE_NAME', 'test-pupper-search')
+
+# Add the functions directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'functions'))
+
+
+def create_dogs_table(dynamodb):
+    """Create the dogs table the way CdkStack defines it"""
+    return dynamodb.create_table(
+        TableName=os.environ['DOGS_TABLE_NAME'],
+        KeySchema=[
+            {'AttributeName': 'shelter_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'dog_id', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'shelter_id', 'AttributeType': 'S'},
+            {'AttributeName': 'dog_id', 'AttributeType': 'S'},
+            {'AttributeName': 'state', 'AttributeType': 'S'},
+            {'AttributeName': 'species', 'AttributeType': 'S'},
+            {'AttributeName': 'created_at', 'AttributeType': 'S'},
+            {'AttributeName': 'birth_date', 'AttributeType': 'S'},
+            {'AttributeName': 'state_color', 'AttributeType': 'S'},
+            {'AttributeName': 'dog_weight', 'AttributeType': 'N'},
+            {'AttributeName': 'popularity', 'AttributeType': 'N'}
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                'IndexName': 'StateIndex',
+                'KeySchema': [
+                    {'AttributeName': 'state', 'KeyType': 'HASH'},
+                    {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'SpeciesIndex',
+                'KeySchema': [
+                    {'AttributeName': 'species', 'KeyType': 'HASH'},
+                    {'AttributeName': 'created_at', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'StateBirthDateIndex',
+                'KeySchema': [
+                    {'AttributeName': 'state', 'KeyType': 'HASH'},
+                    {'AttributeName': 'birth_date', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'StateColorWeightIndex',
+                'KeySchema': [
+                    {'AttributeName': 'state_color', 'KeyType': 'HASH'},
+                    {'AttributeName': 'dog_weight', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'SpeciesPopularityIndex',
+                'KeySchema': [
+                    {'AttributeName': 'species', 'KeyType': 'HASH'},
+                    {'AttributeName': 'popularity', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+def create_interactions_table(dynamodb):
+    """Create the user interactions table the way CdkStack defines it"""
+    return dynamodb.create_table(
+        TableName=os.environ['INTERACTIONS_TABLE_NAME'],
+        KeySchema=[
+            {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'dog_key', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'dog_key', 'AttributeType': 'S'},
+            {'AttributeName': 'interaction_type', 'AttributeType': 'S'}
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                'IndexName': 'DogInteractionsIndex',
+                'KeySchema': [
+                    {'AttributeName': 'dog_key', 'KeyType': 'HASH'},
+                    {'AttributeName': 'interaction_type', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+def create_jobs_table(dynamodb):
+    """Create the jobs table the way CdkStack defines it"""
+    return dynamodb.create_table(
+        TableName=os.environ['JOBS_TABLE_NAME'],
+        KeySchema=[{'AttributeName': 'job_id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'job_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+def create_quarantine_table(dynamodb):
+    """Create the quarantine table the way CdkStack defines it"""
+    return dynamodb.create_table(
+        TableName=os.environ['QUARANTINE_TABLE_NAME'],
+        KeySchema=[{'AttributeName': 'quarantine_id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'quarantine_id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+def create_idempotency_table(dynamodb):
+    """Create the idempotency table the way CdkStack defines it"""
+    return dynamodb.create_table(
+        TableName=os.environ['IDEMPOTENCY_TABLE_NAME'],
+        KeySchema=[{'AttributeName': 'idempotency_key', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'idempotency_key', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+def create_search_table(dynamodb):
+    """Create the description search table the way CdkStack defines it"""
+    return dynamodb.create_table(
+        TableName=os.environ['SEARCH_TABLE_NAME'],
+        KeySchema=[
+            {'AttributeName': 'term', 'KeyType': 'HASH'},
+            {'AttributeName': 'dog_key', 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': 'term', 'AttributeType': 'S'},
+            {'AttributeName': 'dog_key', 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+
+
+def segmented(read_page, hash_attribute='shelter_id'):
+    """Wrap a moto scan so it honours Segment/TotalSegments
+
+    Moto ignores the parallel scan parameters and returns the whole table to
+    every segment; this assigns items to segments by hashing the partition key.
+    """
+    def scan(**kwargs):
+        segment = kwargs.pop('Segment', None)
+        total_segments = kwargs.pop('TotalSegments', None)
+        response = read_page(**kwargs)
+        if total_segments:
+            response['Items'] = [
+                item for item in response['Items']
+                if zlib.crc32(str(item[hash_attribute]).encode('utf-8')) % total_segments == segment
+            ]
+        return response
+    return scan
+
+
+@pytest.fixture
+def aws():
+    """Moto-backed DynamoDB tables and a KMS key wired into the dogs module"""
+    with mock_dynamodb(), mock_kms():
+        import dogs
+
+        dynamodb = boto3.resource('dynamodb')
+        kms = boto3.client('kms')
+        key_id = kms.create_key(Description='Test key')['KeyMetadata']['KeyId']
+
+        tables = {
+            'dogs': create_dogs_table(dynamodb),
+            'interactions': create_interactions_table(dynamodb),
+            'jobs': create_jobs_table(dynamodb),
+            'quarantine': create_quarantine_table(dynamodb),
+            'idempotency': create_idempotency_table(dynamodb),
+            'search': create_search_table(dynamodb),
+            'kms': kms,
+            'key_id': key_id
+        }
+        original_key_id = dogs.KMS_KEY_ID
+        dogs.KMS_KEY_ID = key_id
+        dogs.data_key_cache.clear()
+        try:
+            yield tables
+        finally:
+            dogs.KMS_KEY_ID = original_key_id
+            dogs.data_key_cache.clear()
@@ -0,0 +1,131 @@
+"""
+Fault injection for botocore clients, run against moto.
+
+``throttle`` answers a client's requests with throttling errors before they
+leave the process, so the client's own retry handler and adaptive rate
+limiter handle them exactly as they would a throttled AWS response.
+``virtual_time`` keeps that fast: the backoff between attempts and the rate
+limiter's waits advance a virtual clock instead of sleeping. Clients must be
+created inside ``virtual_time`` for their rate limiter to use its clock.
+"""
+import contextlib
+import json
+import threading
+from types import SimpleNamespace
+from typing import Iterator, Optional, Sequence
+from unittest.mock import patch
+
+import botocore.endpoint
+from botocore.awsrequest import AWSResponse
+from botocore.retries import bucket
+
+THROTTLING_ERRORS = {
+    'dynamodb': 'ProvisionedThroughputExceededException',
+    'kms': 'ThrottlingException'
+}
+
+
+class VirtualClock:
+    """Time that passes only when botocore waits"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.backoffs = []
+        self.waited = 0.0
+
+    def current_time(self) -> float:
+        return self.now
+
+    def sleep(self, amount: float) -> None:
+        self.waited += amount
+        self.now += amount
+
+    def backoff(self, amount: float) -> None:
+        self.backoffs.append(amount)
+        self.now += amount
+
+
+class _VirtualCondition:
+    """threading.Condition whose timed waits advance the virtual clock"""
+
+    def __init__(self, clock: VirtualClock, lock):
+        self._clock = clock
+        self._condition = threading.Condition(lock)
+
+    def __enter__(self):
+        return self._condition.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._condition.__exit__(*exc_info)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        # At least a microsecond: a rounding-sized wait could leave the clock
+        # where it was, and the token bucket waiting forever
+        self._clock.sleep(max(timeout or 0, 1e-6))
+        return True
+
+    def notify(self, n: int = 1) -> None:
+        self._condition.notify(n)
+
+
+@contextlib.contextmanager
+def virtual_time() -> Iterator[VirtualClock]:
+    """Run botocore's backoff and client-side rate limiting on a virtual clock"""
+    clock = VirtualClock()
+    bucket_threading = SimpleNamespace(
+        Lock=threading.Lock,
+        Condition=lambda lock=None: _VirtualCondition(clock, lock)
+    )
+    with patch.object(bucket, 'Clock', lambda: clock), \
+            patch.object(bucket, 'threading', bucket_threading), \
+            patch.object(botocore.endpoint, 'time', SimpleNamespace(sleep=clock.backoff)):
+        yield clock
+
+
+class Throttle:
+    """Throttles the first ``failures`` matching requests of a client"""
+
+    def __init__(self, service_name: str, failures: int, operations: Optional[Sequence[str]] = None):
+        self.service_name = service_name
+        self.failures = failures
+        self.operations = operations
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def before_send(self, request, event_name: str, **kwargs) -> Optional[AWSResponse]:
+        operation = event_name.rsplit('.', 1)[-1]
+        if self.operations is not None and operation not in self.operations:
+            return None
+        with self._lock:
+            self.requests += 1
+            if self.throttled >= self.failures:
+                return None
+            self.throttled += 1
+        body = json.dumps({
+            '__type': THROTTLING_ERRORS[self.service_name],
+            'message': 'Rate exceeded'
+        }).encode('utf-8')
+        raw = SimpleNamespace(stream=lambda: iter([body]))
+        return AWSResponse(request.url, 400, {
+            'Content-Type': 'application/x-amz-json-1.0',
+            'x-amzn-RequestId': 'fault-injection'
+        }, raw)
+
+
+@contextlib.contextmanager
+def throttle(client, failures: int, operations: Optional[Sequence[str]] = None) -> Iterator[Throttle]:
+    """Answer the client's first ``failures`` requests with throttling errors
+
+    ``operations`` limits the injection to those operation names, such as
+    ``['Query']``. Requests past the failures go through to moto.
+    """
+    service_name = client.meta.service_model.service_name
+    fault = Throttle(service_name, failures, operations)
+    event_name = f'before-send.{client.meta.service_model.service_id.hyphenize()}'
+    # Ahead of moto's handler, which would answer the request first
+    client.meta.events.register_first(event_name, fault.before_send)
+    try:
+        yield fault
+    finally:
+        client.meta.events.unregister(event_name, fault.before_send)
@@ -0,0 +1,193 @@
+import base64
+import gzip
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+import dogs
+import api_responses
+
+
+def large_response():
+    return dogs.create_response(200, {'dogs': [
+        {'dog_id': str(i), 'dog_weight': Decimal('72.5'), 'description': 'Loves fetch'}
+        for i in range(100)
+    ]})
+
+
+def decoded(response):
+    data = base64.b64decode(response['body'])
+    if response['headers']['Content-Encoding'] == 'br':
+        return json.loads(api_responses.brotli.decompress(data))
+    return json.loads(gzip.decompress(data))
+
+
+class TestSerialization:
+    """Tests for JSON bodies and field projection"""
+
+    def test_decimals_are_numbers(self):
+        body = json.loads(dogs.create_response(200, {
+            'weight': Decimal('72.5'), 'count': Decimal('3'), 'chunks': {1, 0}
+        })['body'])
+
+        assert body == {'weight': 72.5, 'count': 3, 'chunks': [0, 1]}
+        assert isinstance(body['count'], int)
+
+    def test_fields_always_include_the_key(self):
+        fields = api_responses.parse_fields('dog_name, dog_weight,dog_name')
+
+        assert fields == ('shelter_id', 'dog_id', 'dog_name', 'dog_weight')
+        assert api_responses.project([{'shelter_id': 's', 'dog_id': 'd', 'dog_name': 'Rex',
+                                   'description': 'x'}], fields) == [
+            {'shelter_id': 's', 'dog_id': 'd', 'dog_name': 'Rex'}
+        ]
+
+    def test_invalid_fields(self):
+        for fields in ('', 'dog_name,Weight', ','.join(['a'] * 31)):
+            with pytest.raises(ValueError):
+                api_responses.parse_fields(fields)
+
+    def test_listing_and_single_dog_projection(self, aws):
+        with patch.object(dogs, 'kms', aws['kms']):
+            created = json.loads(dogs.create_dog({
+                'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': 'Rex',
+                'species': 'Labrador Retriever', 'description': 'Good dog', 'dog_weight': '70'
+            })['body'])['dog']
+            listing = json.loads(dogs.get_dogs({'state': 'VA', 'fields': 'dog_name,dog_weight'})['body'])
+            single = json.loads(dogs.get_dog(created['dog_id'], {
+                'shelter_id': created['shelter_id'], 'fields': 'description'
+            })['body'])
+
+        assert listing['dogs'] == [{'shelter_id': created['shelter_id'], 'dog_id': created['dog_id'],
+                                    'dog_name': 'Rex', 'dog_weight': 70}]
+        assert set(single['dog']) == {'shelter_id', 'dog_id', 'description'}
+        assert dogs.get_dogs({'fields': 'dog-name'})['statusCode'] == 400
+
+
+class TestCompression:
+    """Tests for Accept-Encoding negotiation and compressed bodies"""
+
+    @pytest.mark.parametrize('accept_encoding, expected', [
+        ('gzip, deflate, br', 'br'),
+        ('gzip;q=1.0, br;q=0.5', 'gzip'),
+        ('br;q=0, *', 'gzip'),
+        ('identity', None),
+        ('gzip;q=0', None),
+        (None, None)
+    ])
+    def test_negotiate(self, accept_encoding, expected):
+        with patch.object(api_responses, 'brotli', object()):
+            assert api_responses.negotiate(accept_encoding) == expected
+
+    def test_gzip_without_brotli(self):
+        with patch.object(api_responses, 'brotli', None):
+            assert api_responses.negotiate('br, gzip') == 'gzip'
+
+    @pytest.mark.parametrize('coding', ['gzip', pytest.param('br', marks=pytest.mark.skipif(
+        api_responses.brotli is None, reason='brotli is not installed'))])
+    def test_large_bodies_are_compressed(self, coding):
+        response = large_response()
+
+        compressed = api_responses.compress_response(response, coding)
+
+        assert compressed['isBase64Encoded'] is True
+        assert compressed['headers']['Content-Encoding'] == coding
+        assert compressed['headers']['Vary'] == 'Accept-Encoding'
+        assert len(compressed['body']) < len(response['body']) / 4
+        assert decoded(compressed) == json.loads(response['body'])
+
+    def test_small_or_unaccepted_bodies_are_left_alone(self):
+        small = dogs.create_response(200, {'ok': True})
+        assert api_responses.compress_response(small, 'gzip') is small
+
+        plain = api_responses.compress_response(large_response(), None)
+        assert 'isBase64Encoded' not in plain
+        assert plain['headers']['Vary'] == 'Accept-Encoding'
+
+    def test_handler_decodes_requests_and_compresses_responses(self, aws):
+        aws['dogs'].put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'rex', 'state': 'VA'})
+        body = {'user_id': 'u1', 'shelter_id': 'VA#A#S', 'dog_id': 'rex', 'interaction_type': 'wag'}
+        event = {
+            'httpMethod': 'POST', 'path': '/interactions', 'pathParameters': None,
+            'queryStringParameters': None, 'headers': {'accept-encoding': 'gzip'},
+            'body': base64.b64encode(json.dumps(body).encode('utf-8')).decode('ascii'),
+            'isBase64Encoded': True
+        }
+
+        with patch.object(api_responses, 'COMPRESSION_MIN_BYTES', 10):
+            response = dogs.handler(event, None)
+
+        assert response['statusCode'] == 201
+        assert decoded(response)['interaction']['interaction_type'] == 'wag'
+
+
+class TestProjectionPushdown:
+    """Tests for fields= becoming a ProjectionExpression"""
+
+    @pytest.fixture
+    def shelter(self, aws):
+        with patch.object(dogs, 'kms', aws['kms']):
+            return [json.loads(dogs.create_dog({
+                'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': name,
+                'species': 'Labrador Retriever', 'description': 'Good with kids',
+                'dog_color': color, 'dog_weight': '70'
+            })['body'])['dog'] for name, color in (('Rex', 'Black'), ('Bolt', 'Yellow'), ('Pip', 'Black'))]
+
+    def test_listing_reads_only_requested_attributes(self, aws, shelter):
+        with patch.object(dogs.dogs_table, 'query', wraps=dogs.dogs_table.query) as query, \
+                patch.object(dogs, 'decrypt_dog_names') as decrypt:
+            result = dogs.get_dogs({'state': 'VA', 'color': 'black', 'fields': 'dog_weight'})
+
+        body = json.loads(result['body'])
+        assert sorted(dog['dog_id'] for dog in body['dogs']) == sorted(
+            dog['dog_id'] for dog in shelter if dog['dog_color'] == 'Black'
+        )
+        assert all(set(dog) == {'shelter_id', 'dog_id', 'dog_weight'} for dog in body['dogs'])
+        request = query.call_args.kwargs
+        projected = {request['ExpressionAttributeNames'][name]
+                     for name in request['ProjectionExpression'].split(', ')}
+        # The colour check, the StateIndex resume key and the ETag still have what they need
+        assert projected == {'shelter_id', 'dog_id', 'dog_weight', 'state', 'created_at', 'dog_color',
+                             *dogs.ETAG_ATTRIBUTES}
+        decrypt.assert_not_called()
+
+    def test_names_are_decrypted_when_requested(self, aws, shelter):
+        with patch.object(dogs, 'kms', aws['kms']):
+            body = json.loads(dogs.get_dogs({'state': 'VA', 'fields': 'dog_name'})['body'])
+
+        assert sorted(dog['dog_name'] for dog in body['dogs']) == ['Bolt', 'Pip', 'Rex']
+        assert all('encrypted_dog_name' not in dog for dog in body['dogs'])
+
+    def test_projected_pages_resume(self, aws, shelter):
+        seen, params = [], {'state': 'VA', 'fields': 'dog_color', 'limit': '2'}
+        while True:
+            body = json.loads(dogs.get_dogs(params)['body'])
+            seen += [dog['dog_id'] for dog in body['dogs']]
+            if 'next_token' not in body:
+                break
+            params['next_token'] = body['next_token']
+
+        assert sorted(seen) == sorted(dog['dog_id'] for dog in shelter)
+
+    def test_single_dog_projection_is_not_cached(self, aws, shelter):
+        rex = shelter[0]
+        dogs.dog_cache.clear()
+        with patch.object(dogs.dogs_table, 'get_item', wraps=dogs.dogs_table.get_item) as get_item:
+            result = dogs.get_dog(rex['dog_id'], {'shelter_id': rex['shelter_id'], 'fields': 'dog_color'})
+
+        assert json.loads(result['body'])['dog'] == {
+            'shelter_id': rex['shelter_id'], 'dog_id': rex['dog_id'], 'dog_color': 'Black'
+        }
+        assert 'ProjectionExpression' in get_item.call_args.kwargs
+        assert dogs.dog_cache.get((rex['shelter_id'], rex['dog_id'])) is None
+
+    def test_search_batch_reads_are_projected(self, aws, shelter):
+        with patch.object(dogs.dynamodb, 'batch_get_item',
+                          wraps=dogs.dynamodb.batch_get_item) as batch_get:
+            body = json.loads(dogs.get_dogs({'q': 'kids', 'color': 'yellow', 'fields': 'dog_weight'})['body'])
+
+        assert [set(dog) for dog in body['dogs']] == [{'shelter_id', 'dog_id', 'dog_weight'}]
+        request = batch_get.call_args.kwargs['RequestItems'][dogs.DOGS_TABLE_NAME]
+        assert 'encrypted_dog_name' not in request['ExpressionAttributeNames'].values()
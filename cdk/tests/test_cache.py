@@ -0,0 +1,85 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+import cache
+import dogs
+
+
+@pytest.fixture
+def dog_cache():
+    dogs.dog_cache.clear()
+    yield dogs.dog_cache
+    dogs.dog_cache.clear()
+
+
+class TestTTLCache:
+    """Tests for the in-process LRU/TTL cache"""
+
+    def test_lru_eviction(self):
+        lru = cache.TTLCache(max_entries=2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        lru.get('a')
+        lru.put('c', 3)
+
+        assert lru.get('b') is None
+        assert lru.get('a') == 1
+        assert lru.stats()['cache_evictions'] == 1
+
+    def test_entries_expire(self):
+        lru = cache.TTLCache(ttl_seconds=0)
+        lru.put('a', 1)
+
+        assert lru.get('a') is None
+        assert lru.stats() == {'cache_hits': 0, 'cache_misses': 1,
+                               'cache_evictions': 1, 'cache_size': 0}
+
+    def test_invalidate_only_older_versions(self):
+        lru = cache.TTLCache()
+        lru.put('a', 'v2', version=2)
+
+        assert not lru.invalidate('a', version=2)
+        assert lru.invalidate('a', version=3)
+        assert lru.get('a') is None
+
+
+class TestGetDogCache:
+    """Tests for the get_dog read-through cache and its invalidation"""
+
+    def put_dog(self, table, version=1, color='Black'):
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'd1', 'state': 'VA',
+                             'species': 'Labrador Retriever', 'dog_color': color,
+                             'created_at': '2024-01-01', 'version': version})
+
+    def test_second_read_is_served_from_cache(self, aws, dog_cache):
+        self.put_dog(aws['dogs'])
+
+        with patch.object(dogs.dogs_table, 'get_item', wraps=dogs.dogs_table.get_item) as get_item:
+            first = dogs.get_dog('d1', {'shelter_id': 'VA#A#S'})
+            second = dogs.get_dog('d1', {'shelter_id': 'VA#A#S'})
+
+        assert get_item.call_count == 1
+        assert json.loads(first['body']) == json.loads(second['body'])
+        assert dog_cache.stats()['cache_hits'] == 1
+        assert dog_cache.stats()['cache_misses'] == 1
+
+    def test_delete_invalidates_entry(self, aws, dog_cache):
+        self.put_dog(aws['dogs'])
+        dogs.get_dog('d1', {'shelter_id': 'VA#A#S'})
+
+        assert dogs.delete_dog('d1', {'shelter_id': 'VA#A#S'})['statusCode'] == 200
+
+        assert dogs.get_dog('d1', {'shelter_id': 'VA#A#S'})['statusCode'] == 404
+
+    def test_write_elsewhere_is_seen_after_ttl(self, aws, dog_cache):
+        self.put_dog(aws['dogs'])
+        with patch.object(dog_cache, 'ttl_seconds', 0):
+            dogs.get_dog('d1', {'shelter_id': 'VA#A#S'})
+        # Another container's edit
+        self.put_dog(aws['dogs'], version=2, color='Yellow')
+
+        result = dogs.get_dog('d1', {'shelter_id': 'VA#A#S'})
+
+        assert json.loads(result['body'])['dog']['dog_color'] == 'Yellow'
@@ -213,5 +213,149 @@ class TestStackSecurity:
                 if isinstance(actions, list):
                     assert "*" not in actions, f"Overly permissive IAM policy found in {policy_id}"
 
+    def test_page_tokens_signed_with_generated_secret(self):
+        """Test that pagination tokens are signed with a Secrets Manager key"""
+        self.template.resource_count_is("AWS::SecretsManager::Secret", 1)
+        functions = self.template.find_resources("AWS::Lambda::Function", {
+            "Properties": {"Handler": "dogs.handler"}
+        })
+        for function in functions.values():
+            key = function["Properties"]["Environment"]["Variables"]["PAGE_TOKEN_SIGNING_KEY"]
+            assert "{{resolve:secretsmanager:" in str(key)
+
+
+class TestNameEncryptionMode:
+    """Tests for the opt-in envelope encryption of dog names"""
+
+    @staticmethod
+    def functions(context):
+        # Skip Docker bundling; the layer's asset is still part of the template
+        app = core.App(context={**context, 'aws:cdk:bundling-stacks': []})
+        template = assertions.Template.from_stack(CdkStack(app, "test-stack"))
+        return template, template.find_resources("AWS::Lambda::Function")
+
+    def test_default_uses_kms(self):
+        template, functions = self.functions({})
+
+        template.resource_count_is("AWS::Lambda::LayerVersion", 0)
+        for function in functions.values():
+            variables = function["Properties"].get("Environment", {}).get("Variables", {})
+            assert "NAME_ENCRYPTION_MODE" not in variables
+
+    def test_envelope_mode_ships_cryptography(self):
+        template, functions = self.functions({'name_encryption_mode': 'envelope'})
+
+        template.resource_count_is("AWS::Lambda::LayerVersion", 1)
+        envelope = {
+            function["Properties"].get("Handler") for function in functions.values()
+            if function["Properties"].get("Environment", {}).get("Variables", {}).get("NAME_ENCRYPTION_MODE") == 'envelope'
+        }
+        assert envelope == {'dogs.handler', 'dogs.maintenance_handler', 'imports.worker_handler',
+                            'recommender.handler'}
+        for function in functions.values():
+            if function["Properties"].get("Handler") in envelope:
+                assert function["Properties"]["Layers"]
+
+
+class TestRecommenderBuilder:
+    """Tests for the recommender artifact's stream consumer and bucket"""
+
+    @staticmethod
+    def template():
+        app = core.App(context={'aws:cdk:bundling-stacks': []})
+        return assertions.Template.from_stack(CdkStack(app, "test-stack"))
+
+    def test_failed_batches_are_reported_and_dead_lettered(self):
+        mappings = self.template().find_resources("AWS::Lambda::EventSourceMapping", {
+            "Properties": {"BatchSize": 10000}
+        })
+        assert len(mappings) == 1
+        mapping = next(iter(mappings.values()))["Properties"]
+        assert mapping["FunctionResponseTypes"] == ["ReportBatchItemFailures"]
+        assert "OnFailure" in mapping["DestinationConfig"]
+
+    def test_only_superseded_versions_expire(self):
+        self.template().has_resource_properties("AWS::S3::Bucket", {
+            "LifecycleConfiguration": {"Rules": [assertions.Match.object_like({
+                "Prefix": "recommender/model-",
+                "TagFilters": [{"Key": "superseded", "Value": "true"}]
+            })]}
+        })
+
+
+class TestStageCache:
+    """Tests for the stage cache agreeing with the Cache-Control the function sends"""
+
+    def test_ttls_match_cache_control(self):
+        app = core.App(context={'aws:cdk:bundling-stacks': []})
+        template = assertions.Template.from_stack(CdkStack(app, "test-stack"))
+        stage = next(iter(template.find_resources("AWS::ApiGateway::Stage").values()))
+        ttls = {setting["ResourcePath"]: setting["CacheTtlInSeconds"]
+                for setting in stage["Properties"]["MethodSettings"] if setting.get("CachingEnabled")}
+        handler = next(iter(template.find_resources("AWS::Lambda::Function", {
+            "Properties": {"Handler": "dogs.handler"}
+        }).values()))
+        variables = handler["Properties"]["Environment"]["Variables"]
+
+        assert variables["DOG_CACHE_CONTROL"] == f"public, max-age={ttls['/~1dogs~1{dog_id}']}"
+        assert variables["LISTING_CACHE_CONTROL"] == f"public, max-age={ttls['/~1dogs']}"
+
+
+class TestStreamReaders:
+    """Tests for the number of consumers reading each table stream"""
+
+    def test_dogs_stream_has_at_most_two_readers(self):
+        app = core.App(context={'aws:cdk:bundling-stacks': []})
+        template = assertions.Template.from_stack(CdkStack(app, "test-stack"))
+        tables = template.find_resources("AWS::DynamoDB::Table", {
+            "Properties": {"TableName": "pupper-dogs"}
+        })
+        dogs_table = next(iter(tables))
+        mappings = template.find_resources("AWS::Lambda::EventSourceMapping")
+        readers = [mapping for mapping in mappings.values()
+                   if mapping["Properties"]["EventSourceArn"] == {"Fn::GetAtt": [dogs_table, "StreamArn"]}]
+
+        # More than two readers per shard get throttled
+        assert 0 < len(readers) <= 2
+
+
+class TestDogsTableIndexes:
+    """Tests for adding the dogs table indexes one deployment at a time"""
+
+    @staticmethod
+    def index_names(context):
+        app = core.App(context={**context, 'aws:cdk:bundling-stacks': []})
+        template = assertions.Template.from_stack(CdkStack(app, "test-stack"))
+        table = template.find_resources("AWS::DynamoDB::Table", {
+            "Properties": {"TableName": "pupper-dogs"}
+        })
+        return [index["IndexName"] for index in
+                next(iter(table.values()))["Properties"]["GlobalSecondaryIndexes"]]
+
+    @pytest.mark.parametrize('new_indexes, added', [
+        ('1', ['StateBirthDateIndex']),
+        ('2', ['StateBirthDateIndex', 'StateColorWeightIndex']),
+        (None, ['StateBirthDateIndex', 'StateColorWeightIndex', 'SpeciesPopularityIndex'])
+    ])
+    def test_staged_rollout(self, new_indexes, added):
+        context = {'dogs_table_new_indexes': new_indexes} if new_indexes else {}
+
+        assert self.index_names(context) == ['StateIndex', 'SpeciesIndex'] + added
+
+    def test_popularity_index_is_one_species_partition(self):
+        app = core.App(context={'aws:cdk:bundling-stacks': []})
+        template = assertions.Template.from_stack(CdkStack(app, "test-stack"))
+        template.has_resource_properties("AWS::DynamoDB::Table", {
+            "GlobalSecondaryIndexes": assertions.Match.array_with([
+                assertions.Match.object_like({
+                    "IndexName": "SpeciesPopularityIndex",
+                    "KeySchema": [
+                        {"AttributeName": "species", "KeyType": "HASH"},
+                        {"AttributeName": "popularity", "KeyType": "RANGE"}
+                    ]
+                })
+            ])
+        })
+
 if __name__ == '__main__':
     pytest.main([__file__])
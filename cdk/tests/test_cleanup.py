@@ -0,0 +1,116 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+import cleanup
+import dogs
+
+
+@pytest.fixture
+def rex(aws):
+    with patch.object(dogs, 'kms', aws['kms']):
+        dog = json.loads(dogs.create_dog({
+            'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': 'Rex',
+            'species': 'Labrador Retriever', 'description': 'Good with kids'
+        })['body'])['dog']
+    return dog
+
+
+def vote(aws, user_id, shelter_id, dog_id, interaction_type='wag'):
+    aws['interactions'].put_item(Item={
+        'user_id': user_id, 'dog_key': f'{shelter_id}#{dog_id}', 'shelter_id': shelter_id,
+        'dog_id': dog_id, 'interaction_type': interaction_type
+    })
+
+
+def remove_record(dog, sequence_number='1', event_name='REMOVE'):
+    return {'eventSource': 'aws:dynamodb', 'eventName': event_name, 'dynamodb': {
+        'Keys': {'shelter_id': {'S': dog['shelter_id']}, 'dog_id': {'S': dog['dog_id']}},
+        'SequenceNumber': sequence_number
+    }}
+
+
+def tombstone(aws, dog):
+    return aws['jobs'].get_item(Key={'job_id': dogs.cleanup_job_id(dog['shelter_id'], dog['dog_id'])})['Item']
+
+
+class TestDeleteDog:
+    """Tests for DELETE /dogs/{dog_id} leaving the interactions to the worker"""
+
+    def test_delete_does_not_touch_interactions(self, aws, rex):
+        vote(aws, 'u1', rex['shelter_id'], rex['dog_id'])
+
+        with patch.object(dogs.interactions_table, 'query') as query:
+            result = dogs.delete_dog(rex['dog_id'], {'shelter_id': rex['shelter_id']})
+
+        query.assert_not_called()
+        assert result['statusCode'] == 200
+        assert json.loads(result['body'])['cleanup_job_id'] == f"dog-cleanup:{rex['shelter_id']}#{rex['dog_id']}"
+        assert len(aws['interactions'].scan()['Items']) == 1
+
+
+class TestCleanupWorker:
+    """Tests for the DogsTable stream cleanup worker"""
+
+    def test_deletes_every_interaction_with_the_dog(self, aws, rex):
+        # More than one BatchWriteItem chunk
+        for index in range(60):
+            vote(aws, f'u{index}', rex['shelter_id'], rex['dog_id'], ('wag', 'growl')[index % 2])
+        vote(aws, 'u1', rex['shelter_id'], 'other-dog')
+
+        result = cleanup.stream_handler({'Records': [remove_record(rex)]}, None)
+
+        assert result == {'batchItemFailures': []}
+        remaining = aws['interactions'].scan()['Items']
+        assert [item['dog_id'] for item in remaining] == ['other-dog']
+        record = tombstone(aws, rex)
+        assert (record['status'], record['deleted_interactions']) == ('completed', 60)
+        assert record['job_type'] == 'dog_cleanup' and 'completed_at' in record
+
+    def test_index_is_read_a_page_at_a_time(self, aws, rex):
+        for index in range(60):
+            vote(aws, f'u{index}', rex['shelter_id'], rex['dog_id'])
+        deleted = []
+
+        # Moto cannot resume a query from a deleted item, so nothing is deleted here
+        def batch_write(dynamodb, table_name, requests):
+            deleted.extend(request['DeleteRequest']['Key']['user_id'] for request in requests)
+            return []
+
+        with patch.object(cleanup, 'CLEANUP_PAGE_SIZE', 40), \
+                patch.object(cleanup.dynamo_batch, 'batch_write', side_effect=batch_write) as write:
+            assert cleanup.clean_up_dog(rex['shelter_id'], rex['dog_id']) == 60
+
+        assert write.call_count == 2
+        assert sorted(deleted) == sorted(f'u{index}' for index in range(60))
+        assert tombstone(aws, rex)['deleted_interactions'] == 60
+
+    def test_redelivery_finds_nothing_left(self, aws, rex):
+        vote(aws, 'u1', rex['shelter_id'], rex['dog_id'])
+        event = {'Records': [remove_record(rex)]}
+
+        cleanup.stream_handler(event, None)
+        first = tombstone(aws, rex)
+        cleanup.stream_handler(event, None)
+
+        assert tombstone(aws, rex)['deleted_interactions'] == 1
+        assert tombstone(aws, rex)['deleted_at'] == first['deleted_at']
+
+    def test_unprocessed_deletes_are_retried_by_the_stream(self, aws, rex):
+        other = dict(rex, dog_id='other-dog')
+        vote(aws, 'u1', rex['shelter_id'], rex['dog_id'])
+        event = {'Records': [remove_record(rex, '1'), remove_record(other, '2')]}
+
+        with patch.object(cleanup.dynamo_batch, 'batch_write', side_effect=lambda _, __, requests: requests):
+            result = cleanup.stream_handler(event, None)
+
+        assert result == {'batchItemFailures': [{'itemIdentifier': '1'}]}
+        assert tombstone(aws, rex)['status'] == 'cleaning'
+
+    def test_other_changes_are_ignored(self, aws, rex):
+        vote(aws, 'u1', rex['shelter_id'], rex['dog_id'])
+
+        cleanup.stream_handler({'Records': [remove_record(rex, event_name='MODIFY')]}, None)
+
+        assert len(aws['interactions'].scan()['Items']) == 1
@@ -0,0 +1,148 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_s3
+
+import client_config
+import clients
+import dogs
+import recommender
+from tests import faults
+
+
+def context(remaining_ms=30000):
+    return SimpleNamespace(aws_request_id='request-1', get_remaining_time_in_millis=lambda: remaining_ms)
+
+
+@pytest.fixture
+def fresh_clients():
+    """Clients created by the test only, on a virtual clock"""
+    with patch.dict(clients._clients, clear=True), \
+            patch.object(client_config, '_remaining_ms', None), \
+            faults.virtual_time() as clock:
+        yield clock
+
+
+@pytest.fixture
+def rex(aws):
+    with patch.object(dogs, 'kms', aws['kms']):
+        dog = json.loads(dogs.create_dog({
+            'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': 'Rex',
+            'species': 'Labrador Retriever', 'description': 'Good with kids'
+        })['body'])['dog']
+    aws['interactions'].put_item(Item={
+        'user_id': 'u1', 'dog_key': f"{dog['shelter_id']}#{dog['dog_id']}",
+        'shelter_id': dog['shelter_id'], 'dog_id': dog['dog_id'], 'interaction_type': 'wag'
+    })
+    return dog
+
+
+def list_interactions(remaining_ms=30000):
+    return dogs.handler({
+        'httpMethod': 'GET', 'resource': '/interactions', 'path': '/interactions',
+        'queryStringParameters': {'user_id': 'u1'}
+    }, context(remaining_ms))
+
+
+def get_dog(dog):
+    return dogs.handler({
+        'httpMethod': 'GET', 'resource': '/dogs/{dog_id}', 'path': f"/dogs/{dog['dog_id']}",
+        'pathParameters': {'dog_id': dog['dog_id']},
+        'queryStringParameters': {'shelter_id': dog['shelter_id']}
+    }, context())
+
+
+class TestClientConfig:
+    """Tests for the botocore settings every client is created with"""
+
+    def test_config(self, fresh_clients):
+        config = clients.client('dynamodb').meta.config
+
+        assert config.retries == {'mode': 'adaptive', 'total_max_attempts': client_config.MAX_ATTEMPTS}
+        assert config.tcp_keepalive
+        assert config.max_pool_connections >= max(dogs.KMS_MAX_WORKERS, dogs.SCAN_SEGMENTS, 10)
+
+    @pytest.mark.parametrize('remaining_ms', [30000, 60000, 300000])
+    def test_attempts_fit_in_the_remaining_time(self, remaining_ms):
+        connect_timeout, read_timeout = client_config.timeouts(remaining_ms)
+
+        worst_case = (client_config.MAX_ATTEMPTS * (connect_timeout + read_timeout)
+                      + client_config.backoff_allowance(client_config.MAX_ATTEMPTS))
+        assert worst_case * 1000 <= remaining_ms - client_config.RESPONSE_RESERVE_MS
+        assert read_timeout <= client_config.READ_TIMEOUT_SECONDS
+
+    def test_timeouts_are_bounded(self):
+        assert client_config.timeouts(None) == (client_config.CONNECT_TIMEOUT_SECONDS,
+                                                client_config.READ_TIMEOUT_SECONDS)
+        assert client_config.timeouts(100) == (client_config.MIN_TIMEOUT_SECONDS,
+                                               client_config.MIN_TIMEOUT_SECONDS)
+
+    def test_clients_take_timeouts_from_the_invocation(self, aws, rex, fresh_clients):
+        assert list_interactions(remaining_ms=15000)['statusCode'] == 200
+
+        config = clients.client('dynamodb').meta.config
+        assert (config.connect_timeout, config.read_timeout) == client_config.timeouts(15000)
+
+    def test_recommender_clients_take_timeouts_from_the_invocation(self, aws, tmp_path, fresh_clients):
+        with mock_s3():
+            boto3.client('s3').create_bucket(Bucket='test-recommender')
+            with patch.object(recommender, 'RECOMMENDER_BUCKET_NAME', 'test-recommender'), \
+                    patch.object(recommender, 'MODEL_DIR', str(tmp_path)), \
+                    patch.object(recommender, '_model', None), \
+                    patch.object(recommender, '_model_checked_at', float('-inf')):
+                result = recommender.handler({'queryStringParameters': {'user_id': 'u1'}}, context(15000))
+
+        # No artifact yet, but the manifest was read with the invocation's client
+        assert result['statusCode'] == 503
+        config = clients.client('s3').meta.config
+        assert (config.connect_timeout, config.read_timeout) == client_config.timeouts(15000)
+
+
+class TestThrottling:
+    """Tests for throttled AWS calls, using the fault-injection harness"""
+
+    def test_throttled_reads_are_retried(self, aws, rex, fresh_clients):
+        with faults.throttle(clients.client('dynamodb'), failures=2, operations=['Query']) as fault:
+            response = list_interactions()
+
+        assert response['statusCode'] == 200
+        assert len(json.loads(response['body'])['interactions']) == 1
+        assert (fault.throttled, fault.requests) == (2, 3)
+        assert len(fresh_clients.backoffs) == 2
+
+    def test_throttling_slows_the_client_down(self, aws, rex, fresh_clients):
+        dynamodb = clients.client('dynamodb')
+        with faults.throttle(dynamodb, failures=1, operations=['Query']):
+            list_interactions()
+        waited = fresh_clients.waited
+
+        for _ in range(5):
+            assert list_interactions()['statusCode'] == 200
+
+        # The rate limiter paces requests that follow a throttling error
+        assert fresh_clients.waited > waited
+
+    def test_unthrottled_client_is_not_rate_limited(self, aws, rex, fresh_clients):
+        for _ in range(5):
+            assert list_interactions()['statusCode'] == 200
+
+        assert fresh_clients.waited == 0 and fresh_clients.backoffs == []
+
+    def test_persistent_throttling_gives_up_after_max_attempts(self, aws, rex, fresh_clients):
+        with faults.throttle(clients.client('dynamodb'), failures=100, operations=['Query']) as fault:
+            response = list_interactions()
+
+        assert response['statusCode'] == 500
+        assert fault.requests == client_config.MAX_ATTEMPTS
+
+    def test_throttled_kms_decrypt_is_retried(self, aws, rex, fresh_clients):
+        dogs.dog_cache.clear()
+        with faults.throttle(clients.client('kms'), failures=1, operations=['Decrypt']) as fault:
+            response = get_dog(rex)
+
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['dog']['dog_name'] == 'Rex'
+        assert fault.throttled == 1
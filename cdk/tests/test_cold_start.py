@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+from decimal import Decimal
+
+import pytest
+from boto3.dynamodb.types import Binary, TypeDeserializer, TypeSerializer
+
+import ddb
+from benchmarks.bench_cold_start import measure
+
+CDK_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+# Generous budgets: they catch a client or heavy import creeping back into
+# module scope, not ordinary machine noise
+IMPORT_BUDGET_MS = 500
+FIRST_INVOCATION_BUDGET_MS = 2000
+
+IMPORT_DOGS = '''
+import json, sys, time
+sys.path.insert(0, 'functions')
+started = time.perf_counter()
+import dogs
+import clients
+print(json.dumps({
+    'import_ms': (time.perf_counter() - started) * 1000,
+    'boto3_imported': 'boto3' in sys.modules,
+    'clients': clients.created()
+}))
+'''
+
+
+class TestColdStart:
+    """Tests for the dogs Lambda cold start staying within budget"""
+
+    def test_import_creates_no_clients(self):
+        env = dict(os.environ, AWS_DEFAULT_REGION='us-east-1')
+        output = subprocess.run([sys.executable, '-c', IMPORT_DOGS], cwd=CDK_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output)
+
+        assert result['clients'] == []
+        assert not result['boto3_imported']
+        assert result['import_ms'] < IMPORT_BUDGET_MS
+
+    @pytest.mark.parametrize('route, services', [
+        ('GET /interactions', ['dynamodb']),
+        ('GET /dogs/{dog_id}', ['dynamodb', 'kms'])
+    ])
+    def test_first_invocation_creates_only_the_clients_it_needs(self, route, services):
+        result = measure('lazy', route)
+
+        assert result['status'] == 200
+        assert result['clients'] == services
+        assert result['init_ms'] < IMPORT_BUDGET_MS
+        assert result['first_ms'] < FIRST_INVOCATION_BUDGET_MS
+
+
+class TestSerialization:
+    """Tests for ddb matching boto3's TypeSerializer and TypeDeserializer"""
+
+    ITEM = {
+        'name': 'Rex', 'weight': Decimal('32.5'), 'count': 3, 'good': True, 'owner': None,
+        'tags': {'calm', 'kids'}, 'scores': {Decimal('1'), Decimal('2')}, 'blob': b'\x00\x01',
+        'history': [{'at': '2024-01-01', 'votes': Decimal('4')}, 'x']
+    }
+
+    def test_matches_boto3(self):
+        serializer, deserializer = TypeSerializer(), TypeDeserializer()
+        serialized = ddb.serialize_item(self.ITEM)
+        expected = {name: serializer.serialize(value) for name, value in self.ITEM.items()}
+
+        # boto3 wraps binary values in Binary; the client accepts either
+        assert serialized['blob'] == {'B': b'\x00\x01'}
+        assert {name: value for name, value in serialized.items() if name not in ('tags', 'scores', 'blob')} == \
+            {name: value for name, value in expected.items() if name not in ('tags', 'scores', 'blob')}
+        assert sorted(serialized['tags']['SS']) == sorted(expected['tags']['SS'])
+        assert sorted(serialized['scores']['NS']) == sorted(expected['scores']['NS'])
+        deserialized = {name: deserializer.deserialize(value) for name, value in expected.items()}
+        assert ddb.deserialize_item(serialized) == dict(deserialized, blob=b'\x00\x01')
+
+    def test_rejects_floats(self):
+        with pytest.raises(TypeError):
+            ddb.serialize(1.5)
+
+    def test_unknown_types_fall_back_to_boto3(self):
+        assert ddb.serialize(Binary(b'x')) == TypeSerializer().serialize(Binary(b'x'))
@@ -0,0 +1,116 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+import api_responses
+import dogs
+
+
+@pytest.fixture
+def rex(aws):
+    with patch.object(dogs, 'kms', aws['kms']):
+        dog = json.loads(dogs.create_dog({
+            'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': 'Rex',
+            'species': 'Labrador Retriever', 'description': 'Good with kids'
+        })['body'])['dog']
+    dogs.dog_cache.clear()
+    yield dog
+    dogs.dog_cache.clear()
+
+
+def dog_event(dog, headers=None):
+    return {'httpMethod': 'GET', 'path': f"/dogs/{dog['dog_id']}",
+            'pathParameters': {'dog_id': dog['dog_id']},
+            'queryStringParameters': {'shelter_id': dog['shelter_id']},
+            'headers': headers, 'body': None}
+
+
+class TestEtagMatching:
+    """Tests for If-None-Match comparison"""
+
+    @pytest.mark.parametrize('if_none_match, expected', [
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('"other", W/"abc"', True),
+        ('*', True),
+        ('"other"', False),
+        (None, False)
+    ])
+    def test_weak_comparison(self, if_none_match, expected):
+        assert api_responses.etag_matches(if_none_match, 'W/"abc"') is expected
+
+
+class TestGetDog:
+    """Tests for conditional GET /dogs/{dog_id}"""
+
+    def test_unchanged_dog_is_not_modified(self, aws, rex):
+        with patch.object(dogs, 'kms', aws['kms']):
+            first = dogs.handler(dog_event(rex), None)
+        etag = first['headers']['ETag']
+
+        # Served once from DynamoDB and once from the warm-container cache
+        for _ in range(2):
+            with patch.object(dogs, 'decrypt_dog_names') as decrypt:
+                again = dogs.handler(dog_event(rex, {'If-None-Match': etag}), None)
+            assert (again['statusCode'], again['body']) == (304, '')
+            assert again['headers']['ETag'] == etag
+            decrypt.assert_not_called()
+        dogs.dog_cache.clear()
+
+        assert first['statusCode'] == 200
+        assert first['headers']['Cache-Control'] == dogs.DOG_CACHE_CONTROL
+
+    def test_counter_updates_change_the_etag(self, aws, rex):
+        with patch.object(dogs, 'kms', aws['kms']):
+            before = dogs.get_dog(rex['dog_id'], {'shelter_id': rex['shelter_id']})['headers']['ETag']
+            dogs.dog_cache.clear()
+            # Counters are updated without bumping version
+            aws['dogs'].update_item(Key={'shelter_id': rex['shelter_id'], 'dog_id': rex['dog_id']},
+                                    UpdateExpression='ADD wag_count :one, popularity :one',
+                                    ExpressionAttributeValues={':one': 1})
+
+            after = dogs.get_dog(rex['dog_id'], {'shelter_id': rex['shelter_id']}, before)
+
+        assert after['statusCode'] == 200
+        assert after['headers']['ETag'] != before
+
+    def test_fields_change_the_etag(self, aws, rex):
+        params = {'shelter_id': rex['shelter_id']}
+        with patch.object(dogs, 'kms', aws['kms']):
+            full = dogs.get_dog(rex['dog_id'], params)['headers']['ETag']
+            projected = dogs.get_dog(rex['dog_id'], dict(params, fields='description'), full)
+
+        assert projected['statusCode'] == 200
+        assert projected['headers']['ETag'] != full
+
+
+class TestGetDogs:
+    """Tests for conditional listings"""
+
+    def test_unchanged_listing_is_not_modified(self, aws, rex):
+        with patch.object(dogs, 'kms', aws['kms']):
+            first = dogs.get_dogs({'state': 'VA'})
+        etag = first['headers']['ETag']
+
+        with patch.object(dogs, 'decrypt_dog_names') as decrypt:
+            again = dogs.get_dogs({'state': 'VA'}, etag)
+        with patch.object(dogs, 'kms', aws['kms']):
+            searched = dogs.get_dogs({'q': 'kids'}, etag)
+
+        assert again['statusCode'] == 304
+        assert first['headers']['Cache-Control'] == dogs.LISTING_CACHE_CONTROL
+        decrypt.assert_not_called()
+        # A search over the same dogs is a different listing
+        assert searched['statusCode'] == 200
+
+    def test_new_dog_changes_the_etag(self, aws, rex):
+        with patch.object(dogs, 'kms', aws['kms']):
+            etag = dogs.get_dogs({'state': 'VA'})['headers']['ETag']
+            dogs.create_dog({'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': 'Bolt',
+                             'species': 'Labrador Retriever', 'description': 'Calm'})
+
+            result = dogs.get_dogs({'state': 'VA'}, etag)
+
+        assert result['statusCode'] == 200
+        assert json.loads(result['body'])['count'] == 2
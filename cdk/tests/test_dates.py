@@ -0,0 +1,124 @@
+import json
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+import dates
+import dogs
+from tests.conftest import segmented
+
+
+def years_ago(years, today=None):
+    return dates.months_before(today or date.today(), years * 12)
+
+
+class TestNormalizeDate:
+    """Tests for shelter date normalization"""
+
+    @pytest.mark.parametrize('raw, iso', [
+        ('2020-05-10', '2020-05-10'),
+        ('2020/5/10', '2020-05-10'),
+        ('2020-05-10T08:30:00Z', '2020-05-10'),
+        ('4/23/2014', '2014-04-23'),
+        ('04-23-14', '2014-04-23'),
+        ('May 10, 2020', '2020-05-10'),
+        ('Sept. 3rd 2019', '2019-09-03'),
+        ('3 March 2018', '2018-03-03')
+    ])
+    def test_formats(self, raw, iso):
+        assert dates.normalize_date(raw) == iso
+
+    @pytest.mark.parametrize('raw', ['unknown', '2/30/2020', '13/1/2020', '', None, 2020])
+    def test_unrecognized_values(self, raw):
+        assert dates.normalize_date(raw) is None
+
+    def test_two_digit_years_are_never_in_the_future(self):
+        today = date(2024, 6, 1)
+
+        assert dates.parse_date('1/1/24', today) == date(2024, 1, 1)
+        assert dates.parse_date('1/1/30', today) == date(1930, 1, 1)
+
+
+class TestBirthDateRange:
+    """Tests for translating age bounds into birth-date bounds"""
+
+    def test_whole_years_extend_to_next_birthday(self):
+        today = date(2024, 6, 15)
+
+        assert dates.birth_date_range('2', '5', today) == ('2018-06-16', '2022-06-15')
+
+    def test_fractional_ages(self):
+        assert dates.birth_date_range('0.5', None, date(2024, 8, 31)) == (None, '2024-02-29')
+
+    @pytest.mark.parametrize('min_age, max_age', [('old', None), ('-1', None), ('5', '2')])
+    def test_invalid_bounds(self, min_age, max_age):
+        with pytest.raises(ValueError):
+            dates.birth_date_range(min_age, max_age)
+
+
+class TestAgeFilters:
+    """Tests for min_age/max_age listings and the date backfill"""
+
+    def put_dogs(self, table):
+        for dog_id, age, state in [('puppy', 0, 'VA'), ('young', 2, 'VA'), ('adult', 6, 'VA'),
+                                   ('senior', 11, 'VA'), ('other-state', 2, 'MD')]:
+            table.put_item(Item={
+                'shelter_id': f'{state}#A#S', 'dog_id': dog_id, 'state': state,
+                'species': 'Labrador Retriever', 'created_at': '2024-01-01',
+                'birth_date': (years_ago(age) if age else date.today()).isoformat()
+            })
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'no-birthday', 'state': 'VA',
+                             'species': 'Labrador Retriever', 'created_at': '2024-01-01'})
+
+    def test_state_listing_queries_birth_date_index(self, aws):
+        self.put_dogs(aws['dogs'])
+
+        with patch.object(dogs.dogs_table, 'query', wraps=dogs.dogs_table.query) as query:
+            result = dogs.get_dogs({'state': 'VA', 'min_age': '1', 'max_age': '6'})
+
+        body = json.loads(result['body'])
+        assert sorted(dog['dog_id'] for dog in body['dogs']) == ['adult', 'young']
+        request = query.call_args.kwargs
+        assert request['IndexName'] == 'StateBirthDateIndex'
+        assert 'BETWEEN' in request['KeyConditionExpression']
+
+    def test_scan_listing_pushes_down_birth_date_range(self, aws):
+        self.put_dogs(aws['dogs'])
+
+        with patch.object(dogs.dogs_table, 'scan', side_effect=segmented(dogs.dogs_table.scan)):
+            result = dogs.get_dogs({'max_age': '2'})
+
+        body = json.loads(result['body'])
+        assert sorted(dog['dog_id'] for dog in body['dogs']) == ['other-state', 'puppy', 'young']
+
+    def test_invalid_age_is_rejected(self, aws):
+        assert dogs.get_dogs({'min_age': 'puppy'})['statusCode'] == 400
+
+    def test_create_stores_iso_dates(self):
+        item = dogs.build_dog_item({
+            'shelter': 'Arlington Shelter', 'city': 'Arlington', 'state': 'VA',
+            'dog_name': 'Buddy', 'species': 'Labrador Retriever', 'description': 'Good dog',
+            'dog_birthday': '4/23/2014', 'shelter_entry_date': 'sometime last year'
+        }, 'encrypted')
+
+        assert item['dog_birthday'] == item['birth_date'] == '2014-04-23'
+        assert item['shelter_entry_date'] == 'sometime last year'
+
+    def test_backfill_rewrites_legacy_dates(self, aws):
+        table = aws['dogs']
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'legacy', 'state': 'VA',
+                             'dog_birthday': '4/23/2014', 'shelter_entry_date': 'May 1, 2020',
+                             'version': 1})
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'current', 'state': 'VA',
+                             'dog_birthday': '2014-04-23', 'birth_date': '2014-04-23'})
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'garbled', 'state': 'VA',
+                             'dog_birthday': 'unknown'})
+
+        stats = dogs.maintenance_handler({'task': 'normalize_dog_dates'}, None)
+
+        assert stats == {'scanned': 3, 'updated': 1, 'skipped': 2, 'unparseable': 1, 'failed': 0}
+        legacy = table.get_item(Key={'shelter_id': 'VA#A#S', 'dog_id': 'legacy'})['Item']
+        assert legacy['dog_birthday'] == legacy['birth_date'] == '2014-04-23'
+        assert legacy['shelter_entry_date'] == '2020-05-01'
+        assert legacy['version'] == 2
@@ -0,0 +1,197 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+import dogs
+import dynamo_batch
+
+
+def dog(name, **overrides):
+    record = {
+        'shelter': 'Arlington Shelter',
+        'city': 'Arlington',
+        'state': 'VA',
+        'dog_name': name,
+        'species': 'Labrador Retriever',
+        'description': 'Good dog',
+        'dog_weight': '45 lbs'
+    }
+    record.update(overrides)
+    return record
+
+
+def client_error(code, status=400):
+    return ClientError({'Error': {'Code': code, 'Message': code},
+                        'ResponseMetadata': {'HTTPStatusCode': status}}, 'BatchWriteItem')
+
+
+def batch_event(body):
+    return {'httpMethod': 'POST', 'path': '/dogs/batch', 'pathParameters': None,
+            'queryStringParameters': None, 'body': body}
+
+
+class TestBatchWrite:
+    """Tests for chunked batch writes with UnprocessedItems retries"""
+
+    def test_chunks_of_25(self):
+        client = MagicMock()
+        client.batch_write_item.return_value = {'UnprocessedItems': {}}
+        requests = [{'PutRequest': {'Item': {'id': i}}} for i in range(60)]
+
+        failed = dynamo_batch.batch_write(client, 'dogs', requests)
+
+        assert failed == []
+        assert [len(call.kwargs['RequestItems']['dogs'])
+                for call in client.batch_write_item.call_args_list] == [25, 25, 10]
+
+    def test_unprocessed_items_are_retried_with_backoff(self):
+        client = MagicMock()
+        requests = [{'PutRequest': {'Item': {'id': i}}} for i in range(3)]
+        client.batch_write_item.side_effect = [
+            {'UnprocessedItems': {'dogs': requests[1:]}},
+            {'UnprocessedItems': {'dogs': requests[2:]}},
+            {'UnprocessedItems': {}}
+        ]
+
+        with patch('dynamo_batch.time.sleep') as sleep:
+            failed = dynamo_batch.batch_write(client, 'dogs', requests)
+
+        assert failed == []
+        assert sleep.call_count == 2
+        assert client.batch_write_item.call_args_list[1].kwargs['RequestItems']['dogs'] == requests[1:]
+
+    def test_gives_up_after_max_attempts(self):
+        client = MagicMock()
+        requests = [{'PutRequest': {'Item': {'id': 1}}}]
+        client.batch_write_item.return_value = {'UnprocessedItems': {'dogs': requests}}
+
+        with patch('dynamo_batch.time.sleep'):
+            failed = dynamo_batch.batch_write(client, 'dogs', requests, max_attempts=3)
+
+        assert failed == requests
+        assert client.batch_write_item.call_count == 3
+
+    def test_throttled_batch_is_retried_with_backoff(self):
+        client = MagicMock()
+        requests = [{'PutRequest': {'Item': {'id': 1}}}]
+        client.batch_write_item.side_effect = [
+            client_error('ProvisionedThroughputExceededException'),
+            client_error('InternalServerError', 500),
+            {'UnprocessedItems': {}}
+        ]
+
+        with patch('dynamo_batch.time.sleep') as sleep:
+            failed = dynamo_batch.batch_write(client, 'dogs', requests)
+
+        assert failed == []
+        assert sleep.call_count == 2
+
+    def test_validation_error_is_not_retried(self):
+        client = MagicMock()
+        requests = [{'PutRequest': {'Item': {'id': 1}}}]
+        client.batch_write_item.side_effect = client_error('ValidationException')
+
+        with patch('dynamo_batch.time.sleep') as sleep:
+            failed = dynamo_batch.batch_write(client, 'dogs', requests)
+
+        assert failed == requests
+        assert client.batch_write_item.call_count == 1
+        sleep.assert_not_called()
+
+
+class TestBatchGet:
+    """Tests for chunked batch reads with UnprocessedKeys retries"""
+
+    def test_chunks_of_100_with_retries(self):
+        client = MagicMock()
+        keys = [{'id': i} for i in range(150)]
+        client.batch_get_item.side_effect = [
+            {'Responses': {'dogs': keys[:90]}, 'UnprocessedKeys': {'dogs': {'Keys': keys[90:100]}}},
+            {'Responses': {'dogs': keys[90:100]}, 'UnprocessedKeys': {}},
+            {'Responses': {'dogs': keys[100:]}, 'UnprocessedKeys': {}}
+        ]
+
+        with patch('dynamo_batch.time.sleep') as sleep:
+            items, failed = dynamo_batch.batch_get(client, 'dogs', keys)
+
+        assert (items, failed) == (keys, [])
+        assert sleep.call_count == 1
+        assert [len(call.kwargs['RequestItems']['dogs']['Keys'])
+                for call in client.batch_get_item.call_args_list] == [100, 10, 50]
+
+    def test_gives_up_after_max_attempts(self):
+        client = MagicMock()
+        keys = [{'id': 1}]
+        client.batch_get_item.return_value = {'Responses': {}, 'UnprocessedKeys': {'dogs': {'Keys': keys}}}
+
+        with patch('dynamo_batch.time.sleep'):
+            items, failed = dynamo_batch.batch_get(client, 'dogs', keys, max_attempts=2)
+
+        assert (items, failed) == ([], keys)
+
+    def test_throttled_batch_is_retried(self):
+        client = MagicMock()
+        keys = [{'id': 1}]
+        client.batch_get_item.side_effect = [
+            client_error('ThrottlingException'),
+            {'Responses': {'dogs': keys}, 'UnprocessedKeys': {}}
+        ]
+
+        with patch('dynamo_batch.time.sleep') as sleep:
+            items, failed = dynamo_batch.batch_get(client, 'dogs', keys)
+
+        assert (items, failed) == (keys, [])
+        assert sleep.call_count == 1
+
+
+class TestCreateDogsBatch:
+    """Tests for POST /dogs/batch"""
+
+    def test_json_array_upload(self, aws):
+        records = [dog(f'Dog {i}') for i in range(30)] + [dog('Rex', species='Poodle')]
+
+        with patch.object(dogs, 'kms', aws['kms']):
+            result = dogs.handler(batch_event(json.dumps(records)), None)
+
+        body = json.loads(result['body'])
+        assert result['statusCode'] == 207
+        assert body['created'] == 30
+        rejected = body['results'][30]
+        assert rejected.pop('quarantine_id')
+        assert rejected == {'index': 30, 'status': 'rejected',
+                            'error': 'Only Labrador Retrievers are accepted'}
+        assert aws['dogs'].scan()['Count'] == 30
+        assert aws['quarantine'].scan()['Items'][0]['species_raw'] == 'Poodle'
+        stored = aws['dogs'].get_item(Key={'shelter_id': body['results'][0]['shelter_id'],
+                                           'dog_id': body['results'][0]['dog_id']})['Item']
+        assert stored['dog_weight'] == 45
+        with patch.object(dogs, 'kms', aws['kms']):
+            assert dogs.decrypt_dog_name(stored['encrypted_dog_name']) == 'Dog 0'
+
+    def test_ndjson_upload(self, aws):
+        body = '\n'.join(json.dumps(dog(name)) for name in ('Buddy', 'Fido')) + '\n'
+
+        with patch.object(dogs, 'kms', aws['kms']):
+            result = dogs.handler(batch_event(body), None)
+
+        assert result['statusCode'] == 201
+        assert [r['status'] for r in json.loads(result['body'])['results']] == ['created'] * 2
+
+    def test_unprocessed_items_are_reported(self, aws):
+        records = [dog('Buddy'), dog('Fido')]
+
+        def fail_second(dynamodb, table_name, requests):
+            return requests[1:]
+
+        with patch.object(dogs, 'kms', aws['kms']), \
+                patch('dogs.dynamo_batch.batch_write', side_effect=fail_second):
+            result = dogs.create_dogs_batch(json.dumps(records))
+
+        statuses = [r['status'] for r in json.loads(result['body'])['results']]
+        assert result['statusCode'] == 207
+        assert statuses == ['created', 'failed']
+
+    def test_invalid_body(self, aws):
+        assert dogs.create_dogs_batch('{not json')['statusCode'] == 400
+        assert dogs.create_dogs_batch('')['statusCode'] == 400
@@ -219,6 +219,113 @@ class TestDogsHandler:
         decrypted = decrypt_dog_name(encrypted)
         assert decrypted == 'TestDog'
 
+class TestBatchDecryption:
+    """Tests for the concurrent batch decryption stage"""
+
+    def test_decrypt_dog_names_preserves_order_and_deduplicates(self, aws):
+        """Names come back in order and each distinct ciphertext is decrypted once"""
+        import dogs
+
+        with patch.object(dogs, 'kms', aws['kms']):
+            ciphertexts = {name: dogs.encrypt_dog_name(name) for name in ('Buddy', 'Rex', 'Fido')}
+            items = [{'dog_id': str(i), 'encrypted_dog_name': ciphertexts[name]}
+                     for i, name in enumerate(['Buddy', 'Rex', 'Buddy', 'Fido', 'Rex'])]
+
+            with patch.object(aws['kms'], 'decrypt', wraps=aws['kms'].decrypt) as decrypt:
+                result = dogs.decrypt_dog_names(items)
+
+        assert [item['dog_name'] for item in result] == ['Buddy', 'Rex', 'Buddy', 'Fido', 'Rex']
+        assert [item['dog_id'] for item in result] == ['0', '1', '2', '3', '4']
+        assert all('encrypted_dog_name' not in item for item in result)
+        assert decrypt.call_count == 3
+
+    def test_decrypt_dog_names_falls_back_per_item(self, aws):
+        """A single undecryptable name does not fail the whole listing"""
+        import dogs
+
+        with patch.object(dogs, 'kms', aws['kms']):
+            good = dogs.encrypt_dog_name('Buddy')
+            items = [{'encrypted_dog_name': good}, {'encrypted_dog_name': 'bm90LWEta2V5'}, {}]
+            dogs.decrypt_dog_names(items)
+
+        assert items[0]['dog_name'] == 'Buddy'
+        assert items[1]['dog_name'] == 'Name unavailable'
+        assert items[2] == {}
+
+class TestDogFilters:
+    """Tests for the listing filter compiler"""
+
+    def test_weight_and_color_are_pushed_down(self):
+        """Weight bounds become a FilterExpression; colour matching stays residual"""
+        from decimal import Decimal
+        import dogs
+
+        filters = dogs.compile_dog_filters({'min_weight': '40', 'max_weight': '60', 'color': 'Brown'})
+        request = filters.apply({
+            'KeyConditionExpression': '#state = :state',
+            'ExpressionAttributeNames': {'#state': 'state'},
+            'ExpressionAttributeValues': {':state': 'VA'}
+        })
+
+        assert '#dog_weight >= :min_weight' in request['FilterExpression']
+        assert '#dog_weight <= :max_weight' in request['FilterExpression']
+        assert 'attribute_exists(#dog_color)' in request['FilterExpression']
+        assert request['ExpressionAttributeValues'] == {
+            ':state': 'VA', ':min_weight': Decimal('40.0'), ':max_weight': Decimal('60.0')
+        }
+        assert filters.matches({'species': 'Labrador', 'dog_color': 'Light brown'})
+        assert not filters.matches({'species': 'Labrador', 'dog_color': 'Black'})
+
+    def test_invalid_weight_is_rejected(self):
+        import dogs
+
+        with pytest.raises(ValueError):
+            dogs.compile_dog_filters({'min_weight': 'heavy'})
+
+    @pytest.mark.parametrize('value', ['nan', 'inf', '-Infinity'])
+    def test_non_finite_weight_is_rejected(self, value):
+        import dogs
+
+        with pytest.raises(ValueError, match='must be a number'):
+            dogs.compile_dog_filters({'max_weight': value})
+        assert dogs.get_dogs({'min_weight': value})['statusCode'] == 400
+
+    def test_get_dogs_filters_in_dynamodb(self, aws):
+        """Only matching items are transferred from DynamoDB"""
+        from decimal import Decimal
+        import dogs
+
+        for i, (weight, color) in enumerate([(30, 'Black'), (45, 'Chocolate Brown'),
+                                             (50, 'Yellow'), (70, 'Brown'), (None, 'Brown'),
+                                             (55, 'Light brown')]):
+            item = {'shelter_id': 'VA#A#S', 'dog_id': str(i), 'state': 'VA',
+                    'species': 'Labrador Retriever', 'created_at': f'2024-01-0{i + 1}',
+                    'dog_color': color, 'state_color': f'VA#{dogs.color_family(color)}'}
+            if weight is not None:
+                item['dog_weight'] = Decimal(weight)
+            aws['dogs'].put_item(Item=item)
+
+        with patch.object(dogs.dogs_table, 'query', wraps=dogs.dogs_table.query) as query:
+            result = dogs.get_dogs({'state': 'VA', 'min_weight': '40', 'max_weight': '60',
+                                    'color': 'brown'})
+            request = dict(query.call_args.kwargs)
+            returned = query(**request)
+
+        body = json.loads(result['body'])
+        assert result['statusCode'] == 200
+        assert sorted(dog['dog_id'] for dog in body['dogs']) == ['1', '5']
+        # The weight range and colour family are served by the index key
+        assert request['IndexName'] == 'StateColorWeightIndex'
+        assert returned['Count'] == 2
+        assert returned['ScannedCount'] == 2
+
+    def test_get_dogs_rejects_bad_weight(self, aws):
+        import dogs
+
+        result = dogs.get_dogs({'max_weight': 'lots'})
+
+        assert result['statusCode'] == 400
+
 class TestAPIIntegration:
     """Integration tests for the complete API"""
     
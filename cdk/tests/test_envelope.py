@@ -0,0 +1,90 @@
+import base64
+from unittest.mock import patch
+
+import pytest
+
+import dogs
+import envelope
+
+
+class TestEnvelopeEncryption:
+    """Test suite for envelope encryption of dog names"""
+
+    def test_round_trip_uses_one_data_key(self, aws):
+        """Many names are sealed with a single GenerateDataKey call"""
+        cache = envelope.DataKeyCache()
+        with patch.object(aws['kms'], 'generate_data_key',
+                          wraps=aws['kms'].generate_data_key) as generate:
+            tokens = [envelope.encrypt(cache, aws['kms'], aws['key_id'], f'Dog {i}')
+                      for i in range(20)]
+
+        assert generate.call_count == 1
+        assert all(envelope.is_envelope(token) for token in tokens)
+        assert [envelope.decrypt(cache, aws['kms'], token) for token in tokens] == \
+            [f'Dog {i}' for i in range(20)]
+
+    def test_data_key_rotates_after_max_uses(self, aws):
+        """The cached data key is replaced once its usage budget is spent"""
+        cache = envelope.DataKeyCache(max_uses=2)
+        first = envelope.encrypt(cache, aws['kms'], aws['key_id'], 'Buddy')
+        second = envelope.encrypt(cache, aws['kms'], aws['key_id'], 'Rex')
+        third = envelope.encrypt(cache, aws['kms'], aws['key_id'], 'Fido')
+
+        assert first.split(':')[1] == second.split(':')[1]
+        assert first.split(':')[1] != third.split(':')[1]
+
+    def test_data_key_expires(self, aws):
+        """The cached data key is replaced once it is older than max_age_seconds"""
+        cache = envelope.DataKeyCache(max_age_seconds=0)
+        first = envelope.encrypt(cache, aws['kms'], aws['key_id'], 'Buddy')
+        second = envelope.encrypt(cache, aws['kms'], aws['key_id'], 'Rex')
+
+        assert first.split(':')[1] != second.split(':')[1]
+
+    def test_decrypt_unwraps_each_data_key_once(self, aws):
+        """A cold container unwraps a data key through KMS once and then caches it"""
+        tokens = [envelope.encrypt(envelope.DataKeyCache(), aws['kms'], aws['key_id'], name)
+                  for name in ('Buddy',)]
+        tokens += [tokens[0]] * 5
+
+        cold_cache = envelope.DataKeyCache()
+        with patch.object(aws['kms'], 'decrypt', wraps=aws['kms'].decrypt) as decrypt:
+            names = [envelope.decrypt(cold_cache, aws['kms'], token) for token in tokens]
+
+        assert names == ['Buddy'] * 6
+        assert decrypt.call_count == 1
+
+    def test_dogs_decrypts_legacy_and_envelope_names(self, aws):
+        """decrypt_dog_name accepts both per-record KMS ciphertexts and envelope tokens"""
+        with patch.object(dogs, 'kms', aws['kms']):
+            legacy = base64.b64encode(aws['kms'].encrypt(
+                KeyId=aws['key_id'], Plaintext=b'Buddy')['CiphertextBlob']).decode('utf-8')
+            with patch.object(dogs, 'NAME_ENCRYPTION_MODE', 'envelope'):
+                sealed = dogs.encrypt_dog_name('Rex')
+
+            assert envelope.is_envelope(sealed)
+            assert dogs.decrypt_dog_name(legacy) == 'Buddy'
+            assert dogs.decrypt_dog_name(sealed) == 'Rex'
+
+    def test_migrate_rewraps_legacy_items(self, aws):
+        """The migration helper converts legacy ciphertexts and leaves envelope tokens alone"""
+        with patch.object(dogs, 'kms', aws['kms']):
+            legacy = dogs.encrypt_dog_name('Buddy')
+            sealed = envelope.encrypt(dogs.data_key_cache, aws['kms'], aws['key_id'], 'Rex')
+            aws['dogs'].put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': '1',
+                                       'encrypted_dog_name': legacy})
+            aws['dogs'].put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': '2',
+                                       'encrypted_dog_name': sealed})
+
+            stats = dogs.migrate_dog_name_encryption()
+
+            assert stats == {'scanned': 2, 'rewrapped': 1, 'skipped': 1, 'failed': 0}
+            migrated = aws['dogs'].get_item(
+                Key={'shelter_id': 'VA#A#S', 'dog_id': '1'})['Item']['encrypted_dog_name']
+            assert envelope.is_envelope(migrated)
+            assert dogs.decrypt_dog_name(migrated) == 'Buddy'
+
+    def test_maintenance_handler_rejects_unknown_task(self):
+        """Unknown maintenance tasks fail loudly"""
+        with pytest.raises(ValueError):
+            dogs.maintenance_handler({'task': 'nope'}, None)
@@ -0,0 +1,175 @@
+import json
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_s3, mock_sns, mock_sqs
+
+import dogs
+import imports
+
+CSV_HEADER = 'shelter,city,state,dog_name,species,description,dog_weight,dog_color\n'
+
+
+def csv_row(name, species='Labrador Retriever', weight='45 lbs'):
+    return f'Arlington Shelter,Arlington,VA,{name},{species},Good dog,{weight},Black\n'
+
+
+def s3_event(bucket, key, sequencer='0055AED6DCD90281E5'):
+    return {'Records': [{'eventSource': 'aws:s3',
+                         's3': {'bucket': {'name': bucket},
+                                'object': {'key': key, 'sequencer': sequencer}}}]}
+
+
+@pytest.fixture
+def pipeline(aws):
+    """Moto S3 bucket, SQS queue and SNS topic wired into the imports module"""
+    with mock_s3(), mock_sqs(), mock_sns():
+        s3 = boto3.client('s3')
+        sqs = boto3.client('sqs')
+        sns = boto3.client('sns')
+        s3.create_bucket(Bucket='imports-bucket')
+        queue_url = sqs.create_queue(QueueName='imports')['QueueUrl']
+        topic_arn = sns.create_topic(Name='import-events')['TopicArn']
+        with patch.object(imports, 'IMPORT_QUEUE_URL', queue_url), \
+                patch.object(imports, 'IMPORT_TOPIC_ARN', topic_arn), \
+                patch.object(imports, 'IMPORT_CHUNK_SIZE', 2):
+            yield {**aws, 's3': s3, 'sqs': sqs, 'queue_url': queue_url}
+
+
+def upload(pipeline, key, body, **event):
+    pipeline['s3'].put_object(Bucket='imports-bucket', Key=key, Body=body.encode('utf-8'))
+    imports.split_handler(s3_event('imports-bucket', key, **event), None)
+
+
+def drain(pipeline):
+    """Feed every queued chunk to the worker the way the SQS event source would"""
+    messages = []
+    while True:
+        response = pipeline['sqs'].receive_message(
+            QueueUrl=pipeline['queue_url'], MaxNumberOfMessages=10
+        )
+        batch = response.get('Messages', [])
+        if not batch:
+            return messages
+        records = [{'messageId': m['MessageId'], 'body': m['Body']} for m in batch]
+        assert imports.worker_handler({'Records': records}, None) == {'batchItemFailures': []}
+        for m in batch:
+            pipeline['sqs'].delete_message(QueueUrl=pipeline['queue_url'],
+                                           ReceiptHandle=m['ReceiptHandle'])
+        messages.extend(records)
+
+
+def poll(job_id):
+    event = {'httpMethod': 'GET', 'path': f'/imports/{job_id}',
+             'pathParameters': {'job_id': job_id}, 'queryStringParameters': None, 'body': None}
+    return dogs.handler(event, None)
+
+
+class TestImportPipeline:
+    """End-to-end tests for the S3 -> SQS -> worker import pipeline"""
+
+    def test_csv_import_end_to_end(self, pipeline):
+        body = CSV_HEADER + csv_row('Buddy') + csv_row('Max', weight='') + csv_row('Rex', species='Poodle')
+        upload(pipeline, 'imports/job-1.csv', body)
+
+        pending = json.loads(poll('job-1')['body'])['job']
+        assert pending['status'] == 'processing'
+        assert pending['total_chunks'] == 2
+
+        assert len(drain(pipeline)) == 2
+
+        response = poll('job-1')
+        job = json.loads(response['body'])['job']
+        assert response['statusCode'] == 200
+        assert job['status'] == 'completed'
+        assert (job['total_records'], job['created'], job['rejected'], job['failed']) == (3, 2, 1, 0)
+        assert 'processed_chunk_ids' not in job
+
+        items = pipeline['dogs'].scan()['Items']
+        weights = {dogs.decrypt_dog_name(item['encrypted_dog_name']): item.get('dog_weight')
+                   for item in items}
+        assert weights == {'Buddy': 45, 'Max': None}
+
+    def test_ndjson_counts_malformed_lines_as_rejected(self, pipeline):
+        record = {'shelter': 'Arlington Shelter', 'city': 'Arlington', 'state': 'VA',
+                  'dog_name': 'Buddy', 'species': 'Labrador Retriever', 'description': 'Good dog'}
+        body = json.dumps(record) + '\n{not json\n\n'
+        upload(pipeline, 'imports/job-2.ndjson', body)
+        drain(pipeline)
+
+        job = json.loads(poll('job-2')['body'])['job']
+        assert job['status'] == 'completed'
+        assert (job['total_records'], job['created'], job['rejected']) == (2, 1, 1)
+
+    def test_redelivered_chunk_is_counted_once(self, pipeline):
+        upload(pipeline, 'imports/job-3.csv', CSV_HEADER + csv_row('Buddy'))
+        messages = drain(pipeline)
+
+        imports.worker_handler({'Records': messages}, None)
+
+        job = json.loads(poll('job-3')['body'])['job']
+        assert job['created'] == 1
+        assert job['processed_chunks'] == 1
+        assert len(pipeline['dogs'].scan()['Items']) == 1
+
+    def test_redelivered_s3_event_does_not_reset_the_job(self, pipeline):
+        upload(pipeline, 'imports/job-5.csv', CSV_HEADER + csv_row('Buddy') + csv_row('Rex') + csv_row('Max'))
+        first = drain(pipeline)[:1]
+        imports.worker_handler({'Records': first}, None)
+
+        imports.split_handler(s3_event('imports-bucket', 'imports/job-5.csv'), None)
+
+        job = json.loads(poll('job-5')['body'])['job']
+        assert (job['status'], job['processed_chunks'], job['total_chunks']) == ('completed', 2, 2)
+        assert pipeline['sqs'].receive_message(QueueUrl=pipeline['queue_url']).get('Messages') is None
+        assert 'rejected_upload' not in job
+
+    def test_reupload_under_a_used_job_id_is_recorded_not_imported(self, pipeline):
+        upload(pipeline, 'imports/job-8.csv', CSV_HEADER + csv_row('Buddy'))
+        drain(pipeline)
+
+        upload(pipeline, 'imports/job-8.csv', CSV_HEADER + csv_row('Buddy') + csv_row('Rex'),
+               sequencer='0055AED6DCD90281F0')
+
+        job = json.loads(poll('job-8')['body'])['job']
+        assert (job['status'], job['total_records'], job['created']) == ('completed', 1, 1)
+        assert job['rejected_upload']['sequencer'] == '0055AED6DCD90281F0'
+        assert 'upload_sequencer' not in job
+        assert pipeline['sqs'].receive_message(QueueUrl=pipeline['queue_url']).get('Messages') is None
+
+    def test_large_records_are_chunked_below_the_sqs_limit(self, pipeline):
+        # About 100 KB per record, so two fit in a message and one message in a batch
+        record = {'shelter': 'Arlington Shelter', 'city': 'Arlington', 'state': 'VA',
+                  'species': 'Labrador Retriever', 'description': 'Good dog ' * 11000}
+        lines = [json.dumps({**record, 'dog_name': f'Dog{i}'}) for i in range(5)]
+        lines.append(json.dumps({**record, 'dog_name': 'Huge', 'description': 'Good dog ' * 30000}))
+        with patch.object(imports, 'IMPORT_CHUNK_SIZE', 100), \
+                patch.object(imports, 'send_messages', wraps=imports.send_messages) as send:
+            upload(pipeline, 'imports/job-7.ndjson', '\n'.join(lines))
+
+        batches = [call.args[0] for call in send.call_args_list if call.args[0]]
+        sizes = [[imports.message_bytes(message) for message in batch] for batch in batches]
+        assert all(sum(batch) <= imports.MAX_MESSAGE_BYTES for batch in sizes)
+        assert [len(batch) for batch in sizes] == [1, 1, 1]
+
+        assert len(drain(pipeline)) == 3
+        job = json.loads(poll('job-7')['body'])['job']
+        assert job['status'] == 'completed'
+        assert (job['total_records'], job['created'], job['rejected']) == (6, 5, 1)
+
+    def test_failed_split_marks_the_job_failed(self, pipeline):
+        with patch.object(imports, 'send_messages', side_effect=RuntimeError('queue unavailable')):
+            upload(pipeline, 'imports/job-6.csv', CSV_HEADER + csv_row('Buddy'))
+
+        job = json.loads(poll('job-6')['body'])['job']
+        assert (job['status'], job['error']) == ('failed', 'queue unavailable')
+
+    def test_objects_outside_import_prefix_are_ignored(self, pipeline):
+        assert imports.job_id_for_key('exports/job.csv') is None
+        assert imports.job_id_for_key('imports/nested/job.csv') is None
+        assert imports.job_id_for_key('imports/job.txt') is None
+        assert imports.job_id_for_key('imports/job-4.jsonl') == 'job-4'
+
+    def test_unknown_job_returns_404(self, pipeline):
+        assert poll('missing')['statusCode'] == 404
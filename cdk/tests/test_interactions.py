@@ -0,0 +1,213 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+import dogs
+
+
+def vote(interaction_type, user_id='u1'):
+    return {'user_id': user_id, 'shelter_id': 'VA#A#S', 'dog_id': 'rex',
+            'interaction_type': interaction_type}
+
+
+@pytest.fixture
+def rex(aws):
+    aws['dogs'].put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'rex', 'state': 'VA',
+                               'species': 'Labrador Retriever'})
+
+
+@pytest.fixture
+def dog_cache():
+    dogs.dog_cache.clear()
+    yield dogs.dog_cache
+    dogs.dog_cache.clear()
+
+
+def interaction_event(body, headers=None):
+    return {'httpMethod': 'POST', 'path': '/interactions', 'pathParameters': None,
+            'queryStringParameters': None, 'headers': headers, 'body': json.dumps(body)}
+
+
+@pytest.mark.usefixtures('rex')
+class TestUpsertInteraction:
+    """Tests for conditional interaction writes"""
+
+    def test_first_vote_is_created(self, aws):
+        result = dogs.create_interaction(vote('wag'))
+
+        body = json.loads(result['body'])
+        assert result['statusCode'] == 201
+        assert (body['changed'], body['previous']) == (True, None)
+        item = aws['interactions'].get_item(Key={'user_id': 'u1', 'dog_key': 'VA#A#S#rex'})['Item']
+        assert item['interaction_type'] == 'wag'
+
+    def test_changed_vote_returns_previous_state(self, aws):
+        first = json.loads(dogs.create_interaction(vote('wag'))['body'])['interaction']
+
+        result = dogs.create_interaction(vote('growl'))
+
+        body = json.loads(result['body'])
+        assert result['statusCode'] == 200
+        assert body['changed'] is True
+        assert body['previous']['interaction_type'] == 'wag'
+        assert body['interaction']['interaction_type'] == 'growl'
+        assert body['interaction']['created_at'] == first['created_at']
+
+    def test_repeated_vote_writes_nothing(self, aws):
+        dogs.create_interaction(vote('wag'))
+        before = aws['interactions'].get_item(Key={'user_id': 'u1', 'dog_key': 'VA#A#S#rex'})['Item']
+
+        result = dogs.create_interaction(vote('wag'))
+
+        body = json.loads(result['body'])
+        assert result['statusCode'] == 200
+        assert body['changed'] is False
+        assert body['previous'] == before
+        after = aws['interactions'].get_item(Key={'user_id': 'u1', 'dog_key': 'VA#A#S#rex'})['Item']
+        assert after == before
+
+    def test_vote_for_missing_dog_is_rejected(self, aws):
+        result = dogs.create_interaction(dict(vote('wag'), dog_id='ghost'))
+
+        assert result['statusCode'] == 404
+        assert 'Item' not in aws['interactions'].get_item(Key={'user_id': 'u1', 'dog_key': 'VA#A#S#ghost'})
+
+
+@pytest.mark.usefixtures('rex')
+class TestIdempotencyKey:
+    """Tests for Idempotency-Key replays"""
+
+    def test_retry_replays_first_response(self, aws):
+        first = dogs.handler(interaction_event(vote('wag'), {'Idempotency-Key': 'k1'}), None)
+        dogs.create_interaction(vote('growl'))
+
+        retry = dogs.handler(interaction_event(vote('wag'), {'idempotency-key': 'k1'}), None)
+
+        assert retry == first
+        assert retry['statusCode'] == 201
+        item = aws['interactions'].get_item(Key={'user_id': 'u1', 'dog_key': 'VA#A#S#rex'})['Item']
+        assert item['interaction_type'] == 'growl'
+
+    def test_key_reused_for_another_request_is_rejected(self, aws):
+        dogs.create_interaction(vote('wag'), 'k1')
+
+        assert dogs.create_interaction(vote('growl'), 'k1')['statusCode'] == 422
+        # Keys are scoped per user
+        assert dogs.create_interaction(vote('growl', user_id='u2'), 'k1')['statusCode'] == 201
+
+    def test_concurrent_retry_sees_request_in_progress(self, aws):
+        def retry_while_running(interaction_data):
+            return dogs.create_interaction(interaction_data, 'k1')
+
+        with patch.object(dogs, 'upsert_interaction', side_effect=retry_while_running):
+            result = dogs.create_interaction(vote('wag'), 'k1')
+
+        assert result['statusCode'] == 409
+
+    def test_failed_request_releases_key(self, aws):
+        with patch.object(dogs, 'upsert_interaction', side_effect=RuntimeError('throttled')):
+            assert dogs.create_interaction(vote('wag'), 'k1')['statusCode'] == 500
+
+        assert dogs.create_interaction(vote('wag'), 'k1')['statusCode'] == 201
+
+    def test_claim_is_a_short_lease(self, aws):
+        claims, upsert = [], dogs.upsert_interaction
+
+        def record_claim(interaction_data):
+            claims.append(aws['idempotency'].get_item(Key={'idempotency_key': 'interaction:u1:k1'})['Item'])
+            return upsert(interaction_data)
+
+        started = int(dogs.time.time())
+        with patch.object(dogs, 'upsert_interaction', side_effect=record_claim):
+            assert dogs.create_interaction(vote('wag'), 'k1')['statusCode'] == 201
+
+        assert claims[0]['expires_at'] <= started + dogs.IDEMPOTENCY_LEASE_SECONDS + 1
+        marker = aws['idempotency'].get_item(Key={'idempotency_key': 'interaction:u1:k1'})['Item']
+        assert marker['status'] == 'completed'
+        assert marker['expires_at'] >= started + dogs.IDEMPOTENCY_TTL_SECONDS
+
+    def test_lapsed_claim_can_be_taken_over(self, aws):
+        # A request that died after claiming the key, its lease now over
+        aws['idempotency'].put_item(Item={
+            'idempotency_key': 'interaction:u1:k1', 'status': 'in_progress',
+            'fingerprint': 'abandoned', 'expires_at': int(dogs.time.time()) - 1
+        })
+
+        assert dogs.create_interaction(vote('wag'), 'k1')['statusCode'] == 201
+
+
+class TestGetUserInteractions:
+    """Tests for GET /interactions paging, filtering and expand=dog"""
+
+    @pytest.fixture
+    def wagged(self, aws):
+        with patch.object(dogs, 'kms', aws['kms']):
+            for i in range(5):
+                aws['dogs'].put_item(Item=dogs.build_dog_item({
+                    'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': f'Dog {i}',
+                    'species': 'Labrador Retriever', 'description': 'Good dog'
+                }, dogs.encrypt_dog_name(f'Dog {i}'), dog_id=f'dog-{i}'))
+        for i in range(5):
+            dogs.create_interaction({'user_id': 'u1', 'shelter_id': 'VA#A#S', 'dog_id': f'dog-{i}',
+                                     'interaction_type': 'growl' if i == 2 else 'wag'})
+        # The user also voted for a dog that has since been deleted
+        aws['interactions'].put_item(Item={'user_id': 'u1', 'dog_key': 'VA#A#S#gone',
+                                           'shelter_id': 'VA#A#S', 'dog_id': 'gone',
+                                           'interaction_type': 'wag'})
+
+    def test_expand_reads_dogs_in_one_batch(self, aws, wagged, dog_cache):
+        with patch.object(dogs, 'kms', aws['kms']), \
+                patch.object(dogs.dynamodb, 'batch_get_item',
+                             wraps=dogs.dynamodb.batch_get_item) as batch_get, \
+                patch.object(dogs.dogs_table, 'get_item') as get_item:
+            result = dogs.get_user_interactions({'user_id': 'u1', 'expand': 'dog',
+                                                 'interaction_type': 'wag'})
+
+        body = json.loads(result['body'])
+        assert body['count'] == 5
+        by_dog = {interaction['dog_id']: interaction['dog'] for interaction in body['interactions']}
+        assert by_dog['dog-0']['dog_name'] == 'Dog 0'
+        assert 'encrypted_dog_name' not in by_dog['dog-0']
+        assert by_dog['gone'] is None
+        assert 'dog-2' not in by_dog
+        assert batch_get.call_count == 1
+        get_item.assert_not_called()
+
+    def test_cached_dogs_are_not_read_again(self, aws, wagged, dog_cache):
+        with patch.object(dogs, 'kms', aws['kms']):
+            dogs.get_user_interactions({'user_id': 'u1', 'expand': 'dog'})
+            with patch.object(dogs.dynamodb, 'batch_get_item',
+                              wraps=dogs.dynamodb.batch_get_item) as batch_get:
+                dogs.get_user_interactions({'user_id': 'u1', 'expand': 'dog'})
+
+        # Only the deleted dog is looked up again
+        assert batch_get.call_args.kwargs['RequestItems'][dogs.DOGS_TABLE_NAME]['Keys'] == [
+            {'shelter_id': 'VA#A#S', 'dog_id': 'gone'}
+        ]
+
+    def test_unread_dogs_return_503(self, aws, wagged, dog_cache):
+        unread = [{'shelter_id': 'VA#A#S', 'dog_id': 'dog-0'}]
+        with patch.object(dogs.dynamo_batch, 'batch_get', return_value=([], unread)):
+            result = dogs.get_user_interactions({'user_id': 'u1', 'expand': 'dog'})
+
+        assert result['statusCode'] == 503
+        assert result['headers']['Retry-After'] == str(dogs.RETRY_AFTER_SECONDS)
+
+    def test_continuation_tokens(self, aws, wagged):
+        seen, params = [], {'user_id': 'u1', 'interaction_type': 'wag', 'limit': '2'}
+        while True:
+            body = json.loads(dogs.get_user_interactions(params)['body'])
+            seen += [interaction['dog_id'] for interaction in body['interactions']]
+            if 'next_token' not in body:
+                break
+            params['next_token'] = body['next_token']
+
+        assert sorted(seen) == ['dog-0', 'dog-1', 'dog-3', 'dog-4', 'gone']
+        # A token cannot be replayed against another filter
+        other = dict(params, interaction_type='growl')
+        assert dogs.get_user_interactions(other)['statusCode'] == 400
+
+    def test_invalid_parameters(self, aws):
+        assert dogs.get_user_interactions({'user_id': 'u1', 'expand': 'user'})['statusCode'] == 400
+        assert dogs.get_user_interactions({'user_id': 'u1', 'interaction_type': 'bark'})['statusCode'] == 400
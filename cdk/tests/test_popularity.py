@@ -0,0 +1,143 @@
+import json
+from unittest.mock import patch
+
+import dogs
+import popularity
+
+
+def image(user_id, dog_id, interaction_type):
+    return {
+        'user_id': {'S': user_id},
+        'dog_key': {'S': f'VA#A#S#{dog_id}'},
+        'shelter_id': {'S': 'VA#A#S'},
+        'dog_id': {'S': dog_id},
+        'interaction_type': {'S': interaction_type}
+    }
+
+
+def record(sequence, event_name, old=None, new=None):
+    change = {'SequenceNumber': str(sequence), 'StreamViewType': 'NEW_AND_OLD_IMAGES'}
+    if old:
+        change['OldImage'] = image(*old)
+    if new:
+        change['NewImage'] = image(*new)
+    return {'eventID': f'event-{sequence}', 'eventName': event_name,
+            'eventSource': 'aws:dynamodb', 'dynamodb': change}
+
+
+def put_dog(table, dog_id, state='VA', **counters):
+    table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': dog_id, 'state': state,
+                         'species': 'Labrador Retriever', 'created_at': '2024-01-01',
+                         **counters})
+
+
+def counters(table, dog_id):
+    item = table.get_item(Key={'shelter_id': 'VA#A#S', 'dog_id': dog_id})['Item']
+    return item.get('wag_count'), item.get('growl_count'), item.get('popularity')
+
+
+BATCH = [
+    record(1, 'INSERT', new=('u1', 'rex', 'wag')),
+    record(2, 'INSERT', new=('u2', 'rex', 'wag')),
+    record(3, 'MODIFY', old=('u1', 'rex', 'wag'), new=('u1', 'rex', 'growl')),
+    record(4, 'INSERT', new=('u3', 'fido', 'growl')),
+    record(5, 'REMOVE', old=('u3', 'fido', 'growl')),
+    record(6, 'MODIFY', old=('u2', 'rex', 'wag'), new=('u2', 'rex', 'wag'))
+]
+
+
+class TestFoldRecords:
+    """Tests for turning stream records into per-dog counter changes"""
+
+    def test_transitions(self):
+        changes = popularity.fold_records(BATCH)
+
+        assert [change.deltas for change in changes[('VA#A#S', 'rex')]] == [
+            {'wag_count': 1}, {'wag_count': 1}, {'wag_count': -1, 'growl_count': 1}
+        ]
+        assert [change.deltas for change in changes[('VA#A#S', 'fido')]] == [
+            {'growl_count': 1}, {'growl_count': -1}
+        ]
+
+
+class TestStreamHandler:
+    """Tests for idempotent counter aggregation"""
+
+    def test_counters_are_applied_once(self, aws):
+        put_dog(aws['dogs'], 'rex')
+        put_dog(aws['dogs'], 'fido')
+
+        first = popularity.stream_handler({'Records': BATCH}, None)
+        # Lambda redelivers part of the batch along with a new record
+        retry = popularity.stream_handler({'Records': BATCH[2:] + [
+            record(7, 'INSERT', new=('u4', 'rex', 'wag'))
+        ]}, None)
+
+        assert first == retry == {'batchItemFailures': []}
+        assert counters(aws['dogs'], 'rex') == (2, 1, 1)
+        assert counters(aws['dogs'], 'fido') == (0, 0, 0)
+
+    def test_one_transaction_per_dog(self, aws):
+        put_dog(aws['dogs'], 'rex')
+        put_dog(aws['dogs'], 'fido')
+
+        with patch.object(popularity.client, 'transact_write_items',
+                          wraps=popularity.client.transact_write_items) as transact:
+            popularity.stream_handler({'Records': BATCH}, None)
+
+        assert transact.call_count == 2
+
+    def test_deleted_dogs_are_skipped(self, aws):
+        result = popularity.stream_handler({'Records': BATCH[:1]}, None)
+
+        assert result == {'batchItemFailures': []}
+        assert aws['dogs'].scan()['Count'] == 0
+
+    def test_failed_dogs_are_reported(self, aws):
+        put_dog(aws['dogs'], 'rex')
+
+        with patch.object(popularity.client, 'transact_write_items',
+                          side_effect=RuntimeError('throttled')):
+            result = popularity.stream_handler({'Records': BATCH[:3]}, None)
+
+        assert result == {'batchItemFailures': [
+            {'itemIdentifier': '1'}, {'itemIdentifier': '2'}, {'itemIdentifier': '3'}
+        ]}
+
+
+class TestPopularitySort:
+    """Tests for sort=popularity listings"""
+
+    def test_listing_is_ordered_by_popularity(self, aws):
+        put_dog(aws['dogs'], 'quiet', popularity=0)
+        put_dog(aws['dogs'], 'star', popularity=7)
+        put_dog(aws['dogs'], 'grump', popularity=-2)
+        put_dog(aws['dogs'], 'away', state='MD', popularity=9)
+
+        # Moto mishandles ExclusiveStartKey on descending queries, so read one page
+        with patch.object(dogs.dogs_table, 'query', wraps=dogs.dogs_table.query) as query:
+            result = dogs.get_dogs({'state': 'VA', 'sort': 'popularity'})
+
+        assert [dog['dog_id'] for dog in json.loads(result['body'])['dogs']] == ['star', 'quiet', 'grump']
+        # One query on the species partition, no fan-out
+        assert query.call_count == 1
+        request = query.call_args.kwargs
+        assert (request['IndexName'], request['ScanIndexForward']) == ('SpeciesPopularityIndex', False)
+        assert request['FilterExpression'] == '#state = :state'
+
+    def test_unknown_sort_is_rejected(self, aws):
+        assert dogs.get_dogs({'sort': 'name'})['statusCode'] == 400
+
+    def test_backfill_counts_existing_interactions(self, aws):
+        put_dog(aws['dogs'], 'rex', version=1)
+        put_dog(aws['dogs'], 'fido', wag_count=1, growl_count=0, popularity=1)
+        for user_id, interaction_type in (('u1', 'wag'), ('u2', 'wag'), ('u3', 'growl')):
+            aws['interactions'].put_item(Item={
+                'user_id': user_id, 'dog_key': 'VA#A#S#rex', 'shelter_id': 'VA#A#S',
+                'dog_id': 'rex', 'interaction_type': interaction_type
+            })
+
+        stats = dogs.maintenance_handler({'task': 'backfill_popularity'}, None)
+
+        assert stats == {'scanned': 2, 'updated': 1, 'skipped': 1, 'failed': 0}
+        assert counters(aws['dogs'], 'rex') == (2, 1, 1)
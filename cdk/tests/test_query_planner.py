@@ -0,0 +1,123 @@
+import json
+import logging
+from datetime import date
+
+import pytest
+
+import dates
+import dogs
+
+COLORS = ['Black', 'Yellow', 'Chocolate', 'Light brown', 'Fox red', 'Spotted']
+
+
+def load_dogs(table):
+    """60 dogs across two states, six colours and a spread of weights"""
+    for i in range(60):
+        state = 'VA' if i % 2 else 'MD'
+        dog_data = {
+            'shelter': 'Shelter', 'city': 'City', 'state': state,
+            'dog_name': f'Dog {i}', 'species': 'Labrador Retriever', 'description': 'Good dog',
+            'dog_color': COLORS[i % len(COLORS)],
+            'dog_birthday': dates.months_before(date.today(), 6 * (i % 20)).isoformat()
+        }
+        if i % 10:
+            dog_data['dog_weight'] = str(30 + i % 40)
+        table.put_item(Item=dogs.build_dog_item(dog_data, 'encrypted', dog_id=f'dog-{i:02d}'))
+
+
+def execute(plan, filters, table):
+    """Read every page of a plan, returning the matching dog ids and items scanned"""
+    request = plan.request(filters)
+    matched, scanned = set(), 0
+    while True:
+        response = table.query(**request)
+        scanned += response['ScannedCount']
+        matched.update(item['dog_id'] for item in response['Items'] if filters.matches(item))
+        if 'LastEvaluatedKey' not in response:
+            return matched, scanned
+        request['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+class TestQueryPlanner:
+    """Tests for choosing and executing listing access paths"""
+
+    @pytest.mark.parametrize('params, plan', [
+        ({}, 'SpeciesIndex'),
+        ({'color': 'brown', 'min_weight': '40'}, 'SpeciesIndex'),
+        ({'state': 'VA'}, 'StateIndex'),
+        ({'state': 'VA', 'color': 'brown'}, 'StateIndex'),
+        ({'state': 'VA', 'color': 'spotted', 'min_weight': '40'}, 'StateIndex'),
+        ({'state': 'VA', 'max_age': '3'}, 'StateBirthDateIndex'),
+        ({'state': 'VA', 'color': 'brown', 'min_weight': '40'}, 'StateColorWeightIndex'),
+        ({'state': 'VA', 'color': 'Black', 'max_weight': '60', 'min_age': '2'}, 'StateColorWeightIndex')
+    ])
+    def test_cheapest_plan_is_chosen(self, params, plan):
+        filters = dogs.compile_dog_filters(params)
+
+        assert dogs.plan_dog_query(params, filters).name == plan
+
+    def test_key_ranges_are_not_repeated_in_the_filter(self):
+        params = {'state': 'VA', 'color': 'brown', 'min_weight': '40', 'max_weight': '60',
+                  'min_age': '1'}
+        filters = dogs.compile_dog_filters(params)
+
+        request = dogs.plan_dog_query(params, filters).request(filters)
+
+        assert request['KeyConditionExpression'] == (
+            '#state_color = :state_color AND #dog_weight BETWEEN :min_weight AND :max_weight'
+        )
+        assert request['ExpressionAttributeValues'][':state_color'] == 'VA#chocolate'
+        assert 'dog_weight' not in request['FilterExpression']
+        assert '#birth_date <= :latest_birth_date' in request['FilterExpression']
+
+    @pytest.mark.parametrize('params', [
+        {'state': 'VA', 'color': 'brown', 'min_weight': '40', 'max_weight': '60'},
+        {'state': 'VA', 'color': 'yellow', 'max_weight': '50', 'max_age': '4'},
+        {'state': 'MD', 'min_age': '2', 'max_age': '6'}
+    ])
+    def test_every_plan_returns_the_same_dogs(self, aws, params):
+        load_dogs(aws['dogs'])
+        filters = dogs.compile_dog_filters(params)
+        plans = sorted(dogs.candidate_plans(params, filters), key=lambda plan: -plan.cost)
+
+        results = [execute(plan, filters, aws['dogs']) for plan in plans]
+
+        expected = results[0][0]
+        assert expected
+        assert all(matched == expected for matched, _ in results)
+        # Cheaper estimates read fewer items
+        scanned = [count for _, count in results]
+        assert scanned == sorted(scanned, reverse=True)
+        assert scanned[-1] < scanned[0]
+
+    def test_listing_logs_plan_and_consumed_capacity(self, aws, caplog):
+        load_dogs(aws['dogs'])
+
+        with caplog.at_level(logging.INFO):
+            result = dogs.get_dogs({'state': 'VA', 'color': 'brown', 'min_weight': '40',
+                                    'max_weight': '60'})
+
+        body = json.loads(result['body'])
+        assert body['count'] > 0
+        record = next(r for r in caplog.records if r.getMessage() == 'Dog listing plan')
+        assert record.plan == 'StateColorWeightIndex'
+        assert record.pages_read == 1
+        assert record.scanned_count == record.returned_count == body['count']
+        assert record.consumed_capacity_units > 0
+
+    def test_inverted_weight_range_is_rejected(self, aws):
+        assert dogs.get_dogs({'min_weight': '60', 'max_weight': '40'})['statusCode'] == 400
+
+    def test_backfill_adds_color_keys(self, aws):
+        table = aws['dogs']
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'legacy', 'state': 'VA',
+                             'dog_color': 'Chocolate', 'version': 1})
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'spotted', 'state': 'VA',
+                             'dog_color': 'Spotted'})
+
+        stats = dogs.maintenance_handler({'task': 'backfill_color_keys'}, None)
+
+        assert stats == {'scanned': 2, 'updated': 1, 'skipped': 1, 'failed': 0}
+        legacy = table.get_item(Key={'shelter_id': 'VA#A#S', 'dog_id': 'legacy'})['Item']
+        assert legacy['state_color'] == 'VA#chocolate'
+        assert legacy['version'] == 2
@@ -0,0 +1,202 @@
+import json
+from datetime import date
+from unittest.mock import patch
+
+import boto3
+import numpy as np
+import pytest
+from moto import mock_s3
+
+import dogs
+import recommender
+from tests.conftest import segmented
+
+
+def dog(dog_id, state='VA', color='Black', weight=75, birth_date='2022-01-01',
+        description='Loves swimming and fetch'):
+    return {'shelter_id': 'VA#A#S', 'dog_id': dog_id, 'state': state, 'dog_color': color,
+            'dog_weight': weight, 'birth_date': birth_date, 'description': description,
+            'species': 'Labrador Retriever', 'created_at': '2024-01-01', 'popularity': 0}
+
+
+def stream_record(event_name, item):
+    serializer = boto3.dynamodb.types.TypeSerializer()
+    change = {'Keys': {'shelter_id': {'S': item['shelter_id']}, 'dog_id': {'S': item['dog_id']}},
+              'SequenceNumber': f"{event_name}-{item['dog_id']}"}
+    if event_name != 'REMOVE':
+        change['NewImage'] = {name: serializer.serialize(value) for name, value in item.items()}
+    return {'eventName': event_name, 'eventSource': 'aws:dynamodb', 'dynamodb': change}
+
+
+def vote(user_id, dog_id, interaction_type='wag'):
+    dogs.create_interaction({'user_id': user_id, 'shelter_id': 'VA#A#S', 'dog_id': dog_id,
+                             'interaction_type': interaction_type})
+
+
+@pytest.fixture
+def model_store(aws, tmp_path):
+    """A moto bucket for the artifact and a fresh local model directory"""
+    with mock_s3(), patch.object(dogs, 'kms', aws['kms']):
+        s3 = boto3.client('s3')
+        s3.create_bucket(Bucket='test-recommender')
+        with patch.object(recommender, 's3', s3), \
+                patch.object(recommender, 'RECOMMENDER_BUCKET_NAME', 'test-recommender'), \
+                patch.object(recommender, 'MODEL_DIR', str(tmp_path)), \
+                patch.object(recommender, '_model', None), \
+                patch.object(recommender, '_model_checked_at', float('-inf')), \
+                patch.object(dogs.dogs_table, 'scan', segmented(dogs.dogs_table.scan)):
+            dogs.dog_cache.clear()
+            yield s3
+            dogs.dog_cache.clear()
+
+
+def load_shelter(table):
+    for item in (
+        dog('rex'),
+        dog('max', description='Loves swimming in the lake'),
+        dog('bolt', description='Swimming champion, loves fetch'),
+        dog('pip', state='CA', color='Yellow', weight=40, birth_date='2024-06-01',
+            description='Shy puppy, likes naps'),
+        dog('cocoa', state='CA', color='Chocolate', weight=45, birth_date='2024-03-01',
+            description='Calm, likes naps')
+    ):
+        table.put_item(Item=dict(item, encrypted_dog_name=dogs.encrypt_dog_name(item['dog_id'])))
+
+
+class TestFeatures:
+    """Tests for dog feature vectors"""
+
+    def test_blocks(self):
+        vector = recommender.dog_features(dog('rex'), today=date(2025, 1, 1))
+
+        assert vector.shape == (recommender.DIMENSIONS,)
+        assert vector[recommender.OFFSETS['weight'] + 2] == 1.0
+        # Three years old is the 36-84 month bucket
+        assert vector[recommender.OFFSETS['age'] + 2] == 1.0
+        assert vector[recommender.OFFSETS['color']] == 1.0
+        assert vector[recommender.OFFSETS['state'] + recommender.STATE_INDEX['VA']] == 0.5
+        description = vector[recommender.OFFSETS['description']:]
+        assert np.isclose(np.linalg.norm(description), 1.0)
+
+    def test_missing_attributes_leave_blocks_empty(self):
+        vector = recommender.dog_features({'shelter_id': 'S', 'dog_id': 'd'})
+
+        assert not vector.any()
+
+
+class TestRecommendations:
+    """Tests for serving recommendations from the memory-mapped artifact"""
+
+    def test_recommends_similar_dogs(self, aws, model_store):
+        load_shelter(aws['dogs'])
+        recommender.build_handler({'task': 'rebuild'}, None)
+        vote('u1', 'rex')
+        vote('u1', 'pip', 'growl')
+
+        result = recommender.handler({'queryStringParameters': {'user_id': 'u1', 'limit': '2'}}, None)
+
+        body = json.loads(result['body'])
+        assert body['strategy'] == 'preferences'
+        assert [r['dog_id'] for r in body['recommendations']] == ['bolt', 'max']
+        assert body['recommendations'][0]['dog']['dog_name'] == 'bolt'
+        assert isinstance(recommender._model.features, np.memmap)
+
+    def test_users_without_history_get_popular_dogs(self, aws, model_store):
+        load_shelter(aws['dogs'])
+        aws['dogs'].update_item(Key={'shelter_id': 'VA#A#S', 'dog_id': 'cocoa'},
+                                UpdateExpression='SET popularity = :p',
+                                ExpressionAttributeValues={':p': 5})
+        recommender.build_handler({'task': 'rebuild'}, None)
+
+        # Moto applies Limit before reversing a descending query, so read everything
+        result = recommender.get_recommendations({'user_id': 'new', 'limit': '5'})
+
+        body = json.loads(result['body'])
+        assert body['strategy'] == 'popularity'
+        assert [r['dog_id'] for r in body['recommendations']][0] == 'cocoa'
+        assert body['recommendations'][0]['dog']['dog_name'] == 'cocoa'
+
+    def test_unavailable_before_first_build(self, aws, model_store):
+        assert recommender.get_recommendations({'user_id': 'u1'})['statusCode'] == 503
+
+    def test_invalid_parameters(self, aws, model_store):
+        assert recommender.get_recommendations({})['statusCode'] == 400
+        assert recommender.get_recommendations({'user_id': 'u1', 'limit': '500'})['statusCode'] == 400
+
+
+class TestIncrementalBuild:
+    """Tests for folding DogsTable stream batches into the artifact"""
+
+    def current(self):
+        manifest, _ = recommender.read_manifest()
+        return recommender.load_model(manifest)
+
+    def test_stream_batch_upserts_and_removes_rows(self, aws, model_store):
+        load_shelter(aws['dogs'])
+        recommender.rebuild()
+        moved = dict(dog('rex'), state='MD')
+
+        recommender.build_handler({'Records': [
+            stream_record('INSERT', dog('luna')),
+            stream_record('MODIFY', moved),
+            stream_record('REMOVE', dog('pip'))
+        ]}, None)
+
+        model = self.current()
+        assert sorted(dog_id for _, dog_id in model.keys) == ['bolt', 'cocoa', 'luna', 'max', 'rex']
+        assert np.array_equal(model.features[model.index[('VA#A#S', 'rex')]],
+                              recommender.dog_features(moved))
+
+    def test_unchanged_features_do_not_publish(self, aws, model_store):
+        load_shelter(aws['dogs'])
+        version = recommender.rebuild()['version']
+
+        recommender.build_handler({'Records': [
+            stream_record('MODIFY', dict(dog('rex'), wag_count=3, popularity=3))
+        ]}, None)
+
+        assert self.current().version == version
+
+    def test_concurrent_publish_is_retried(self, aws, model_store):
+        load_shelter(aws['dogs'])
+        recommender.rebuild()
+        save_model = recommender.save_model
+
+        def race(features, keys, etag=None, **kwargs):
+            # Another builder publishes between our read and our write
+            if etag and not race.done:
+                race.done = True
+                recommender.rebuild()
+            return save_model(features, keys, etag, **kwargs)
+        race.done = False
+
+        with patch.object(recommender, 'save_model', side_effect=race) as save:
+            recommender.build_handler({'Records': [stream_record('INSERT', dog('luna'))]}, None)
+
+        assert save.call_count == 2
+        assert ('VA#A#S', 'luna') in self.current().index
+
+    def test_failed_batch_is_reported(self, aws, model_store):
+        load_shelter(aws['dogs'])
+        recommender.rebuild()
+        records = [stream_record('INSERT', dog('luna')), stream_record('REMOVE', dog('pip'))]
+
+        with patch.object(recommender, 'save_model', side_effect=RuntimeError('slow down')):
+            result = recommender.build_handler({'Records': records}, None)
+
+        assert result == {'batchItemFailures': [
+            {'itemIdentifier': 'INSERT-luna'}, {'itemIdentifier': 'REMOVE-pip'}
+        ]}
+
+    def test_only_replaced_versions_are_retired(self, aws, model_store):
+        load_shelter(aws['dogs'])
+        recommender.rebuild()
+        first, _ = recommender.read_manifest()
+
+        recommender.build_handler({'Records': [stream_record('INSERT', dog('luna'))]}, None)
+
+        live, _ = recommender.read_manifest()
+        for manifest, tags in ((first, [{'Key': 'superseded', 'Value': 'true'}]), (live, [])):
+            for key in (manifest['features_key'], manifest['keys_key']):
+                tagging = model_store.get_object_tagging(Bucket='test-recommender', Key=key)
+                assert tagging['TagSet'] == tags
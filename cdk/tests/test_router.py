@@ -0,0 +1,107 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+import dogs
+import router
+import search
+
+
+@pytest.fixture
+def rex(aws):
+    with patch.object(dogs, 'kms', aws['kms']):
+        dog = json.loads(dogs.create_dog({
+            'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': 'Rex',
+            'species': 'Labrador Retriever', 'description': 'Good with kids',
+            'dog_weight': '60 lbs'
+        })['body'])['dog']
+    dogs.dog_cache.clear()
+    yield dog
+    dogs.dog_cache.clear()
+
+
+def api_event(method, path, resource=None, query=None, body=None, path_parameters=None):
+    event = {'httpMethod': method, 'path': path, 'pathParameters': path_parameters,
+             'queryStringParameters': query, 'headers': None,
+             'body': json.dumps(body) if isinstance(body, dict) else body}
+    if resource:
+        event['resource'] = resource
+    return event
+
+
+def terms(aws, dog):
+    key = search.dog_key(dog['shelter_id'], dog['dog_id'])
+    return sorted(posting['term'] for posting in aws['search'].scan()['Items']
+                  if posting['dog_key'] == key)
+
+
+class TestRouter:
+    """Tests for route resolution and parameter validation"""
+
+    def test_resource_field_is_used_as_is(self):
+        with patch.object(dogs.ROUTER, 'match_path') as match_path, \
+                patch.object(dogs, 'get_dog') as get_dog:
+            dogs.route_request(api_event('GET', '/dogs/d1', '/dogs/{dog_id}', {'shelter_id': 'S'},
+                                         path_parameters={'dog_id': 'd1'}), 'r')
+
+        match_path.assert_not_called()
+        get_dog.assert_called_once_with('d1', {'shelter_id': 'S'}, None)
+
+    def test_paths_resolve_without_a_resource(self):
+        assert dogs.ROUTER.match_path('/dogs/batch') == ('/dogs/batch', {})
+        assert dogs.ROUTER.match_path('/dogs/d1') == ('/dogs/{dog_id}', {'dog_id': 'd1'})
+        assert dogs.ROUTER.match_path('/imports/j1') == ('/imports/{job_id}', {'job_id': 'j1'})
+        assert dogs.ROUTER.match_path('/dogs/d1/extra') == (None, {})
+
+    @pytest.mark.parametrize('event, status, error', [
+        (api_event('GET', '/cats'), 404, 'Endpoint not found'),
+        (api_event('PATCH', '/dogs/d1'), 405, 'Method not allowed'),
+        (api_event('DELETE', '/dogs/d1'), 400, 'shelter_id query parameter is required'),
+        (api_event('GET', '/interactions'), 400, 'user_id query parameter is required'),
+        (api_event('POST', '/dogs', body='{not json'), 400, 'Invalid JSON in request body')
+    ])
+    def test_rejected_requests(self, event, status, error):
+        result = dogs.handler(event, None)
+
+        assert result['statusCode'] == status
+        assert json.loads(result['body'])['error'] == error
+
+    def test_method_not_allowed_lists_allowed_methods(self):
+        result = dogs.handler(api_event('PATCH', '/dogs/d1'), None)
+
+        assert result['headers']['Allow'] == 'DELETE,GET,PUT'
+
+    def test_base64_json_bodies_are_decoded(self):
+        event = api_event('POST', '/interactions', '/interactions')
+        event['body'] = 'eyJ1c2VyX2lkIjogInUxIn0='  # {"user_id": "u1"}
+        event['isBase64Encoded'] = True
+
+        with patch.object(dogs, 'create_interaction') as create_interaction:
+            dogs.handler(event, None)
+
+        create_interaction.assert_called_once_with({'user_id': 'u1'}, None)
+
+    def test_routes_need_their_template_parameters(self):
+        table = router.Router({('GET', '/imports/{job_id}'): router.Route(lambda request: None)})
+
+        with pytest.raises(router.RouteError) as raised:
+            table.resolve(api_event('GET', '/imports/j1', '/imports/{job_id}'))
+
+        assert raised.value.status_code == 400
+
+
+class TestDeleteDog:
+    """Tests for DELETE /dogs/{dog_id}"""
+
+    def test_delete(self, aws, rex):
+        event = api_event('DELETE', f"/dogs/{rex['dog_id']}", query={'shelter_id': rex['shelter_id']})
+
+        first = dogs.handler(event, None)
+        again = dogs.handler(event, None)
+
+        assert first['statusCode'] == 200
+        assert again['statusCode'] == 404
+        assert 'Item' not in aws['dogs'].get_item(
+            Key={'shelter_id': rex['shelter_id'], 'dog_id': rex['dog_id']})
+        assert terms(aws, rex) == []
@@ -0,0 +1,198 @@
+import functools
+import json
+from unittest.mock import patch
+
+import pytest
+
+import dogs
+import search
+from tests.conftest import segmented
+
+
+def new_dog(name, description, state='VA', **fields):
+    return {'shelter': 'S', 'city': 'A', 'state': state, 'dog_name': name,
+            'species': 'Labrador Retriever', 'description': description, **fields}
+
+
+@pytest.fixture
+def shelter(aws):
+    """Dogs created through the API so their descriptions are indexed"""
+    with patch.object(dogs, 'kms', aws['kms']):
+        created = {}
+        for name, description, fields in (
+            ('Rex', 'Good with kids and cats', {}),
+            ('Max', 'Great with kids, loves swimming', {'dog_weight': '70'}),
+            ('Bolt', 'Good with kids, loves fetch', {'dog_weight': '40'}),
+            ('Pip', 'Shy, good with other dogs', {}),
+            ('Cocoa', 'Good with kids', {'state': 'MD'})
+        ):
+            response = dogs.create_dog(new_dog(name, description, **fields))
+            created[name] = json.loads(response['body'])['dog']
+        yield created
+
+
+def names(result):
+    return sorted(dog['dog_name'] for dog in json.loads(result['body'])['dogs'])
+
+
+class TestTokenize:
+    """Tests for description tokenization"""
+
+    def test_terms(self):
+        assert search.tokenize('Good with KIDS, good with cats!') == ['good', 'kid', 'cat']
+
+    def test_plurals_fold_but_short_words_and_double_s_stay(self):
+        assert search.tokenize('gas grass kiss dogs') == ['gas', 'grass', 'kiss', 'dog']
+
+
+class TestSearchDogs:
+    """Tests for GET /dogs?q= over the posting lists"""
+
+    def test_create_dog_writes_postings(self, aws, shelter):
+        rex = shelter['Rex']
+        postings = aws['search'].query(
+            KeyConditionExpression='#term = :term',
+            ExpressionAttributeNames={'#term': 'term'},
+            ExpressionAttributeValues={':term': 'cat'}
+        )['Items']
+
+        assert [(posting['shelter_id'], posting['dog_id']) for posting in postings] == [
+            (rex['shelter_id'], rex['dog_id'])
+        ]
+
+    def test_every_term_must_match(self, aws, shelter):
+        with patch.object(dogs, 'kms', aws['kms']):
+            assert names(dogs.get_dogs({'q': 'good with kids'})) == ['Bolt', 'Cocoa', 'Rex']
+            assert names(dogs.get_dogs({'q': 'kid swimming'})) == ['Max']
+            assert names(dogs.get_dogs({'q': 'kids parrots'})) == []
+
+    def test_other_filters_apply_to_matches(self, aws, shelter):
+        with patch.object(dogs, 'kms', aws['kms']):
+            assert names(dogs.get_dogs({'q': 'kids', 'state': 'VA'})) == ['Bolt', 'Max', 'Rex']
+            assert names(dogs.get_dogs({'q': 'kids', 'max_weight': '50'})) == ['Bolt']
+
+    def test_only_matching_dogs_are_read(self, aws, shelter):
+        with patch.object(dogs, 'kms', aws['kms']), \
+                patch.object(dogs.dogs_table, 'scan') as scan, \
+                patch.object(dogs.dogs_table, 'query') as query, \
+                patch.object(dogs.dynamodb, 'batch_get_item',
+                             wraps=dogs.dynamodb.batch_get_item) as batch_get:
+            dogs.get_dogs({'q': 'swimming'})
+
+        scan.assert_not_called()
+        query.assert_not_called()
+        assert len(batch_get.call_args.kwargs['RequestItems'][dogs.DOGS_TABLE_NAME]['Keys']) == 1
+
+    def test_rarest_list_drives_the_intersection(self, aws, shelter):
+        max_key = (shelter['Max']['shelter_id'], shelter['Max']['dog_id'])
+
+        # "swimming" fits in one page, so "kid" is read no further and is only
+        # asked about Max if its first page did not list him
+        keys, _, stats = search.match(dogs.dynamodb, dogs.SEARCH_TABLE_NAME,
+                                      ['kid', 'swimming'], page_size=2)
+
+        assert keys == [max_key]
+        assert stats['pages'] == 2
+        assert stats['lookups'] <= 1
+        # Max is "great with kids", not "good"
+        assert search.match(dogs.dynamodb, dogs.SEARCH_TABLE_NAME,
+                            ['good', 'swimming'], page_size=2)[0] == []
+
+    def test_continuation_tokens(self, aws, shelter):
+        seen, params = [], {'q': 'kids', 'limit': '2'}
+        with patch.object(dogs, 'kms', aws['kms']):
+            while True:
+                body = json.loads(dogs.get_dogs(params)['body'])
+                seen += [dog['dog_name'] for dog in body['dogs']]
+                if 'next_token' not in body:
+                    break
+                params['next_token'] = body['next_token']
+
+        assert sorted(seen) == ['Bolt', 'Cocoa', 'Max', 'Rex']
+        # A token cannot be replayed against another search
+        assert dogs.get_dogs(dict(params, q='cats'))['statusCode'] == 400
+
+    def test_later_pages_resume_the_posting_lists(self, aws, shelter):
+        everything, _, _ = search.match(dogs.dynamodb, dogs.SEARCH_TABLE_NAME, ['kid'])
+        start_after = search.dog_key(*everything[1])
+
+        with patch.object(search.PostingReader, 'read_page', autospec=True,
+                          side_effect=search.PostingReader.read_page) as read_page:
+            rest, _, _ = search.match(dogs.dynamodb, dogs.SEARCH_TABLE_NAME, ['kid'],
+                                      start_after=start_after)
+
+        assert rest == everything[2:]
+        reader = read_page.call_args.args[0]
+        assert reader._request['ExpressionAttributeValues'][':start_after'] == start_after
+
+    def test_limit_stops_reading_common_terms(self, aws):
+        # Written in dog_key order: moto sorts a query page only after applying Limit
+        for number in range(50):
+            for term in ('good', 'kid'):
+                aws['search'].put_item(Item={'term': term, 'dog_key': f'VA#A#S#dog-{number:02}',
+                                             'shelter_id': 'VA#A#S', 'dog_id': f'dog-{number:02}'})
+        everything, _, stats = search.match(dogs.dynamodb, dogs.SEARCH_TABLE_NAME,
+                                            ['good', 'kid'], page_size=10)
+        assert len(everything) == 50
+        assert stats['pages'] == 10
+
+        keys, window_end, stats = search.match(dogs.dynamodb, dogs.SEARCH_TABLE_NAME,
+                                               ['good', 'kid'], page_size=10, limit=5)
+
+        # One page of each list confirms the first ten matches
+        assert stats['pages'] == 2
+        assert keys == everything[:10]
+        assert window_end == everything[9]
+
+        rest, _, _ = search.match(dogs.dynamodb, dogs.SEARCH_TABLE_NAME, ['good', 'kid'],
+                                  page_size=10, start_after=search.dog_key(*window_end), limit=5)
+        assert rest == everything[10:20]
+
+    def test_filtered_windows_still_reach_every_match(self, aws):
+        # Written in dog_key order: moto sorts a query page only after applying Limit
+        for number in range(6):
+            dog_id, state = f'dog-{number}', ('VA', 'MD')[number % 2]
+            aws['dogs'].put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': dog_id, 'state': state,
+                                       'species': 'Labrador Retriever', 'description': 'Loves kids'})
+            aws['search'].put_item(Item={'term': 'kid', 'dog_key': f'VA#A#S#{dog_id}',
+                                         'shelter_id': 'VA#A#S', 'dog_id': dog_id})
+
+        seen, pages, params = [], 0, {'q': 'kids', 'state': 'VA', 'limit': '1'}
+        with patch.object(search, 'match', functools.partial(search.match, page_size=1)):
+            while True:
+                body = json.loads(dogs.get_dogs(params)['body'])
+                seen += [dog['dog_id'] for dog in body['dogs']]
+                pages += 1
+                if 'next_token' not in body:
+                    break
+                params['next_token'] = body['next_token']
+
+        assert seen == ['dog-0', 'dog-2', 'dog-4']
+        # Windows of one posting: the MD dogs come back as empty pages with a token
+        assert pages > len(seen)
+
+    def test_deleted_dogs_are_skipped(self, aws, shelter):
+        rex = shelter['Rex']
+        aws['dogs'].delete_item(Key={'shelter_id': rex['shelter_id'], 'dog_id': rex['dog_id']})
+
+        with patch.object(dogs, 'kms', aws['kms']):
+            assert names(dogs.get_dogs({'q': 'cats'})) == []
+
+    def test_unread_dogs_return_503(self, aws, shelter):
+        with patch.object(dogs.dynamo_batch, 'batch_get', side_effect=lambda dynamodb, table, keys, **kwargs: ([], keys)):
+            assert dogs.get_dogs({'q': 'kids'})['statusCode'] == 503
+
+    def test_invalid_queries(self, aws):
+        assert dogs.get_dogs({'q': 'with the'})['statusCode'] == 400
+        assert dogs.get_dogs({'q': 'kids', 'sort': 'popularity'})['statusCode'] == 400
+        assert dogs.get_dogs({'q': ' '.join(f'word{i}' for i in range(9))})['statusCode'] == 400
+
+    def test_backfill_indexes_existing_dogs(self, aws):
+        aws['dogs'].put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'old',
+                                   'description': 'Loves kids'})
+
+        with patch.object(dogs.dogs_table, 'scan', segmented(dogs.dogs_table.scan)):
+            stats = dogs.maintenance_handler({'task': 'backfill_search_index'}, None)
+
+        assert stats == {'scanned': 1, 'postings': 2, 'failed': 0}
+        assert search.match(dogs.dynamodb, dogs.SEARCH_TABLE_NAME, ['kid'])[0] == [('VA#A#S', 'old')]
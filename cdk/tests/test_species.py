@@ -0,0 +1,95 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+import dogs
+import species
+
+
+def dog(name, species_raw):
+    return {'shelter': 'Arlington Shelter', 'city': 'Arlington', 'state': 'VA',
+            'dog_name': name, 'species': species_raw, 'description': 'Good dog'}
+
+
+class TestClassify:
+    """Tests for species normalization against the alias table"""
+
+    @pytest.mark.parametrize('raw, code, matched_by', [
+        ('Labrador Retriever', species.LABRADOR_RETRIEVER, 'alias'),
+        ('black lab', species.LABRADOR_RETRIEVER, 'alias'),
+        ('English Labrador-Retriever', species.LABRADOR_RETRIEVER, 'alias'),
+        ('Labrador retreiver', species.LABRADOR_RETRIEVER, 'fuzzy'),
+        ('Laborador', species.LABRADOR_RETRIEVER, 'fuzzy'),
+        ('Labradoodle', species.LABRADOR_MIX, 'alias'),
+        ('lab mix', species.LABRADOR_MIX, 'mix'),
+        ('Labrador x Poodle', species.LABRADOR_MIX, 'mix'),
+        ('shepherd mix', species.MIXED_BREED, 'mix'),
+        ('Golden Retriever', 'GOLDEN_RETRIEVER', 'alias'),
+        ('lab/pit', species.UNKNOWN, 'unmatched'),
+        ('', species.UNKNOWN, 'empty')
+    ])
+    def test_classification(self, raw, code, matched_by):
+        assert species.classify(raw) == (code, matched_by)
+
+    def test_only_purebred_labradors_are_accepted(self):
+        assert species.is_labrador('Yellow Lab')
+        assert not species.is_labrador('Labradoodle')
+        assert not species.is_labrador('Lab mix')
+
+
+class TestSpeciesRouting:
+    """Tests for write-time species routing and SpeciesIndex listings"""
+
+    def test_create_stores_canonical_species(self, aws):
+        with patch.object(dogs, 'kms', aws['kms']):
+            result = dogs.create_dog(dog('Buddy', 'black lab'))
+
+        assert result['statusCode'] == 201
+        item = aws['dogs'].scan()['Items'][0]
+        assert item['species'] == 'Labrador Retriever'
+        assert item['species_raw'] == 'black lab'
+
+    def test_non_labrador_is_quarantined(self, aws):
+        result = dogs.create_dog(dog('Doodle', 'Labradoodle'))
+
+        body = json.loads(result['body'])
+        assert result['statusCode'] == 400
+        quarantined = aws['quarantine'].get_item(Key={'quarantine_id': body['quarantine_id']})['Item']
+        assert quarantined['breed_code'] == species.LABRADOR_MIX
+        assert quarantined['source'] == 'api'
+        assert 'Doodle' not in quarantined['record']
+        assert aws['dogs'].scan()['Count'] == 0
+
+    def test_listing_queries_species_index(self, aws):
+        aws['dogs'].put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'lab', 'state': 'VA',
+                                   'species': 'Labrador Retriever', 'created_at': '2024-01-01'})
+        aws['dogs'].put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'legacy', 'state': 'VA',
+                                   'species': 'lab mix', 'created_at': '2024-01-02'})
+
+        with patch.object(dogs.dogs_table, 'query', wraps=dogs.dogs_table.query) as query:
+            result = dogs.get_dogs({'limit': '10'})
+
+        assert [dog['dog_id'] for dog in json.loads(result['body'])['dogs']] == ['lab']
+        assert query.call_args.kwargs['IndexName'] == 'SpeciesIndex'
+
+    def test_backfill_canonicalizes_and_quarantines(self, aws):
+        table = aws['dogs']
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'lab', 'species': 'Chocolate Lab',
+                             'created_at': '2024-01-01', 'version': 1})
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'doodle', 'species': 'Labradoodle',
+                             'created_at': '2024-01-01'})
+        table.put_item(Item={'shelter_id': 'VA#A#S', 'dog_id': 'done', 'created_at': '2024-01-01',
+                             'species': 'Labrador Retriever', 'species_raw': 'Labrador'})
+
+        stats = dogs.maintenance_handler({'task': 'classify_dog_species'}, None)
+
+        assert stats == {'scanned': 3, 'canonicalized': 1, 'quarantined': 1,
+                         'skipped': 1, 'failed': 0}
+        lab = table.get_item(Key={'shelter_id': 'VA#A#S', 'dog_id': 'lab'})['Item']
+        assert (lab['species'], lab['species_raw'], lab['version']) == (
+            'Labrador Retriever', 'Chocolate Lab', 2
+        )
+        assert 'Item' not in table.get_item(Key={'shelter_id': 'VA#A#S', 'dog_id': 'doodle'})
+        quarantined = aws['quarantine'].get_item(Key={'quarantine_id': 'VA#A#S#doodle'})['Item']
+        assert quarantined['breed_code'] == species.LABRADOR_MIX
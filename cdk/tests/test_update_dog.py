@@ -0,0 +1,138 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+import dogs
+import search
+
+
+def create(aws, **fields):
+    dog = {'shelter': 'S', 'city': 'A', 'state': 'VA', 'dog_name': 'Rex',
+           'species': 'Labrador Retriever', 'description': 'Good with kids',
+           'dog_weight': '60 lbs', 'dog_color': 'Black', 'dog_birthday': '4/23/2020', **fields}
+    with patch.object(dogs, 'kms', aws['kms']):
+        return json.loads(dogs.create_dog(dog)['body'])['dog']
+
+
+@pytest.fixture
+def rex(aws):
+    dog = create(aws)
+    dogs.dog_cache.clear()
+    yield dog
+    dogs.dog_cache.clear()
+
+
+def put(aws, dog, body):
+    event = {'httpMethod': 'PUT', 'path': f"/dogs/{dog['dog_id']}", 'resource': '/dogs/{dog_id}',
+             'pathParameters': {'dog_id': dog['dog_id']},
+             'queryStringParameters': {'shelter_id': dog['shelter_id']},
+             'headers': None, 'body': body if isinstance(body, str) else json.dumps(body)}
+    with patch.object(dogs, 'kms', aws['kms']):
+        return dogs.handler(event, None)
+
+
+def stored(aws, dog):
+    return aws['dogs'].get_item(Key={'shelter_id': dog['shelter_id'], 'dog_id': dog['dog_id']})['Item']
+
+
+def terms(aws, dog):
+    key = search.dog_key(dog['shelter_id'], dog['dog_id'])
+    return sorted(posting['term'] for posting in aws['search'].scan()['Items']
+                  if posting['dog_key'] == key)
+
+
+class TestUpdateDog:
+    """Tests for PUT /dogs/{dog_id}"""
+
+    def test_one_write_changes_only_submitted_fields(self, aws, rex):
+        before = stored(aws, rex)
+        with patch.object(dogs.dogs_table, 'get_item') as get_item, \
+                patch.object(dogs.dogs_table, 'put_item') as put_item, \
+                patch.object(dogs.dogs_table, 'update_item',
+                             wraps=dogs.dogs_table.update_item) as update_item, \
+                patch.object(dogs, 'encrypt_dog_name') as encrypt:
+            result = put(aws, rex, {'description': 'Loves swimming', 'dog_weight': '30 kg'})
+
+        get_item.assert_not_called()
+        put_item.assert_not_called()
+        encrypt.assert_not_called()
+        assert update_item.call_count == 1
+        assert result['statusCode'] == 200
+        after = stored(aws, rex)
+        assert after['description'] == 'Loves swimming'
+        assert float(after['dog_weight']) == pytest.approx(66.14, abs=0.01)
+        assert after['version'] == 2
+        assert after['updated_at'] > before['updated_at']
+        unchanged = ('encrypted_dog_name', 'created_at', 'dog_color', 'state_color', 'birth_date')
+        assert {field: after[field] for field in unchanged} == {field: before[field] for field in unchanged}
+        assert terms(aws, rex) == ['love', 'swimming']
+        assert json.loads(result['body'])['dog']['version'] == 2
+
+    def test_names_are_encrypted_only_when_changed(self, aws, rex):
+        assert put(aws, rex, {'dog_name': 'Rocky'})['statusCode'] == 200
+
+        with patch.object(dogs, 'kms', aws['kms']):
+            dog = json.loads(dogs.get_dog(rex['dog_id'], {'shelter_id': rex['shelter_id']})['body'])['dog']
+        assert dog['dog_name'] == 'Rocky'
+
+    def test_normalization_matches_create(self, aws, rex):
+        assert put(aws, rex, {'dog_color': 'chocolate brown', 'dog_birthday': '2019-01-02',
+                              'species': 'labrador retriever (yellow)'})['statusCode'] == 200
+        item = stored(aws, rex)
+        assert (item['state_color'], item['birth_date']) == ('VA#chocolate', '2019-01-02')
+        assert (item['species'], item['species_raw']) == ('Labrador Retriever',
+                                                          'labrador retriever (yellow)')
+
+        # Values the indexes cannot key on drop the stale keys
+        assert put(aws, rex, {'dog_color': 'Brindle', 'dog_birthday': 'unknown'})['statusCode'] == 200
+        item = stored(aws, rex)
+        assert 'state_color' not in item and 'birth_date' not in item
+        assert item['dog_birthday'] == 'unknown'
+
+    def test_color_keys_use_the_stored_state(self, aws):
+        dog = create(aws, state='va')
+
+        assert put(aws, dog, {'dog_color': 'Yellow'})['statusCode'] == 200
+        assert stored(aws, dog)['state_color'] == 'va#yellow'
+
+    def test_version_guards_against_lost_updates(self, aws, rex):
+        assert put(aws, rex, {'description': 'Calm', 'version': 1})['statusCode'] == 200
+
+        # A second editor still holding version 1
+        result = put(aws, rex, {'description': 'Playful', 'version': 1})
+
+        assert result['statusCode'] == 409
+        assert json.loads(result['body'])['version'] == 2
+        assert stored(aws, rex)['description'] == 'Calm'
+
+    def test_counters_survive_and_do_not_bump_version(self, aws, rex):
+        key = {'shelter_id': rex['shelter_id'], 'dog_id': rex['dog_id']}
+        aws['dogs'].update_item(Key=key, UpdateExpression='ADD wag_count :one, popularity :one',
+                                ExpressionAttributeValues={':one': 1})
+
+        assert put(aws, rex, {'description': 'Calm', 'version': 1})['statusCode'] == 200
+        item = stored(aws, rex)
+        assert (item['wag_count'], item['popularity'], item['version']) == (1, 1, 2)
+
+    @pytest.mark.parametrize('body, error', [
+        ({'state': 'MD'}, 'state cannot be updated'),
+        ({'wag_count': 100}, 'wag_count cannot be updated'),
+        ({'species': 'Poodle'}, dogs.NOT_LABRADOR_ERROR),
+        ({'dog_weight': 'heavy'}, 'Invalid weight format: heavy'),
+        ({'description': 'Calm', 'version': '1'}, 'version must be an integer'),
+        ({'version': 1}, 'Request body must contain at least one field to update'),
+        ('[1]', 'Dog record must be a JSON object')
+    ])
+    def test_invalid_updates(self, aws, rex, body, error):
+        result = put(aws, rex, body)
+
+        assert result['statusCode'] == 400
+        assert json.loads(result['body'])['error'] == error
+        assert stored(aws, rex)['version'] == 1
+
+    def test_missing_dog_is_not_created(self, aws):
+        dog = {'shelter_id': 'VA#A#S', 'dog_id': 'nope'}
+
+        assert put(aws, dog, {'description': 'Calm'})['statusCode'] == 404
+        assert 'Item' not in aws['dogs'].get_item(Key=dog)
@@ -0,0 +1,57 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+import dogs
+import weights
+
+
+class TestParseWeight:
+    """Tests for free-text weight normalization"""
+
+    @pytest.mark.parametrize('raw, pounds', [
+        ('45', 45.0),
+        ('45 lbs', 45.0),
+        ('25.5', 25.5),
+        ('thirty two pounds', 32.0),
+        ('Thirty-Two lbs', 32.0),
+        ('one hundred and five', 105.0),
+        ('15 kg', 33.07),
+        ('20kgs', 44.09),
+        ('40-50 lbs', 45.0),
+        ('40 to 50 pounds', 45.0),
+        ('forty and fifty', 45.0),
+        ('approx. 55#', 55.0)
+    ])
+    def test_text_formats(self, raw, pounds):
+        assert weights.parse_weight(raw) == pounds
+
+    def test_numbers_pass_through(self):
+        assert weights.parse_weight(30) == 30.0
+        assert weights.parse_weight(Decimal('42.5')) == 42.5
+
+    @pytest.mark.parametrize('raw', ['invalid', '', None, True, ['45']])
+    def test_unparseable_values(self, raw):
+        assert weights.parse_weight(raw) is None
+
+    def test_batch_parses_each_distinct_value_once(self):
+        raw = ['45 lbs', '15 kg', '45 lbs', 45, None, '45 lbs']
+
+        with patch('weights.parse_weight', wraps=weights.parse_weight) as parse:
+            result = weights.parse_weights(raw)
+
+        assert result == [45.0, 33.07, 45.0, 45.0, None, 45.0]
+        assert parse.call_count == 4
+
+    def test_batch_handles_unhashable_values(self):
+        assert weights.parse_weights(['45 lbs', [45], {'lbs': 45}, '45 lbs']) == [45.0, None, None, 45.0]
+
+    def test_dog_items_store_pounds(self):
+        item = dogs.build_dog_item({
+            'shelter': 'Arlington Shelter', 'city': 'Arlington', 'state': 'VA',
+            'dog_name': 'Buddy', 'species': 'Labrador Retriever',
+            'description': 'Good dog', 'dog_weight': '20 kg'
+        }, 'encrypted')
+
+        assert item['dog_weight'] == Decimal('44.09')